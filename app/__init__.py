@@ -7,9 +7,10 @@ from flask_migrate import Migrate
 from flask_babel import Babel
 from flask_wtf.csrf import CSRFProtect
 from flask_bootstrap import Bootstrap
+from app.replicas import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 mail = Mail()
 migrate = Migrate()
@@ -30,8 +31,17 @@ def create_app(config_class=None):
     else:
         app.config.from_object(config_class)
     
+    # Engine profile: pool options must be set before the engines are created
+    from app.engine import configure_engine_options, apply_sqlite_pragmas
+    configure_engine_options(app)
+    
+    # Adds the replica bind, so also before the engines are created
+    from app.replicas import replica_router
+    replica_router.init_app(app)
+    
     # Initialize extensions with app
     db.init_app(app)
+    apply_sqlite_pragmas(app, db)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
@@ -43,6 +53,25 @@ def create_app(config_class=None):
     csrf.init_app(app)
     bootstrap.init_app(app)
     
+    # Registered first so its timings cover every other request hook
+    from app.perf import perf_monitor
+    perf_monitor.init_app(app)
+    
+    from app.view_counter import view_counter
+    from app.cache import cache
+    from app.images import image_pipeline
+    from app.assets import static_assets
+    from app.page_cache import page_cache
+    view_counter.init_app(app)
+    cache.init_app(app)
+    page_cache.init_app(app)
+    image_pipeline.init_app(app)
+    static_assets.init_app(app)
+    
+    # Permission-checked uploads are not reachable through the static route
+    from app.serving import protect_static_uploads
+    protect_static_uploads(app)
+    
     # Ensure upload directories exist
     os.makedirs(os.path.join(app.static_folder, 'uploads', 'school_logos'), exist_ok=True)
     os.makedirs(os.path.join(app.static_folder, 'uploads', 'media'), exist_ok=True)
@@ -75,6 +104,14 @@ def create_app(config_class=None):
     # Import models to ensure they are registered with SQLAlchemy
     from app.models import user, school, volunteer, article, media, report
     
+    # Keep the search index, platform counters, quiz versions, unread
+    # notification counts and media ratings in sync with model changes
+    from app import search, counters, quiz_cache, notifications, ratings
+    
+    # CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Shell context processor
     @app.shell_context_processor
     def make_shell_context():
@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import current_app, request, send_from_directory
+
+# Build output, relative to the static folder
+DIST_FOLDER = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# User uploads are served by their own routes and never fingerprinted
+EXCLUDED_FOLDERS = {DIST_FOLDER, 'uploads'}
+
+# Only text formats benefit from precompression
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map', '.ico'}
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprinted_name(path, digest):
+    """`css/style.css` becomes `css/style.<hash>.css`."""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{digest[:12]}{ext}'
+
+
+def _compress_brotli(data):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def build_assets(static_folder):
+    """Fingerprint and precompress every static asset and write the manifest.
+
+    Each file is copied to `dist/` under a name containing its content hash,
+    alongside `.gz` and, when the `brotli` package is installed, `.br`
+    variants for text formats. Builds are repeatable: unchanged files keep
+    their names.
+
+    Args:
+        static_folder: The application's static folder
+
+    Returns:
+        The manifest, mapping source paths to fingerprinted paths
+    """
+    dist_folder = os.path.join(static_folder, DIST_FOLDER)
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_FOLDERS]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            path = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            hashed = fingerprinted_name(path, hashlib.sha256(data).hexdigest())
+            target = os.path.join(dist_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                compressed = _compress_brotli(data)
+                if compressed is not None:
+                    with open(target + '.br', 'wb') as f:
+                        f.write(compressed)
+
+            manifest[path] = f'{DIST_FOLDER}/{hashed}'
+
+    with open(os.path.join(dist_folder, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class StaticAssets:
+    """Serve fingerprinted, precompressed static files from the build manifest.
+
+    Once `flask assets-build` has run, `url_for('static', filename=...)`
+    resolves to the fingerprinted name. Those files never change, so they
+    are sent with a far-future immutable Cache-Control and in the best
+    precompressed encoding the client accepts. Files missing from the
+    manifest are served as before.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_age = app.config.get('ASSETS_MAX_AGE', 365 * 24 * 3600)
+        self.manifest = {}
+        if app.config.get('ASSETS_FINGERPRINT', True):
+            self.manifest = self.load_manifest(app.static_folder)
+
+        if self.manifest:
+            app.url_defaults(self._fingerprint_url)
+            app.view_functions['static'] = self.send_static_file
+        app.extensions['static_assets'] = self
+
+    @staticmethod
+    def load_manifest(static_folder):
+        try:
+            with open(os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _fingerprint_url(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = self.manifest.get(values['filename'], values['filename'])
+
+    def send_static_file(self, filename):
+        """Static view that negotiates precompressed variants of built assets."""
+        static_folder = current_app.static_folder
+        if not filename.startswith(DIST_FOLDER + '/'):
+            return current_app.send_static_file(filename)
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if accepted[encoding] and os.path.exists(os.path.join(static_folder, filename + suffix)):
+                response = send_from_directory(static_folder, filename + suffix, mimetype=mimetype,
+                                               max_age=self.max_age)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(static_folder, filename, max_age=self.max_age)
+
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+static_assets = StaticAssets()
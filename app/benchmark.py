@@ -0,0 +1,284 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import url_for
+from app.perf import percentile
+
+# Result fields where a larger value is a regression
+LATENCY_FIELDS = ('p50', 'p95', 'p99')
+
+
+class Scenario:
+    """One endpoint to drive.
+
+    Args:
+        endpoint: The endpoint name, used for url_for and in reports and the history
+        values: A callable taking the fixture and returning the url_for arguments
+        method: GET or POST
+        login: 'admin', 'user' or None for anonymous clients
+        data: A callable taking the fixture and returning the form data to POST
+    """
+
+    def __init__(self, endpoint, values=None, method='GET', login=None, data=None):
+        self.endpoint = endpoint
+        self.values = values
+        self.method = method
+        self.login = login
+        self.data = data
+
+
+def _quiz_answers(fixture):
+    return {f'question_{question_id}': str(choice_id) for question_id, choice_id in fixture['answers'].items()}
+
+
+SCENARIOS = [
+    Scenario('main.index'),
+    Scenario('content.article_view', lambda f: {'slug': f['article_slug']}),
+    Scenario('content.media_list'),
+    Scenario('school.schools_list'),
+    Scenario('main.search', lambda f: {'query': 'مدرسة', 'category': 'all'}),
+    Scenario('content.quiz_take', lambda f: {'id': f['quiz_id']}, method='POST', login='user', data=_quiz_answers),
+    Scenario('admin.export_data', lambda f: {'data_type': 'articles'}, login='admin'),
+]
+
+
+def create_benchmark_app(database=None):
+    """Boot the application with TestingConfig for benchmarking.
+
+    Unlike in tests, exceptions are not propagated: a failing request is
+    answered with a 500 and counted as an error, as in production.
+
+    Args:
+        database: Path of a SQLite file to use instead of the in-memory
+            database. A file lets concurrent clients use separate connections
+            the way a deployed worker does.
+
+    Returns:
+        The application
+    """
+    from app import create_app
+    from app.config import TestingConfig
+
+    class BenchmarkConfig(TestingConfig):
+        TESTING = False
+        PROPAGATE_EXCEPTIONS = False
+        MAIL_SUPPRESS_SEND = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.abspath(database)}' if database \
+            else TestingConfig.SQLALCHEMY_DATABASE_URI
+
+    return create_app(BenchmarkConfig)
+
+
+def seed_fixture(schools=50, articles=200, media=200):
+    """Create the rows the scenarios read, inside the current app context.
+
+    Returns:
+        A dict of ids the scenarios build their URLs and form data from
+    """
+    from app import db
+    from app.models.article import Article, Quiz, QuizChoice, QuizQuestion
+    from app.models.media import Media
+    from app.models.school import School
+    from app.models.user import User
+
+    admin = User(name='مدير', email='admin@benchmark.local', role='admin')
+    admin.set_password('benchmark')
+    user = User(name='زائر', email='user@benchmark.local')
+    user.set_password('benchmark')
+    db.session.add_all([admin, user])
+    db.session.flush()
+
+    for i in range(schools):
+        db.session.add(School(name=f'مدرسة النور {i}', location='القاهرة', address=f'شارع {i}',
+                              email=f'school{i}@benchmark.local', student_count=300 + i))
+
+    article = None
+    for i in range(articles):
+        article = Article(title=f'مقال عن المدرسة {i}', content='محتوى تجريبي عن مدرسة في مصر. ' * 40,
+                          category='history', author_id=admin.id, summary='ملخص', is_published=True)
+        db.session.add(article)
+        db.session.flush()
+
+    for i in range(media):
+        item = Media(title=f'صورة المدرسة {i}', media_type='image', user_id=admin.id,
+                     description='وصف', external_url=f'https://example.com/{i}.jpg')
+        item.is_approved = True
+        item.featured = i < 4
+        db.session.add(item)
+
+    quiz = Quiz(title='اختبار', category='history', author_id=admin.id, is_published=True)
+    db.session.add(quiz)
+    db.session.flush()
+    answers = {}
+    for i in range(10):
+        question = QuizQuestion(quiz_id=quiz.id, question_text=f'سؤال {i}', order=i)
+        db.session.add(question)
+        db.session.flush()
+        correct = QuizChoice(question_id=question.id, choice_text='صحيح', is_correct=True, order=0)
+        db.session.add_all([correct, QuizChoice(question_id=question.id, choice_text='خطأ', order=1)])
+        db.session.flush()
+        answers[question.id] = correct.id
+
+    db.session.commit()
+    return {
+        'admin_id': admin.id,
+        'user_id': user.id,
+        'article_slug': article.slug if article else None,
+        'quiz_id': quiz.id,
+        'answers': answers,
+    }
+
+
+def _client(app, user_id):
+    client = app.test_client()
+    if user_id is not None:
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+    return client
+
+
+def run_scenario(app, scenario, fixture, clients=8, requests=200, warmup=5):
+    """Drive one endpoint with concurrent clients.
+
+    Each client thread has its own test client (and cookie jar) and sends
+    its share of the requests back to back, reading each whole body. Requests go through the whole
+    WSGI stack in process, so results exclude network and server overhead.
+
+    Returns:
+        A dict with the request and error counts, req/s and latency
+        percentiles in milliseconds
+    """
+    user_id = {'admin': fixture['admin_id'], 'user': fixture['user_id']}.get(scenario.login)
+    with app.test_request_context():
+        url = url_for(scenario.endpoint, **(scenario.values(fixture) if scenario.values else {}))
+    data = scenario.data(fixture) if scenario.data else None
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(count):
+        nonlocal errors
+        client = _client(app, user_id)
+        for _ in range(warmup):
+            client.open(url, method=scenario.method, data=data).close()
+        local_latencies, local_errors = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.open(url, method=scenario.method, data=data)
+            # Streamed bodies (e.g. CSV exports) are only produced as they are read
+            response.get_data()
+            response.close()
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    shares = [requests // clients + (1 if i < requests % clients else 0) for i in range(clients)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(worker, [share for share in shares if share]))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / duration if duration else 0.0,
+        'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def load_history(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(path, history):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+
+
+def find_regressions(previous, results, threshold):
+    """Compare a run against the previous one.
+
+    Args:
+        previous: Results of the previous run, keyed by scenario name
+        results: Results of this run, keyed by scenario name
+        threshold: Allowed relative change (0.2 allows 20% lower req/s or
+            20% higher latency percentiles)
+
+    Returns:
+        A list of human-readable regression descriptions
+    """
+    regressions = []
+    for name, result in results.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        if before['rps'] and result['rps'] < before['rps'] * (1 - threshold):
+            regressions.append(f"{name}: {result['rps']:.1f} req/s, was {before['rps']:.1f}")
+        for field in LATENCY_FIELDS:
+            if before[field] and result[field] > before[field] * (1 + threshold):
+                regressions.append(f'{name}: {field} {result[field]:.1f} ms, was {before[field]:.1f} ms')
+        if result['errors'] > before['errors']:
+            regressions.append(f"{name}: {result['errors']} errors, was {before['errors']}")
+    return regressions
+
+
+def run_benchmarks(scenarios=None, clients=8, requests=200, database=None, history_path=None, threshold=0.2):
+    """Seed a fresh application, drive each scenario and record the run.
+
+    The run is compared with the last one in the history recorded with the
+    same number of clients and database mode, then appended to the history.
+
+    Returns:
+        (results keyed by scenario name, list of regressions)
+
+    Raises:
+        ValueError: If several clients would share the in-memory database
+    """
+    from app import db
+
+    if database is None and clients > 1:
+        raise ValueError('The in-memory database has a single connection; use a file or one client')
+    if database and os.path.exists(database):
+        os.remove(database)
+    app = create_benchmark_app(database)
+    with app.app_context():
+        db.create_all()
+        fixture = seed_fixture()
+
+    scenarios = scenarios or SCENARIOS
+    results = {scenario.endpoint: run_scenario(app, scenario, fixture, clients, requests) for scenario in scenarios}
+
+    regressions = []
+    mode = 'file' if database else 'memory'
+    if history_path:
+        history = load_history(history_path)
+        previous = next((run for run in reversed(history)
+                         if run['clients'] == clients and run['database'] == mode), None)
+        if previous:
+            regressions = find_regressions(previous['results'], results, threshold)
+        history.append({
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+            'clients': clients,
+            'requests': requests,
+            'database': mode,
+            'results': results,
+        })
+        save_history(history_path, history)
+    return results, regressions
+
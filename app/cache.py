@@ -0,0 +1,289 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Cache keys holding the current version of each tag
+TAG_PREFIX = 'tag:'
+
+
+class MemoryCache:
+    """A thread-safe, size-bounded LRU cache local to this process.
+
+    Args:
+        max_entries: Least recently used entries are evicted beyond this size
+        default_timeout: Seconds an entry lives (0 means no expiry)
+    """
+
+    def __init__(self, max_entries=1000, default_timeout=300):
+        self.max_entries = max_entries
+        self.default_timeout = default_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expiry(self, timeout):
+        timeout = self.default_timeout if timeout is None else timeout
+        return time.monotonic() + timeout if timeout else None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._entries[key] = (value, self._expiry(timeout))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """A cache shared by every worker, stored in Redis as pickled values.
+
+    Args:
+        url: The Redis connection URL
+        key_prefix: Prefix added to every key
+        default_timeout: Seconds an entry lives (0 means no expiry)
+    """
+
+    def __init__(self, url, key_prefix='e3rafbaladak:', default_timeout=300):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+        self.default_timeout = default_timeout
+
+    def get(self, key):
+        value = self._redis.get(self.key_prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        values = self._redis.mget([self.key_prefix + key for key in keys])
+        return [pickle.loads(value) if value is not None else None for value in values]
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        self._redis.set(self.key_prefix + key, pickle.dumps(value), ex=timeout or None)
+
+    def delete(self, key):
+        self._redis.delete(self.key_prefix + key)
+
+    def clear(self):
+        keys = list(self._redis.scan_iter(self.key_prefix + '*'))
+        if keys:
+            self._redis.delete(*keys)
+
+
+class FileSystemCache:
+    """A cache shared by the workers of one host, one pickle file per key.
+
+    Tag versions are kept apart from the entries and never pruned, since
+    losing one would invalidate every entry carrying the tag.
+
+    Args:
+        directory: Directory holding the entries, created if missing
+        max_entries: Beyond this many files, expired and then oldest entries are removed
+        default_timeout: Seconds an entry lives (0 means no expiry)
+    """
+
+    # Sets between two checks of the number of files
+    PRUNE_EVERY = 100
+
+    def __init__(self, directory, max_entries=1000, default_timeout=300):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.default_timeout = default_timeout
+        self._sets = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        suffix = '.tag' if key.startswith(TAG_PREFIX) else '.cache'
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + suffix)
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at is not None and expires_at < time.time():
+            self._remove(path)
+            return None
+        return value
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        return self._read(self._path(key))
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires_at = time.time() + timeout if timeout else None
+        # Written under a temporary name and renamed, so readers never see half a file
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((expires_at, value), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            self._remove(temporary)
+            raise
+
+        self._sets += 1
+        if self._sets % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith('.cache')]
+
+    def _prune(self):
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        for entry in entries:
+            self._read(entry.path)  # Removes the file if it has expired
+        entries = self._entries()
+        if len(entries) > self.max_entries:
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - self.max_entries]:
+                self._remove(entry.path)
+
+    def delete(self, key):
+        self._remove(self._path(key))
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(('.cache', '.tag')):
+                self._remove(entry.path)
+
+
+class Cache:
+    """Application cache whose backend is chosen by CACHE_TYPE ('memory', 'filesystem' or 'redis').
+
+    Args:
+        app: The application, or None to call init_app later
+        config_prefix: Prefix of the settings this cache reads (<prefix>_TYPE,
+            <prefix>_REDIS_URL, <prefix>_DIR, <prefix>_MAX_ENTRIES,
+            <prefix>_DEFAULT_TIMEOUT); missing ones fall back to the CACHE_ settings
+    """
+
+    def __init__(self, app=None, config_prefix='CACHE'):
+        self.backend = None
+        self.config_prefix = config_prefix
+        if app is not None:
+            self.init_app(app)
+
+    def _setting(self, config, name, default=None):
+        return config.get(f'{self.config_prefix}_{name}', config.get(f'CACHE_{name}', default))
+
+    def init_app(self, app):
+        config = app.config
+        timeout = self._setting(config, 'DEFAULT_TIMEOUT', 300)
+        max_entries = self._setting(config, 'MAX_ENTRIES', 1000)
+        cache_type = self._setting(config, 'TYPE', 'memory')
+        if cache_type == 'redis':
+            # Caches sharing a Redis database keep their keys apart
+            key_prefix = 'e3rafbaladak:'
+            if self.config_prefix != 'CACHE':
+                key_prefix += self.config_prefix.lower() + ':'
+            self.backend = RedisCache(self._setting(config, 'REDIS_URL'), key_prefix, timeout)
+        elif cache_type == 'filesystem':
+            directory = self._setting(config, 'DIR') or os.path.join(app.instance_path, self.config_prefix.lower())
+            self.backend = FileSystemCache(directory, max_entries, timeout)
+        else:
+            self.backend = MemoryCache(max_entries, timeout)
+        app.extensions[self.config_prefix.lower()] = self
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.backend.set(key, value, timeout)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    # Tags: an entry stored with set_tagged records the version of each of
+    # its tags, and is a miss once any of them has been invalidated since.
+    # Invalidating a tag only deletes its version key, so it costs the same
+    # however many entries carry the tag.
+
+    def tag_versions(self, tags):
+        """The current version of each tag, creating versions for new tags.
+
+        Returns:
+            A dict of tag -> version to pass to set_tagged
+        """
+        tags = list(tags)
+        versions = dict(zip(tags, self.backend.get_many([TAG_PREFIX + tag for tag in tags])))
+        for tag, version in versions.items():
+            if version is None:
+                versions[tag] = uuid.uuid4().hex
+                self.backend.set(TAG_PREFIX + tag, versions[tag], 0)
+        return versions
+
+    def set_tagged(self, key, value, versions, timeout=None):
+        """Store a value that stays valid while none of its tags are invalidated.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            versions: Tag versions from tag_versions, read before the value was computed
+            timeout: Seconds the entry lives (None for the default)
+        """
+        self.backend.set(key, (versions, value), timeout)
+
+    def get_tagged(self, key):
+        """The value stored by set_tagged, or None if missing or any tag was invalidated."""
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        versions, value = entry
+        current = self.backend.get_many([TAG_PREFIX + tag for tag in versions])
+        if current != list(versions.values()):
+            return None
+        return value
+
+    def invalidate_tags(self, tags):
+        """Make every entry stored with any of these tags a miss."""
+        for tag in tags:
+            self.backend.delete(TAG_PREFIX + tag)
+
+
+cache = Cache()
@@ -0,0 +1,236 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+@click.command('search-reindex')
+@with_appcontext
+def search_reindex_command():
+    """Rebuild the full-text search index from scratch."""
+    from app.search import rebuild_index
+
+    counts = rebuild_index()
+    for entity_type, count in counts.items():
+        click.echo(f'Indexed {count} {entity_type}')
+
+
+@click.command('reconcile-counters')
+@with_appcontext
+def reconcile_counters_command():
+    """Recompute platform counters, unread notification counts and rating aggregates."""
+    from app.counters import reconcile_counters
+
+    from app.notifications import reconcile_unread_counts
+    from app.ratings import reconcile_ratings
+
+    for name, value in reconcile_counters().items():
+        click.echo(f'{name}: {value}')
+    click.echo(f'Unread notification counts recomputed for {reconcile_unread_counts()} users')
+    click.echo(f'Rating aggregates recomputed for {reconcile_ratings()} media items')
+
+
+@click.command('outbox-worker')
+@click.option('--once', is_flag=True, help='Send one batch and exit.')
+@with_appcontext
+def outbox_worker_command(once):
+    """Send queued emails from the outbox.
+
+    For local testing, run an aiosmtpd stand-in with
+    `python -m aiosmtpd -n -l localhost:8025` and set MAIL_SERVER=localhost,
+    MAIL_PORT=8025 and MAIL_USE_TLS=False.
+    """
+    from app.outbox import OutboxWorker
+
+    worker = OutboxWorker(current_app._get_current_object())
+    if once:
+        try:
+            click.echo(f'Processed {worker.run_once()} emails')
+        finally:
+            worker.pool.close_all()
+        return
+
+    click.echo('Outbox worker started')
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+@click.command('purge-uploads')
+@with_appcontext
+def purge_uploads_command():
+    """Delete resumable uploads abandoned for longer than MEDIA_UPLOAD_EXPIRY hours."""
+    from app.uploads import purge_expired_uploads
+
+    click.echo(f'Purged {purge_expired_uploads()} abandoned uploads')
+
+
+@click.command('assets-build')
+@with_appcontext
+def assets_build_command():
+    """Fingerprint and precompress static files and write the asset manifest."""
+    from app.assets import build_assets
+
+    manifest = build_assets(current_app.static_folder)
+    click.echo(f'Built {len(manifest)} assets')
+
+
+@click.command('benchmark')
+@click.option('--clients', default=8, show_default=True, help='Concurrent clients per endpoint.')
+@click.option('--requests', 'requests_count', default=200, show_default=True, help='Requests per endpoint.')
+@click.option('--endpoint', 'endpoints', multiple=True, help='Only benchmark these endpoints (repeatable).')
+@click.option('--memory', is_flag=True,
+              help='Use the in-memory database instead of a SQLite file (needs --clients 1).')
+@click.option('--threshold', type=float, default=None,
+              help='Allowed relative slowdown (defaults to BENCHMARK_REGRESSION_THRESHOLD).')
+@with_appcontext
+def benchmark_command(clients, requests_count, endpoints, memory, threshold):
+    """Benchmark the hot endpoints against a freshly seeded TestingConfig app.
+
+    Exits with status 1 if any endpoint regressed beyond the threshold
+    compared with the previous run in the history.
+    """
+    import os
+    from app.benchmark import SCENARIOS, run_benchmarks
+
+    scenarios = [scenario for scenario in SCENARIOS if not endpoints or scenario.endpoint in endpoints]
+    if not scenarios:
+        raise click.BadParameter(f'choose from {", ".join(s.endpoint for s in SCENARIOS)}', param_hint='--endpoint')
+    if memory and clients > 1:
+        # Every thread would share the in-memory database's single connection
+        raise click.BadParameter('the in-memory database supports one client; use --clients 1', param_hint='--memory')
+
+    config = current_app.config
+    database = None if memory else os.path.join(current_app.instance_path, 'benchmark.db')
+    results, regressions = run_benchmarks(
+        scenarios, clients, requests_count, database,
+        history_path=config['BENCHMARK_HISTORY_FILE'],
+        threshold=config['BENCHMARK_REGRESSION_THRESHOLD'] if threshold is None else threshold
+    )
+
+    click.echo(f'{"endpoint":<24} {"req/s":>8} {"p50":>8} {"p95":>8} {"p99":>8} {"errors":>7}')
+    for name, result in results.items():
+        click.echo(f'{name:<24} {result["rps"]:>8.1f} {result["p50"]:>8.1f} {result["p95"]:>8.1f} '
+                   f'{result["p99"]:>8.1f} {result["errors"]:>7}')
+
+    if regressions:
+        for regression in regressions:
+            click.echo(f'Regression: {regression}', err=True)
+        raise SystemExit(1)
+
+
+@click.command('seed')
+@click.option('--scale', default=1.0, show_default=True,
+              help='Multiply every default row count (e.g. 100 for about a million volunteers).')
+@click.option('--volunteers', type=click.IntRange(min=1), help='Volunteers to create (overrides --scale).')
+@click.option('--users', type=click.IntRange(min=1), help='Users to create (overrides --scale).')
+@click.option('--schools', type=click.IntRange(min=1), help='Schools to create (overrides --scale).')
+@click.option('--batch-size', default=10000, show_default=True, help='Rows per executemany INSERT.')
+@click.option('--seed', 'random_seed', type=int, help='Random seed for reproducible data.')
+@click.option('--password', default='password', show_default=True, help='Password of every generated user.')
+@click.option('--skip-search-index', is_flag=True, help='Do not rebuild the search index afterwards.')
+@with_appcontext
+def seed_command(scale, volunteers, users, schools, batch_size, random_seed, password, skip_search_index):
+    """Fill the database with synthetic Arabic data for scale testing.
+
+    Rows are added to whatever is already there. Default counts at
+    --scale 1: 200 schools, 2,000 users, 10,000 volunteers, 1,000
+    articles, 100 quizzes with 5,000 attempts, 5,000 media with ratings and
+    comments, 2,000 reports and 20,000 notifications.
+    """
+    from app import db
+    from app.seed import Seeder, reconcile_seeded_data, scaled_counts
+
+    db.create_all()
+    counts = scaled_counts(scale, volunteers=volunteers, users=users, schools=schools)
+
+    def progress(table, rows, seconds):
+        click.echo(f'{table}: {rows} rows in {seconds:.1f}s ({rows / seconds if seconds else 0:.0f} rows/s)')
+
+    Seeder(counts, batch_size, random_seed, password, progress).run()
+
+    click.echo('Rebuilding counters, unread counts, rating aggregates' +
+               ('' if skip_search_index else ' and the search index'))
+    reconcile_seeded_data(search_index=not skip_search_index)
+
+
+@click.command('check-query-plans')
+@click.option('--verbose', '-v', is_flag=True, help='Print every plan, not just failures.')
+@with_appcontext
+def check_query_plans_command(verbose):
+    """Fail if any hot query in the routes falls back to a full table scan.
+
+    Runs EXPLAIN QUERY PLAN on the configured SQLite database, so run
+    `flask db upgrade` first.
+    """
+    from app.query_plans import check_query_plans
+
+    results = check_query_plans()
+    if not results:
+        click.echo('Query plan checks only support SQLite')
+        return
+
+    failures = [result for result in results if result[2]]
+    for name, plan, full_scans in results:
+        if full_scans or verbose:
+            click.echo(f'{"FULL SCAN" if full_scans else "ok":<9} {name}')
+            for line in plan:
+                click.echo(f'          {line}')
+    click.echo(f'{len(results) - len(failures)}/{len(results)} hot queries use an index')
+    if failures:
+        raise SystemExit(1)
+
+
+@click.command('benchmark-writes')
+@click.option('--writers', default=8, show_default=True, help='Concurrent writer threads.')
+@click.option('--readers', default=2, show_default=True, help='Concurrent reader threads.')
+@click.option('--writes', default=200, show_default=True, help='Single-row commits per writer.')
+@click.option('--profile', 'profiles', multiple=True,
+              help='Engine profiles to compare (default: none and the configured profile).')
+@with_appcontext
+def benchmark_writes_command(writers, readers, writes, profiles):
+    """Compare concurrent SQLite write throughput across engine profiles."""
+    import tempfile
+    from app.write_benchmark import run_write_benchmark
+
+    profiles = profiles or ('none', current_app.config.get('DATABASE_ENGINE_PROFILE', 'default'))
+    with tempfile.TemporaryDirectory() as directory:
+        results = run_write_benchmark(directory, profiles, writers, readers, writes)
+
+    click.echo(f'{"profile":<12} {"writes/s":>10} {"commits":>8} {"errors":>7} {"seconds":>8}')
+    for profile, result in results.items():
+        click.echo(f'{profile:<12} {result["writes_per_second"]:>10.1f} {result["commits"]:>8} '
+                   f'{result["errors"]:>7} {result["duration"]:>8.2f}')
+
+
+@click.command('sync-replica')
+@click.option('--interval', type=float, default=None,
+              help='Keep copying every N seconds instead of copying once.')
+@with_appcontext
+def sync_replica_command(interval):
+    """Copy the primary SQLite database onto the read replica file."""
+    from app.replicas import sync_replica
+
+    try:
+        if interval:
+            click.echo(f'Copying the primary onto the replica every {interval:g}s (Ctrl+C to stop)')
+        sync_replica(current_app._get_current_object(), interval)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        return
+    click.echo('Replica synced.')
+
+
+def register_commands(app):
+    """Register the application's CLI commands."""
+    app.cli.add_command(search_reindex_command)
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(outbox_worker_command)
+    app.cli.add_command(purge_uploads_command)
+    app.cli.add_command(assets_build_command)
+    app.cli.add_command(benchmark_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(benchmark_writes_command)
+    app.cli.add_command(sync_replica_command)
@@ -0,0 +1,128 @@
+import hashlib
+from collections import namedtuple
+from datetime import timezone
+from functools import wraps
+from flask import current_app, request, session
+from flask_babel import get_locale
+from flask_login import current_user
+from sqlalchemy import func, select
+
+# Rows shown on an entity's page: the foreign key pointing at the entity,
+# filters selecting the rows the page renders, columns that can change in
+# place (edits without an updated_at, e.g. a changed rating), and the
+# entity's column the foreign key refers to (its id by default). Rows of
+# the entity's own table, such as related articles, need an aliased class.
+Dependent = namedtuple('Dependent', ['foreign_key', 'criteria', 'values', 'references'], defaults=((), (), None))
+
+
+def _changed_at(model):
+    """The column recording when a row last changed."""
+    return getattr(model, 'updated_at', None) or getattr(model, 'created_at')
+
+
+def validators(model, column, value, dependents=()):
+    """Compute the validators of an entity's page in one query.
+
+    The row's own updated_at, plus the count, id sum and newest change of
+    each kind of dependent row, identify the state the page renders: adding,
+    removing, approving or editing any of them changes the result.
+
+    Returns:
+        (entity id, fingerprint tuple, last modified datetime), or None if no row matches
+    """
+    from app import db
+
+    columns = [model.id, _changed_at(model)]
+    changed_at = [1]  # Positions of the change times among the columns
+    for dependent in dependents:
+        child = dependent.foreign_key.parent.entity
+        references = model.id if dependent.references is None else dependent.references
+        aggregates = [func.count(child.id), func.coalesce(func.sum(child.id), 0), func.max(_changed_at(child))]
+        aggregates += [func.coalesce(func.sum(extra), 0) for extra in dependent.values]
+        changed_at.append(len(columns) + 2)
+        for aggregate in aggregates:
+            columns.append(select(aggregate)
+                           .where(dependent.foreign_key == references, *dependent.criteria)
+                           .scalar_subquery())
+
+    row = db.session.execute(select(*columns).where(column == value).limit(1)).first()
+    if row is None:
+        return None
+
+    times = [row[i] for i in changed_at if row[i] is not None]
+    return row[0], tuple(row[1:]), max(times, default=None)
+
+
+def _entity_tag(fingerprint):
+    """A weak entity tag for the page of an entity in a given state and language."""
+    digest = hashlib.sha1(repr((fingerprint, str(get_locale()))).encode()).hexdigest()
+    return digest[:32]
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # Revalidate on every use rather than trusting a heuristic freshness
+    response.cache_control.no_cache = True
+    return response
+
+
+def conditional(model, lookup='id', column=None, dependents=(), count_view=False):
+    """Answer conditional GETs of an entity's detail page without rendering it.
+
+    Responses carry a weak ETag and Last-Modified computed from the entity's
+    updated_at and its dependent rows; a request whose If-None-Match or
+    If-Modified-Since still matches gets 304 Not Modified without the view
+    being called.
+
+    Only anonymous requests are handled: signed-in users' pages also show
+    their notifications and per-session form tokens, which the validators
+    do not cover. Apply it inside cache_page, which answers conditional
+    requests from the validators stored with a cached page.
+
+    Args:
+        model: The model shown by the page
+        lookup: The view argument identifying the entity
+        column: The model attribute matched against it (default: same name as lookup)
+        dependents: Dependent tuples for the rows shown with the entity
+        count_view: Record a view of the entity on 304 responses, as the view would
+    """
+    column = getattr(model, column or lookup)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Flashed messages are rendered into the page, so it must be sent
+            if (request.method not in ('GET', 'HEAD') or '_flashes' in session
+                    or current_user.is_authenticated):
+                return view(*args, **kwargs)
+
+            state = validators(model, column, kwargs[lookup], dependents)
+            if state is None:
+                return view(*args, **kwargs)  # Let the view respond with its 404
+            entity_id, fingerprint, last_modified = state
+            etag = _entity_tag(fingerprint)
+
+            if _not_modified(etag, last_modified):
+                if count_view:
+                    from app.view_counter import view_counter
+                    view_counter.increment(model.__tablename__, entity_id)
+                return _set_validators(current_app.response_class(status=304), etag, last_modified)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            # A form token issued while rendering would be stale in a revalidated copy
+            if response.status_code == 200 and not session.modified:
+                _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
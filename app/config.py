@@ -10,6 +10,23 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), '../instance/e3rafbaladak.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Engine profile from app.engine.ENGINE_PROFILES: SQLite pragmas (WAL, busy_timeout, ...)
+    # on connect, or pool size/overflow/pre-ping/recycle for server databases.
+    # SQLITE_PRAGMAS and DATABASE_POOL_OPTIONS override individual settings.
+    DATABASE_ENGINE_PROFILE = 'default'
+    
+    # Read replica: GET/HEAD requests of the endpoints routed to 'replica' run their
+    # SELECTs there; everything else, and every write, uses the primary.
+    READ_REPLICA_URI = os.environ.get('READ_REPLICA_URL')  # Unset disables routing
+    READ_REPLICA_DEFAULT_ROUTE = 'primary'  # primary, replica
+    READ_REPLICA_ROUTES = {
+        'main.search': 'replica',
+        'content.article_list': 'replica',
+        'content.article_view': 'replica',
+        'content.media_list': 'replica',
+        'school.schools_list': 'replica',
+    }
+    READ_REPLICA_STICKY_SECONDS = 5  # After a user's own write, read from the primary this long (read-your-writes)
     
     # Mail configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
@@ -20,8 +37,17 @@ class Config:
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'support@e3rafbaladak.com'
     
     # File upload configuration
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload (per request; resumable uploads send smaller chunks)
+    MEDIA_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # 2 GB max for resumable media uploads
+    MEDIA_UPLOAD_EXPIRY = 24  # Hours before an abandoned resumable upload is purged
+    UPLOAD_PROTECTED_FOLDERS = ('media', 'reports')  # Only served through permission-checked endpoints
+    UPLOAD_SEND_MODE = os.environ.get('UPLOAD_SEND_MODE') or 'sendfile'  # sendfile, x-accel-redirect, x-sendfile
+    UPLOAD_ACCEL_PREFIX = '/protected-uploads/'  # nginx internal location aliased to UPLOAD_FOLDER
+    UPLOAD_MAX_AGE = 3600
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static/uploads')
+    # Single copy of every upload (app.storage), hard-linked into UPLOAD_FOLDER; kept out of
+    # the static folder so protected files are only reachable through their links
+    UPLOAD_OBJECTS_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), '../instance/upload_objects')
     ALLOWED_EXTENSIONS = {
         'image': {'png', 'jpg', 'jpeg', 'gif', 'svg'},
         'document': {'pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx'},
@@ -46,6 +72,73 @@ class Config:
     SCHOOLS_PER_PAGE = 20
     VOLUNTEERS_PER_PAGE = 20
     PAGINATION_PER_PAGE = 10
+    SEARCH_RESULTS_PER_PAGE = 10
+    # 'offset' pages by number (COUNT + OFFSET); 'keyset' pages by cursor on the sort key,
+    # so deep pages cost the same as the first. ?pagination=offset|keyset overrides per request.
+    PAGINATION_DEFAULT_MODE = 'offset'
+    PAGINATION_MODES = {
+        'admin.admin_users': 'keyset',
+        'admin.admin_volunteers': 'keyset',
+        'admin.admin_media': 'keyset',
+        'content.media_list': 'keyset',
+        'content.article_list': 'keyset',
+        'volunteer.volunteers_list': 'keyset',
+        'school.school_reports': 'keyset',
+    }
+    PAGINATION_COUNT_CACHE_TIMEOUT = 60  # Seconds keyset listings reuse a total (0 counts every request)
+    
+    # Cache configuration (memory is per process; filesystem is shared by a host's workers,
+    # redis by all workers)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'memory'  # memory, filesystem, redis
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or 'redis://localhost:6379/1'
+    CACHE_DEFAULT_TIMEOUT = 3600
+    CACHE_MAX_ENTRIES = 1000
+    
+    # Full-page cache for anonymous visitors, purged by tag when the rendered rows change
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED') != 'False'
+    # Purges only reach the processes sharing the backend: with several workers use
+    # redis (or filesystem on a single host), or a worker keeps serving purged pages
+    PAGE_CACHE_TYPE = os.environ.get('PAGE_CACHE_TYPE') or CACHE_TYPE  # memory, filesystem, redis
+    PAGE_CACHE_REDIS_URL = CACHE_REDIS_URL
+    PAGE_CACHE_DIR = None  # Filesystem backend directory (default: instance/page_cache)
+    PAGE_CACHE_MAX_ENTRIES = 500
+    PAGE_CACHE_DEFAULT_TIMEOUT = 300  # Also bounds staleness from changes that bypass the ORM
+    
+    # View counters are buffered and flushed in batches (seconds; 0 writes through)
+    VIEW_COUNTER_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL') or 10)
+    VIEW_COUNTER_BACKEND = os.environ.get('VIEW_COUNTER_BACKEND') or 'memory'  # memory, redis
+    VIEW_COUNTER_REDIS_URL = os.environ.get('VIEW_COUNTER_REDIS_URL') or 'redis://localhost:6379/0'
+    
+    # Image derivatives (built from one decode in a process pool; 0 workers builds them in the request)
+    IMAGE_PIPELINE_WORKERS = int(os.environ.get('IMAGE_PIPELINE_WORKERS') or os.cpu_count() or 1)
+    IMAGE_DERIVATIVE_SIZES = {'thumb': 200, 'medium': 800, 'large': 1600}  # Longest side in pixels
+    IMAGE_DERIVATIVE_FORMATS = ('webp', 'avif')  # avif needs Pillow AVIF support or pillow-avif-plugin
+    
+    # Static assets ('flask assets-build' writes fingerprinted, precompressed copies and a manifest)
+    ASSETS_FINGERPRINT = True
+    ASSETS_MAX_AGE = 365 * 24 * 3600  # Fingerprinted files never change
+    
+    # Email outbox (requests only enqueue; `flask outbox-worker` sends)
+    OUTBOX_BATCH_SIZE = 50
+    OUTBOX_WORKER_THREADS = int(os.environ.get('OUTBOX_WORKER_THREADS') or 4)  # SMTP connections per worker
+    OUTBOX_MAX_ATTEMPTS = 6  # Moved to dead letters after this many failures
+    OUTBOX_RETRY_BACKOFF = 30  # Seconds before the first retry, doubled each time
+    OUTBOX_LOCK_TIMEOUT = 600  # Seconds before a message claimed by a dead worker is retried
+    OUTBOX_POLL_INTERVAL = 5
+    OUTBOX_SMTP_MAX_IDLE = 60  # Seconds an idle SMTP connection is kept open
+    
+    # Media ranking: Bayesian average pulls items with few ratings towards the prior mean
+    MEDIA_RATING_PRIOR_MEAN = 3.0
+    MEDIA_RATING_PRIOR_WEIGHT = 5  # Number of prior-mean ratings each item starts with
+    
+    # Request instrumentation (Server-Timing header and /admin/perf percentiles, per process)
+    PERF_MONITOR_ENABLED = os.environ.get('PERF_MONITOR_ENABLED') != 'False'
+    PERF_MONITOR_WINDOW = 1000  # Recent requests per endpoint the percentiles cover
+    PERF_SERVER_TIMING = True  # Expose timings to browsers in the Server-Timing header
+    
+    # `flask benchmark` history, and the relative slowdown that fails a run
+    BENCHMARK_HISTORY_FILE = os.path.join(os.path.abspath(os.path.dirname(__file__)), '../instance/benchmark_history.json')
+    BENCHMARK_REGRESSION_THRESHOLD = 0.2  # 20% fewer req/s or 20% higher p50/p95/p99
     
     # Security settings
     PASSWORD_RESET_TIMEOUT = 3600  # 1 hour
@@ -61,6 +154,8 @@ class Config:
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    DATABASE_ENGINE_PROFILE = 'development'
+    ASSETS_FINGERPRINT = False  # Serve files as edited rather than the last build
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), '../instance/dev.db')
     
 
@@ -68,6 +163,12 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    VIEW_COUNTER_FLUSH_INTERVAL = 0
+    IMAGE_PIPELINE_WORKERS = 0
+    ASSETS_FINGERPRINT = False
+    PERF_MONITOR_ENABLED = False
+    READ_REPLICA_URI = None
+    PAGE_CACHE_ENABLED = False
     
 
 class ProductionConfig(Config):
@@ -75,12 +176,14 @@ class ProductionConfig(Config):
     # Use environment variables in production
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    DATABASE_ENGINE_PROFILE = 'production'
     
     # Production security settings
     SESSION_COOKIE_SECURE = True
     REMEMBER_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     REMEMBER_COOKIE_HTTPONLY = True
+    PERF_SERVER_TIMING = False  # Timings stay on /admin/perf rather than in public responses
 
 
 config_by_name = {
@@ -0,0 +1,117 @@
+from sqlalchemy import event, func, inspect, literal, select
+from app import db
+from app.models.article import Article
+from app.models.media import Media
+from app.models.school import School
+from app.models.stats import PlatformCounter
+from app.models.volunteer import Volunteer
+
+# Counter name -> (model, flag attribute that must be true for the row to count)
+COUNTERS = {
+    'schools': (School, None),
+    'volunteers': (Volunteer, None),
+    'published_articles': (Article, 'is_published'),
+    'approved_media': (Media, 'is_approved'),
+}
+
+_counters_table = PlatformCounter.__table__
+
+
+def _count_query(name):
+    model, flag = COUNTERS[name]
+    query = select(func.count(model.id))
+    if flag is not None:
+        query = query.where(getattr(model, flag) == True)
+    return query
+
+
+def _upsert_insert(dialect_name):
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _adjust(connection, name, delta):
+    """Add delta to a counter inside the flush's own transaction.
+
+    A single upsert: a missing counter row is created with the exact count
+    (the flushed change is already visible to the COUNT), and a concurrent
+    writer creating it first turns this into the increment instead of a
+    primary key violation.
+    """
+    if not delta:
+        return
+    insert = _upsert_insert(connection.dialect.name)
+    count = _count_query(name).scalar_subquery()
+    statement = insert(_counters_table).from_select(['name', 'value'], select(literal(name), count))
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[_counters_table.c.name],
+        set_={'value': _counters_table.c.value + delta},
+    ))
+
+
+def _previous_value(target, attribute):
+    history = inspect(target).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attribute)
+
+
+def _make_listeners(name, flag):
+    def after_insert(mapper, connection, target):
+        if flag is None or getattr(target, flag):
+            _adjust(connection, name, 1)
+
+    def after_update(mapper, connection, target):
+        if flag is not None:
+            _adjust(connection, name, bool(getattr(target, flag)) - bool(_previous_value(target, flag)))
+
+    def after_delete(mapper, connection, target):
+        if flag is None or _previous_value(target, flag):
+            _adjust(connection, name, -1)
+
+    return after_insert, after_update, after_delete
+
+
+for _name, (_model, _flag) in COUNTERS.items():
+    _after_insert, _after_update, _after_delete = _make_listeners(_name, _flag)
+    event.listen(_model, 'after_insert', _after_insert)
+    event.listen(_model, 'after_update', _after_update)
+    event.listen(_model, 'after_delete', _after_delete)
+
+
+def get_platform_counters():
+    """Read every platform counter in a single query.
+
+    Counters missing on an existing database (e.g. created before they were
+    maintained) are computed and stored on this first read.
+
+    Returns:
+        A dict of counter name to value
+    """
+    rows = db.session.execute(select(_counters_table.c.name, _counters_table.c.value)).all()
+    counters = {row.name: row.value for row in rows}
+    if len(counters) < len(COUNTERS):
+        return reconcile_counters()
+    return counters
+
+
+def reconcile_counters():
+    """Recompute every counter from the source tables.
+
+    Returns:
+        A dict of counter name to recomputed value
+    """
+    values = {name: db.session.scalar(_count_query(name)) for name in COUNTERS}
+
+    insert = _upsert_insert(db.session.get_bind(PlatformCounter).dialect.name)
+    for name, value in values.items():
+        statement = insert(_counters_table).values(name=name, value=value)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[_counters_table.c.name],
+            set_={'value': statement.excluded.value},
+        ))
+    db.session.commit()
+    return values
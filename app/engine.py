@@ -0,0 +1,126 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Settings applied to the database engines, chosen by DATABASE_ENGINE_PROFILE.
+# `sqlite_pragmas` run on every new SQLite connection; `pool` options go to
+# create_engine for server databases (PostgreSQL, MySQL).
+ENGINE_PROFILES = {
+    'default': {
+        'sqlite_pragmas': {
+            # Readers no longer block the writer, and commits append to the WAL
+            'journal_mode': 'WAL',
+            # Wait for a lock instead of failing with "database is locked"
+            'busy_timeout': 5000,
+            # Durable across application crashes; only an OS crash can lose the last commits
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64000,  # Negative means KiB, so 64 MB
+            'temp_store': 'MEMORY',
+        },
+        'pool': {
+            'pool_size': 5,
+            'max_overflow': 10,
+            'pool_pre_ping': True,
+            'pool_recycle': 1800,
+            'pool_timeout': 30,
+        },
+    },
+    'development': {
+        'sqlite_pragmas': {
+            'journal_mode': 'WAL',
+            'busy_timeout': 5000,
+            'synchronous': 'NORMAL',
+            'mmap_size': 64 * 1024 * 1024,
+            'cache_size': -16000,
+            'temp_store': 'MEMORY',
+        },
+        'pool': {
+            'pool_size': 2,
+            'max_overflow': 5,
+            'pool_pre_ping': True,
+            'pool_recycle': 1800,
+            'pool_timeout': 30,
+        },
+    },
+    'production': {
+        'sqlite_pragmas': {
+            'journal_mode': 'WAL',
+            'busy_timeout': 15000,
+            'synchronous': 'NORMAL',
+            'mmap_size': 1024 * 1024 * 1024,
+            'cache_size': -256000,
+            'temp_store': 'MEMORY',
+        },
+        'pool': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_pre_ping': True,
+            # Below the usual server and load balancer idle timeouts
+            'pool_recycle': 900,
+            'pool_timeout': 10,
+        },
+    },
+    # SQLite's own defaults (rollback journal, no busy timeout), for comparison
+    'none': {
+        'sqlite_pragmas': {},
+        'pool': {},
+    },
+}
+
+
+def engine_profile(config):
+    """The profile named by DATABASE_ENGINE_PROFILE, with config overrides applied.
+
+    SQLITE_PRAGMAS and DATABASE_POOL_OPTIONS in the config update the
+    profile's pragmas and pool options key by key.
+    """
+    base = ENGINE_PROFILES[config.get('DATABASE_ENGINE_PROFILE', 'default')]
+    return {
+        'sqlite_pragmas': {**base['sqlite_pragmas'], **config.get('SQLITE_PRAGMAS', {})},
+        'pool': {**base['pool'], **config.get('DATABASE_POOL_OPTIONS', {})},
+    }
+
+
+def _is_sqlite(uri):
+    return uri is not None and make_url(uri).get_backend_name() == 'sqlite'
+
+
+def sqlite_pragma_listener(pragmas):
+    """A `connect` event handler that applies pragmas to each new SQLite connection."""
+    statements = [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    return set_pragmas
+
+
+def configure_engine_options(app):
+    """Merge the profile's pool options into SQLALCHEMY_ENGINE_OPTIONS.
+
+    Must run before db.init_app, which creates the engines. Only server
+    databases get pool options; explicit SQLALCHEMY_ENGINE_OPTIONS win.
+    """
+    profile = engine_profile(app.config)
+    if not _is_sqlite(app.config.get('SQLALCHEMY_DATABASE_URI')):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **profile['pool'],
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        }
+    return profile
+
+
+def apply_sqlite_pragmas(app, db):
+    """Apply the profile's pragmas to every SQLite engine of the app (default and binds)."""
+    pragmas = engine_profile(app.config)['sqlite_pragmas']
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', sqlite_pragma_listener(pragmas))
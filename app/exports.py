@@ -0,0 +1,178 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from flask import current_app, request, stream_with_context
+from sqlalchemy.orm import joinedload
+from app.models.article import Article
+from app.models.media import Media
+from app.models.school import School
+from app.models.user import User
+from app.models.volunteer import Volunteer
+
+# Rows are buffered and sent in chunks of this many rows
+EXPORT_CHUNK_ROWS = 500
+
+
+def _date(value, format='%Y-%m-%d %H:%M:%S'):
+    return value.strftime(format) if value else ''
+
+
+def _yes_no(value):
+    return 'Yes' if value else 'No'
+
+
+def _name_of(related, attribute='name'):
+    return getattr(related, attribute) if related else 'N/A'
+
+
+class CSVExport:
+    """Column definitions and loading options for one exportable model.
+
+    Args:
+        model: The model class to export
+        columns: List of (header, getter) pairs; getter takes a model instance
+        eager: Names of relationships to load with a join instead of one query per row
+        order_by: Column to order the export by
+    """
+
+    def __init__(self, model, columns, eager=(), order_by=None):
+        self.model = model
+        self.columns = columns
+        self.eager = eager
+        self.order_by = order_by if order_by is not None else model.id
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def query(self, query=None):
+        """Apply eager loading and ordering to a (possibly filtered) query."""
+        if query is None:
+            query = self.model.query
+        for relationship in self.eager:
+            query = query.options(joinedload(getattr(self.model, relationship)))
+        return query.order_by(self.order_by)
+
+    def row(self, item):
+        return [getter(item) for _, getter in self.columns]
+
+
+EXPORTS = {
+    'users': CSVExport(User, [
+        ('ID', lambda u: u.id),
+        ('Name', lambda u: u.name),
+        ('Email', lambda u: u.email),
+        ('Role', lambda u: u.role),
+        ('Active', lambda u: _yes_no(u.is_active)),
+        ('Created At', lambda u: _date(u.created_at)),
+        ('Last Login', lambda u: _date(u.last_login)),
+    ]),
+    'schools': CSVExport(School, [
+        ('ID', lambda s: s.id),
+        ('Name', lambda s: s.name),
+        ('Location', lambda s: s.location),
+        ('Address', lambda s: s.address),
+        ('Phone', lambda s: s.phone),
+        ('Email', lambda s: s.email),
+        ('Student Count', lambda s: s.student_count),
+    ]),
+    'volunteers': CSVExport(Volunteer, [
+        ('ID', lambda v: v.id),
+        ('Name', lambda v: v.name),
+        ('Email', lambda v: v.email),
+        ('Phone', lambda v: v.phone),
+        ('School', lambda v: _name_of(v.school)),
+        ('Grade', lambda v: v.grade),
+        ('Skills', lambda v: v.skills),
+        ('Status', lambda v: 'active' if v.is_active else 'inactive'),
+        ('Registered On', lambda v: _date(v.registration_date, '%Y-%m-%d')),
+    ], eager=['school']),
+    'articles': CSVExport(Article, [
+        ('ID', lambda a: a.id),
+        ('Title', lambda a: a.title),
+        ('Category', lambda a: a.category),
+        ('Author', lambda a: _name_of(a.author)),
+        ('Published', lambda a: _yes_no(a.is_published)),
+        ('Views', lambda a: a.view_count),
+        ('Created At', lambda a: _date(a.created_at, '%Y-%m-%d')),
+    ], eager=['author']),
+    'media': CSVExport(Media, [
+        ('ID', lambda m: m.id),
+        ('Title', lambda m: m.title),
+        ('Type', lambda m: m.media_type),
+        ('Creator', lambda m: _name_of(m.creator)),
+        ('School', lambda m: _name_of(m.school)),
+        ('Approved', lambda m: _yes_no(m.is_approved)),
+        ('Views', lambda m: m.view_count),
+        ('Created At', lambda m: _date(m.created_at, '%Y-%m-%d')),
+    ], eager=['creator', 'school']),
+}
+
+
+def generate_csv(export, query=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield CSV text in chunks, reading rows from the database in batches.
+
+    Args:
+        export: The CSVExport describing the columns
+        query: Optional pre-filtered query for the export's model
+        chunk_rows: Number of rows per yielded chunk
+
+    Yields:
+        Strings of CSV data
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export.headers)
+
+    for count, item in enumerate(export.query(query).yield_per(chunk_rows), 1):
+        writer.writerow(export.row(item))
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def gzip_chunks(chunks, encoding='utf-8'):
+    """Compress a stream of text chunks into a gzip stream."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(encoding))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def csv_response(name, query=None, filename=None):
+    """Build a streaming CSV download response.
+
+    The response is gzipped on the fly when the request has ?compress=gzip.
+
+    Args:
+        name: The key of the export in EXPORTS
+        query: Optional pre-filtered query for the export's model
+        filename: Download filename without extension (defaults to name_YYYYMMDD)
+
+    Returns:
+        A streaming Response
+    """
+    export = EXPORTS[name]
+    filename = filename or f"{name}_{datetime.now().strftime('%Y%m%d')}"
+    chunks = generate_csv(export, query)
+
+    if request.args.get('compress') == 'gzip':
+        body = gzip_chunks(chunks)
+        mimetype = 'application/gzip'
+        filename += '.csv.gz'
+    else:
+        body = (chunk.encode('utf-8') for chunk in chunks)
+        mimetype = 'text/csv'
+        filename += '.csv'
+
+    return current_app.response_class(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment;filename={filename}'}
+    )
@@ -0,0 +1,85 @@
+from datetime import datetime
+from sqlalchemy import insert
+from app import db
+from app.models.article import QuizAttempt, QuizAnswer
+from app.quiz_cache import get_compiled_quiz
+
+
+def grade_answer(key, value):
+    """Grade a single submitted value against its question's key.
+
+    Returns:
+        A tuple of (selected_choice_id, text_answer, is_correct)
+    """
+    if key.question_type == 'multiple_choice':
+        try:
+            choice_id = int(value)
+        except (TypeError, ValueError):
+            return None, None, False
+        if choice_id not in key.choice_ids:
+            # Not a choice of this question
+            return None, None, False
+        return choice_id, None, choice_id in key.correct_choice_ids
+
+    if key.question_type == 'true_false':
+        return None, value, value.strip().lower() in key.correct_texts
+
+    # Short answers need manual grading, so leave is_correct as False for now
+    return None, value, False
+
+
+def grade_submission(quiz, user_id, form):
+    """Grade a quiz submission in memory and store it with a single commit.
+
+    Only `question_<id>` fields that belong to the quiz are graded. The
+    attempt is inserted first to get its id, then all answers are written
+    with one executemany INSERT.
+
+    Args:
+        quiz: The Quiz being taken
+        user_id: The user submitting the answers
+        form: The submitted form data (request.form)
+
+    Returns:
+        The completed QuizAttempt
+    """
+    compiled = get_compiled_quiz(quiz)
+    answer_key = compiled.answer_key
+
+    score = 0
+    answers = []
+    for field, value in form.items():
+        if not field.startswith('question_'):
+            continue
+        try:
+            question_id = int(field.split('_', 1)[1])
+        except ValueError:
+            continue
+        key = answer_key.get(question_id)
+        if key is None:
+            continue
+
+        selected_choice_id, text_answer, is_correct = grade_answer(key, value)
+        if is_correct:
+            score += key.points
+        answers.append({
+            'question_id': question_id,
+            'selected_choice_id': selected_choice_id,
+            'text_answer': text_answer,
+            'is_correct': is_correct,
+        })
+
+    attempt = QuizAttempt(quiz_id=quiz.id, user_id=user_id, max_score=compiled.max_score)
+    attempt.score = score
+    attempt.completed_at = datetime.utcnow()
+    attempt.is_completed = True
+    db.session.add(attempt)
+    db.session.flush()
+
+    if answers:
+        for answer in answers:
+            answer['attempt_id'] = attempt.id
+        db.session.execute(insert(QuizAnswer.__table__), answers)
+
+    db.session.commit()
+    return attempt
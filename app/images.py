@@ -0,0 +1,245 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps, features
+from flask import current_app, url_for
+from sqlalchemy import update
+from app import db
+from app.storage import upload_store
+
+# Pillow format names for the extensions we write
+SAVE_FORMATS = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'gif': 'GIF', 'webp': 'WEBP', 'avif': 'AVIF'}
+
+# Formats Pillow cannot decode; they are stored as uploaded without derivatives
+PASSTHROUGH_EXTENSIONS = {'svg'}
+
+# Image and derivatives columns of each table with images; the table name
+# is also the upload folder
+IMAGE_COLUMNS = {
+    'articles': ('featured_image', 'featured_image_derivatives'),
+    'schools': ('logo', 'logo_derivatives'),
+    'media': ('file_path', 'image_derivatives'),
+}
+
+
+def derivative_filename(filename, size_name, fmt=None):
+    """Name of a derivative of an uploaded image.
+
+    `photo.jpg` becomes `photo_thumb.jpg` or `photo_thumb.webp`, matching the
+    thumbnail names used before derivatives existed.
+    """
+    stem, ext = os.path.splitext(filename)
+    return f'{stem}_{size_name}.{fmt}' if fmt else f'{stem}_{size_name}{ext}'
+
+
+def thumbnail_filename(filename):
+    """Name of an uploaded image's thumbnail (the image itself if it has no derivatives)."""
+    if _extension(filename) in PASSTHROUGH_EXTENSIONS:
+        return filename
+    return derivative_filename(filename, 'thumb')
+
+
+def pick_derivative(filename, derivatives, size_name, fmt=None):
+    """The stored file to show for an image at a given size.
+
+    Falls back to the original until the pipeline has recorded the
+    derivatives (and for images it does not resize, such as SVG).
+
+    Args:
+        filename: The stored original's filename
+        derivatives: The JSON recorded by the pipeline, if any
+        size_name: A key of IMAGE_DERIVATIVE_SIZES, e.g. 'thumb'
+        fmt: Preferred format (e.g. 'webp'); defaults to the original's
+    """
+    if not filename or not derivatives:
+        return filename
+    variants = json.loads(derivatives).get(size_name) or {}
+    return variants.get(fmt) or variants.get(_extension(filename)) or filename
+
+
+def image_url(target, size_name='medium', fmt=None):
+    """URL of the image of an Article, School or Media at a given size.
+
+    Available in templates as `image_url`. Protected media are linked
+    through content.media_file, which picks the derivative itself.
+    """
+    table = target.__tablename__
+    column, derivatives_column = IMAGE_COLUMNS[table]
+    filename = getattr(target, column)
+    if not filename:
+        return None
+    if table in current_app.config.get('UPLOAD_PROTECTED_FOLDERS', ()):
+        return url_for('content.media_file', id=target.id, size=size_name, format=fmt)
+    name = pick_derivative(filename, getattr(target, derivatives_column), size_name, fmt)
+    return url_for('static', filename=f'uploads/{table}/{name}')
+
+
+def remove_image(folder, filename, derivatives=None):
+    """Release a stored image, deleting its derivatives once it is unused.
+
+    Files are deleted when the current transaction commits.
+
+    Args:
+        folder: The subfolder within UPLOAD_FOLDER holding the image
+        filename: The stored original's filename
+        derivatives: The JSON recorded by the pipeline, if any
+    """
+    if not upload_store.release(folder, filename) or not derivatives:
+        return
+    upload_store.delete_on_commit(*(upload_store.path(folder, name)
+                                    for variants in json.loads(derivatives).values()
+                                    for name in variants.values()))
+
+
+def _extension(filename):
+    return os.path.splitext(filename)[1].lower().lstrip('.')
+
+
+def _avif_available():
+    if 'avif' in features.get_supported_modules() and features.check('avif'):
+        return True
+    try:
+        # Optional plugin for Pillow versions without built-in AVIF support
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_derivatives(source_path, output_dir, filename, sizes, formats):
+    """Build every resized variant of an image from a single decode.
+
+    Runs in a worker process. Sizes are produced largest first, each one
+    downscaled from the previous, so the full-resolution image is decoded
+    and resampled only once.
+
+    Args:
+        source_path: Path of the stored original
+        output_dir: Directory to write derivatives to
+        filename: Name of the original, used to name the derivatives
+        sizes: Dict of size name to maximum width/height in pixels
+        formats: Extra formats to write besides the original's (e.g. webp, avif)
+
+    Returns:
+        A dict of size name to {format: filename}
+    """
+    ext = _extension(filename)
+    formats = [fmt for fmt in formats if fmt != 'avif' or _avif_available()]
+
+    # Stored files are content-addressed, so derivatives already on disk
+    # were built from identical bytes
+    existing = {
+        size_name: {fmt: derivative_filename(filename, size_name, None if fmt == ext else fmt)
+                    for fmt in [ext] + formats}
+        for size_name in sizes
+    }
+    if all(os.path.exists(os.path.join(output_dir, name))
+           for variants in existing.values() for name in variants.values()):
+        return existing
+
+    with Image.open(source_path) as img:
+        # Let JPEG decode at a reduced scale when the original is much larger
+        # than the biggest derivative
+        largest = max(sizes.values())
+        img.draft('RGB', (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+
+    derivatives = {}
+    current = img
+    for size_name, size in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+        current = current.copy()
+        current.thumbnail((size, size), Image.LANCZOS)
+
+        variants = {}
+        for fmt in [ext] + formats:
+            variant = current
+            if SAVE_FORMATS.get(fmt) == 'JPEG' and variant.mode not in ('RGB', 'L'):
+                variant = variant.convert('RGB')
+            name = derivative_filename(filename, size_name, None if fmt == ext else fmt)
+            variant.save(os.path.join(output_dir, name), SAVE_FORMATS.get(fmt, fmt.upper()), quality=82)
+            variants[fmt] = name
+        derivatives[size_name] = variants
+    return derivatives
+
+
+class ImagePipeline:
+    """Builds image derivatives in a process pool after the upload is stored.
+
+    Derivatives are recorded as JSON on the owning row once they are written.
+    With IMAGE_PIPELINE_WORKERS = 0 they are built in the request instead,
+    which keeps tests deterministic.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('IMAGE_PIPELINE_WORKERS', os.cpu_count())
+        self.sizes = app.config.get('IMAGE_DERIVATIVE_SIZES', {'thumb': 200, 'medium': 800})
+        self.formats = app.config.get('IMAGE_DERIVATIVE_FORMATS', ('webp',))
+        app.add_template_global(image_url)
+        app.extensions['image_pipeline'] = self
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers or None)
+        return self._executor
+
+    def process(self, target, column, folder, filename):
+        """Build derivatives for an uploaded image and record them on its row.
+
+        Call after the row has been committed so it exists when the worker
+        finishes.
+
+        Args:
+            target: The model instance owning the image (Media, Article, School)
+            column: Name of the JSON column recording the derivatives
+            folder: The subfolder within UPLOAD_FOLDER holding the image
+            filename: The stored original's filename
+        """
+        if not filename or _extension(filename) in PASSTHROUGH_EXTENSIONS:
+            return
+
+        app = current_app._get_current_object()
+        output_dir = os.path.join(app.config['UPLOAD_FOLDER'], folder)
+        args = (os.path.join(output_dir, filename), output_dir, filename, self.sizes, tuple(self.formats))
+        table, row_id = target.__table__, target.id
+
+        if not self.workers:
+            self._record(table, row_id, column, build_derivatives(*args))
+            return
+
+        def done(future):
+            with app.app_context():
+                try:
+                    derivatives = future.result()
+                except Exception:
+                    app.logger.exception(f'Failed to build derivatives for {folder}/{filename}')
+                    return
+                self._record(table, row_id, column, derivatives)
+                db.session.remove()
+
+        self.executor.submit(build_derivatives, *args).add_done_callback(done)
+
+    @staticmethod
+    def _record(table, row_id, column, derivatives):
+        values = {column: json.dumps(derivatives)}
+        if 'updated_at' in table.c:
+            # Derivatives are not a content change
+            values['updated_at'] = table.c.updated_at
+        db.session.execute(update(table).where(table.c.id == row_id).values(**values))
+        db.session.commit()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+image_pipeline = ImagePipeline()
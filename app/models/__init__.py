@@ -1,8 +1,11 @@
 # Import all models to make them available when importing from app.models
 
-from app.models.user import User, Notification
+from app.models.user import User, Notification, NotificationBroadcast
 from app.models.school import School, Activity
 from app.models.volunteer import Volunteer, Contribution
 from app.models.article import Article, ArticleComment, Quiz, QuizQuestion, QuizChoice, QuizAttempt, QuizAnswer
 from app.models.media import Media, MediaRating, MediaComment, MediaCollection, MediaCollectionItem
-from app.models.report import Report, ReportAttachment, ReportMetric, PerformanceReport, ReportSection
\ No newline at end of file
+from app.models.report import Report, ReportAttachment, ReportMetric, PerformanceReport, ReportSection
+from app.models.stats import PlatformCounter
+from app.models.outbox import OutboxEmail
+from app.models.upload import StoredFile, UploadSession
@@ -1,6 +1,9 @@
+import json
 from datetime import datetime
 from app import db
+from app.view_counter import view_counter
 from app.utils import generate_unique_slug
+from app.annotations import prefetched_count
 
 class Article(db.Model):
     __tablename__ = 'articles'
@@ -11,14 +14,18 @@ class Article(db.Model):
     content = db.Column(db.Text, nullable=False)
     summary = db.Column(db.String(300), nullable=True)
     featured_image = db.Column(db.String(100), nullable=True)  # Path to image
+    featured_image_derivatives = db.Column(db.Text, nullable=True)  # JSON: size -> {format: filename}, set by app.images
     category = db.Column(db.String(50), nullable=False)  # constitution, geography, economy, history, diplomacy
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    is_published = db.Column(db.Boolean, default=False)
+    # active_history: app.counters compares the old and new value on update
+    is_published = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
     published_at = db.Column(db.DateTime, nullable=True)
     view_count = db.Column(db.Integer, default=0)
     
+    __table_args__ = (db.Index('ix_articles_published_category_published_at', 'is_published', 'category', 'published_at'),)
+    
     # Relationships
     author = db.relationship('User', backref='articles')
     comments = db.relationship('ArticleComment', backref='article', lazy='dynamic', cascade='all, delete-orphan')
@@ -47,12 +54,16 @@ class Article(db.Model):
         self.is_published = False
         db.session.commit()
     
+    def get_featured_image_derivatives(self):
+        """Resized variants built by app.images, as {size: {format: filename}}"""
+        return json.loads(self.featured_image_derivatives) if self.featured_image_derivatives else {}
+    
     def increment_view_count(self):
-        self.view_count += 1
-        db.session.commit()
+        # Buffered and written in batches; see app.view_counter
+        view_counter.increment(self.__tablename__, self.id)
     
     def get_comment_count(self):
-        return self.comments.count()
+        return prefetched_count(self, 'comments', self.comments)
     
     def get_related_articles(self, limit=3):
         """Get related articles in the same category"""
@@ -75,6 +86,8 @@ class ArticleComment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_approved = db.Column(db.Boolean, default=False)
     
+    __table_args__ = (db.Index('ix_article_comments_article_approved_created_at', 'article_id', 'is_approved', 'created_at'),)
+    
     # Relationships
     user = db.relationship('User', backref='comments')
     
@@ -104,7 +117,8 @@ class Quiz(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_published = db.Column(db.Boolean, default=False)
     time_limit = db.Column(db.Integer, nullable=True)  # Time limit in minutes, if any
-    
+    content_version = db.Column(db.Integer, default=1, nullable=False)  # Bumped when questions or choices change
+
     # Relationships
     questions = db.relationship('QuizQuestion', backref='quiz', lazy='dynamic', cascade='all, delete-orphan')
     author = db.relationship('User', backref='quizzes')
@@ -129,10 +143,10 @@ class Quiz(db.Model):
         db.session.commit()
     
     def get_question_count(self):
-        return self.questions.count()
+        return prefetched_count(self, 'questions', self.questions)
     
     def get_attempt_count(self):
-        return self.attempts.count()
+        return prefetched_count(self, 'attempts', self.attempts)
     
     def __repr__(self):
         return f'<Quiz {self.title}({self.category})>'
@@ -195,17 +209,20 @@ class QuizAttempt(db.Model):
     completed_at = db.Column(db.DateTime, nullable=True)
     is_completed = db.Column(db.Boolean, default=False)
     
+    __table_args__ = (db.Index('ix_quiz_attempts_quiz_user_completed', 'quiz_id', 'user_id', 'is_completed', 'completed_at'),)
+    
     # Relationships
     user = db.relationship('User', backref='quiz_attempts')
     answers = db.relationship('QuizAnswer', backref='attempt', lazy='dynamic', cascade='all, delete-orphan')
     
-    def __init__(self, quiz_id, user_id):
+    def __init__(self, quiz_id, user_id, max_score=None):
         self.quiz_id = quiz_id
         self.user_id = user_id
-        # Calculate max possible score
-        from app.models.article import QuizQuestion
-        questions = QuizQuestion.query.filter_by(quiz_id=quiz_id).all()
-        self.max_score = sum(q.points for q in questions)
+        # Calculate max possible score unless the caller already knows it
+        if max_score is None:
+            max_score = db.session.query(db.func.coalesce(db.func.sum(QuizQuestion.points), 0))\
+                .filter(QuizQuestion.quiz_id == quiz_id).scalar()
+        self.max_score = max_score
     
     def complete(self, score):
         self.score = score
@@ -1,5 +1,8 @@
+import json
 from datetime import datetime
 from app import db
+from app.view_counter import view_counter
+from app.annotations import prefetched_count
 
 class Media(db.Model):
     __tablename__ = 'media'
@@ -11,18 +14,33 @@ class Media(db.Model):
     file_path = db.Column(db.String(255), nullable=True)  # Path to the file if uploaded
     external_url = db.Column(db.String(255), nullable=True)  # URL if embedded from external source
     thumbnail_path = db.Column(db.String(255), nullable=True)  # Path to thumbnail image
+    image_derivatives = db.Column(db.Text, nullable=True)  # JSON: size -> {format: filename}, set by app.images
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # Creator
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=True)  # Associated school if any
     activity_id = db.Column(db.Integer, db.ForeignKey('activities.id'), nullable=True)  # Associated activity if any
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    is_approved = db.Column(db.Boolean, default=False)  # Requires admin approval
+    # Requires admin approval; active_history: app.counters compares the old and new value on update
+    is_approved = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
     approved_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # Admin who approved
     approved_at = db.Column(db.DateTime, nullable=True)
     view_count = db.Column(db.Integer, default=0)
     featured = db.Column(db.Boolean, default=False)  # Featured on homepage
     tags = db.Column(db.String(255), nullable=True)  # Comma-separated tags
     
+    # Rating aggregates, maintained by app.ratings
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
+    rating_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_1 = db.Column(db.Integer, default=0, nullable=False)  # Histogram: number of 1-star ratings
+    rating_2 = db.Column(db.Integer, default=0, nullable=False)
+    rating_3 = db.Column(db.Integer, default=0, nullable=False)
+    rating_4 = db.Column(db.Integer, default=0, nullable=False)
+    rating_5 = db.Column(db.Integer, default=0, nullable=False)
+    rating_score = db.Column(db.Float, default=0, nullable=False)  # Bayesian average used for ranking
+    
+    __table_args__ = (db.Index('ix_media_approved_rating_score', 'is_approved', 'rating_score'),
+                      db.Index('ix_media_approved_featured_created_at', 'is_approved', 'featured', 'created_at'))
+    
     # Relationships
     creator = db.relationship('User', foreign_keys=[user_id], backref='uploaded_media')
     approver = db.relationship('User', foreign_keys=[approved_by], backref='approved_media')
@@ -58,18 +76,24 @@ class Media(db.Model):
         self.featured = not self.featured
         db.session.commit()
     
+    def get_image_derivatives(self):
+        """Resized variants built by app.images, as {size: {format: filename}}"""
+        return json.loads(self.image_derivatives) if self.image_derivatives else {}
+    
     def increment_view_count(self):
-        self.view_count += 1
-        db.session.commit()
+        # Buffered and written in batches; see app.view_counter
+        view_counter.increment(self.__tablename__, self.id)
     
     def get_average_rating(self):
-        ratings = self.ratings.all()
-        if not ratings:
+        if not self.rating_count:
             return 0
-        return sum(r.rating for r in ratings) / len(ratings)
+        return self.rating_sum / self.rating_count
+    
+    def get_rating_histogram(self):
+        return {stars: getattr(self, f'rating_{stars}') or 0 for stars in range(1, 6)}
     
     def get_comment_count(self):
-        return self.comments.count()
+        return prefetched_count(self, 'comments', self.comments)
     
     def get_tag_list(self):
         if not self.tags:
@@ -85,7 +109,8 @@ class MediaRating(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     media_id = db.Column(db.Integer, db.ForeignKey('media.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    rating = db.Column(db.Integer, nullable=False)  # 1-5 star rating
+    # 1-5 star rating; active_history: app.ratings compares the old and new value on update
+    rating = db.column_property(db.Column(db.Integer, nullable=False), active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -174,7 +199,7 @@ class MediaCollection(db.Model):
         return False
     
     def get_media_count(self):
-        return self.items.count()
+        return prefetched_count(self, 'items', self.items)
     
     def __repr__(self):
         return f'<MediaCollection {self.id}: {self.title}'
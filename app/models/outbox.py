@@ -0,0 +1,38 @@
+import json
+from datetime import datetime
+from app import db
+
+class OutboxEmail(db.Model):
+    __tablename__ = 'email_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(120), nullable=True)  # Defaults to MAIL_DEFAULT_SENDER when sent
+    recipients = db.Column(db.Text, nullable=False)  # JSON list of addresses
+    html_body = db.Column(db.Text, nullable=True)
+    text_body = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sending, sent, dead
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)  # When a worker claimed the message
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),)
+    
+    def __init__(self, subject, recipients, html_body=None, text_body=None, sender=None):
+        self.subject = subject
+        self.recipients = json.dumps(list(recipients))
+        self.html_body = html_body
+        self.text_body = text_body
+        self.sender = sender
+        self.status = 'pending'
+        self.attempts = 0
+        self.next_attempt_at = datetime.utcnow()
+    
+    def get_recipients(self):
+        return json.loads(self.recipients)
+    
+    def __repr__(self):
+        return f'<OutboxEmail {self.id}: {self.subject} ({self.status})>'
@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.annotations import prefetched_count
 
 class Report(db.Model):
     __tablename__ = 'reports'
@@ -18,6 +19,9 @@ class Report(db.Model):
     reviewed_at = db.Column(db.DateTime, nullable=True)
     feedback = db.Column(db.Text, nullable=True)  # Admin feedback
     
+    __table_args__ = (db.Index('ix_reports_school_created_at', 'school_id', 'created_at'),
+                      db.Index('ix_reports_status', 'status'))
+    
     # Relationships
     school = db.relationship('School')
     submitter = db.relationship('User', foreign_keys=[submitted_by], backref='submitted_reports')
@@ -55,7 +59,7 @@ class Report(db.Model):
         return metric
     
     def get_attachment_count(self):
-        return self.attachments.count()
+        return prefetched_count(self, 'attachments', self.attachments)
     
     def __repr__(self):
         return f'<Report {self.id}: {self.title} ({self.report_type})>'
@@ -1,5 +1,7 @@
+import json
 from datetime import datetime
 from app import db
+from app.annotations import prefetched_count
 
 class School(db.Model):
     __tablename__ = 'schools'
@@ -12,6 +14,7 @@ class School(db.Model):
     phone = db.Column(db.String(20), nullable=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     logo = db.Column(db.String(100), nullable=True)  # Path to logo image
+    logo_derivatives = db.Column(db.Text, nullable=True)  # JSON: size -> {format: filename}, set by app.images
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
@@ -49,14 +52,18 @@ class School(db.Model):
         self.updated_at = datetime.utcnow()
         db.session.commit()
     
+    def get_logo_derivatives(self):
+        """Resized variants built by app.images, as {size: {format: filename}}"""
+        return json.loads(self.logo_derivatives) if self.logo_derivatives else {}
+    
     def get_volunteer_count(self):
-        return self.volunteers.count()
+        return prefetched_count(self, 'volunteers', self.volunteers)
     
     def get_activity_count(self):
-        return self.activities.count()
+        return prefetched_count(self, 'activities', self.activities)
     
     def get_report_count(self):
-        return self.reports.count()
+        return prefetched_count(self, 'reports', self.reports)
     
     def get_recent_activities(self, limit=5):
         return self.activities.order_by(Activity.date.desc()).limit(limit).all()
@@ -81,6 +88,8 @@ class Activity(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     status = db.Column(db.String(20), default='planned')  # planned, ongoing, completed, cancelled
     
+    __table_args__ = (db.Index('ix_activities_school_date', 'school_id', 'date'),)
+    
     # Relationships
     media_items = db.relationship('Media', backref='activity', lazy='dynamic')
     reports = db.relationship('Report', lazy='dynamic')
@@ -105,7 +114,7 @@ class Activity(db.Model):
         return False
     
     def get_media_count(self):
-        return self.media_items.count()
+        return prefetched_count(self, 'media_items', self.media_items)
     
     def __repr__(self):
         return f'<Activity {self.title} ({self.date.strftime("%Y-%m-%d")})>'
\ No newline at end of file
@@ -0,0 +1,16 @@
+from datetime import datetime
+from app import db
+
+class PlatformCounter(db.Model):
+    __tablename__ = 'platform_counters'
+    
+    name = db.Column(db.String(50), primary_key=True)  # schools, volunteers, published_articles, approved_media
+    value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __init__(self, name, value=0):
+        self.name = name
+        self.value = value
+    
+    def __repr__(self):
+        return f'<PlatformCounter {self.name}={self.value}>'
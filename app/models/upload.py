@@ -0,0 +1,58 @@
+from datetime import datetime
+from app import db
+
+class StoredFile(db.Model):
+    __tablename__ = 'stored_files'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    folder = db.Column(db.String(50), nullable=False)  # media, reports, articles, schools
+    filename = db.Column(db.String(100), nullable=False)  # Sharded content-addressed name, e.g. ab/cd/abcd...ef.jpg
+    size = db.Column(db.BigInteger, nullable=False, default=0)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # Rows referring to this file in this folder
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('folder', 'filename', name='uq_stored_files_folder_filename'),
+                      db.Index('ix_stored_files_filename', 'filename'))
+    
+    def __init__(self, folder, filename, size=0, ref_count=1):
+        self.folder = folder
+        self.filename = filename
+        self.size = size
+        self.ref_count = ref_count
+    
+    def __repr__(self):
+        return f'<StoredFile {self.folder}/{self.filename} refs={self.ref_count}>'
+
+class UploadSession(db.Model):
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(32), primary_key=True)  # Random token used in the upload URL
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)  # Original client filename
+    media_type = db.Column(db.String(20), nullable=False)  # video, image, document, audio
+    length = db.Column(db.BigInteger, nullable=False)  # Total size declared by the client
+    offset = db.Column(db.BigInteger, nullable=False, default=0)  # Bytes received so far
+    upload_metadata = db.Column(db.Text, nullable=True)  # JSON: title, description, tags, school_id
+    media_id = db.Column(db.Integer, db.ForeignKey('media.id'), nullable=True)  # Set once finalized
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationships
+    user = db.relationship('User')
+    media = db.relationship('Media')
+    
+    def __init__(self, id, user_id, filename, media_type, length, upload_metadata=None):
+        self.id = id
+        self.user_id = user_id
+        self.filename = filename
+        self.media_type = media_type
+        self.length = length
+        self.offset = 0
+        self.upload_metadata = upload_metadata
+    
+    def is_complete(self):
+        return self.completed_at is not None
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id}: {self.offset}/{self.length}>'
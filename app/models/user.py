@@ -18,6 +18,7 @@ class User(UserMixin, db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime, nullable=True)
     profile_image = db.Column(db.String(100), nullable=True)
+    unread_notification_count = db.Column(db.Integer, default=0, nullable=False)  # Maintained by app.notifications
     
     # Relationships
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=True)
@@ -71,6 +72,9 @@ class User(UserMixin, db.Model):
     def is_volunteer(self):
         return self.role == 'volunteer'
     
+    def unread_notifications_count(self):
+        return self.unread_notification_count or 0
+    
     def update_last_login(self):
         self.last_login = datetime.utcnow()
         db.session.commit()
@@ -87,21 +91,59 @@ class Notification(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    title = db.Column(db.String(200), nullable=True)
     message = db.Column(db.String(250), nullable=False)
     category = db.Column(db.String(20), default='info')  # info, success, warning, danger
-    is_read = db.Column(db.Boolean, default=False)
+    # active_history: app.notifications compares the old and new value on update
+    is_read = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     link = db.Column(db.String(250), nullable=True)  # Optional link to redirect when clicked
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('notification_broadcasts.id'), nullable=True)  # Set for admin broadcasts
+    
+    __table_args__ = (db.Index('ix_notifications_user_read_created_at', 'user_id', 'is_read', 'created_at'),)
     
-    def __init__(self, user_id, message, category='info', link=None):
+    def __init__(self, user_id, message, category='info', link=None, title=None):
         self.user_id = user_id
         self.message = message
         self.category = category
         self.link = link
+        self.title = title
     
     def mark_as_read(self):
         self.is_read = True
         db.session.commit()
     
     def __repr__(self):
-        return f'<Notification {self.id}: {self.message[:20]}...>'
\ No newline at end of file
+        return f'<Notification {self.id}: {self.message[:20]}...>'
+
+class NotificationBroadcast(db.Model):
+    __tablename__ = 'notification_broadcasts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.String(250), nullable=False)
+    category = db.Column(db.String(20), default='info')  # info, success, warning, danger
+    link = db.Column(db.String(250), nullable=True)
+    recipient_role = db.Column(db.String(20), nullable=True)  # None targets every role
+    school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=True)  # None targets every school
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    recipient_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    sender = db.relationship('User', foreign_keys=[sender_id])
+    school = db.relationship('School')
+    notifications = db.relationship('Notification', backref='broadcast', lazy='dynamic')
+    
+    def __init__(self, title, message, category='info', link=None, recipient_role=None,
+                 school_id=None, sender_id=None):
+        self.title = title
+        self.message = message
+        self.category = category
+        self.link = link
+        self.recipient_role = recipient_role
+        self.school_id = school_id
+        self.sender_id = sender_id
+    
+    def __repr__(self):
+        return f'<NotificationBroadcast {self.id}: {self.title} ({self.recipient_count} recipients)>'
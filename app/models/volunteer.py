@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.annotations import prefetched_count
 
 class Volunteer(db.Model):
     __tablename__ = 'volunteers'
@@ -17,6 +18,8 @@ class Volunteer(db.Model):
     email_confirmed = db.Column(db.Boolean, default=False)
     confirmation_token = db.Column(db.String(100), nullable=True)
     
+    __table_args__ = (db.Index('ix_volunteers_school_registration_date', 'school_id', 'registration_date'),)
+    
     # Relationships
     contributions = db.relationship('Contribution', backref='volunteer', lazy='dynamic')
     
@@ -63,7 +66,7 @@ class Volunteer(db.Model):
         db.session.commit()
     
     def get_contribution_count(self):
-        return self.contributions.count()
+        return prefetched_count(self, 'contributions', self.contributions)
     
     def get_recent_contributions(self, limit=5):
         return self.contributions.order_by(Contribution.created_at.desc()).limit(limit).all()
@@ -0,0 +1,167 @@
+from datetime import datetime
+from sqlalchemy import event, func, inspect, insert, literal, select, update
+from app import db
+from app.models.user import User, Notification, NotificationBroadcast
+
+_users = User.__table__
+_notifications = Notification.__table__
+
+
+def recipients_query(recipient_role=None, school_id=None):
+    """Build a SELECT of the ids of active users targeted by a broadcast.
+
+    Args:
+        recipient_role: Only target users with this role (None for every role)
+        school_id: Only target users attached to this school (None for every school)
+
+    Returns:
+        A Select of user ids
+    """
+    query = select(User.id).where(User.is_active == True)
+    if recipient_role:
+        query = query.where(User.role == recipient_role)
+    if school_id:
+        query = query.where(User.school_id == school_id)
+    return query
+
+
+def broadcast_notification(title, message, category='info', link=None, recipient_role=None,
+                           school_id=None, sender_id=None):
+    """Send a notification to every targeted user with one INSERT ... SELECT.
+
+    The recipients are never loaded into Python, so the cost of a broadcast
+    does not depend on the number of users beyond the single statement run
+    by the database.
+
+    Args:
+        title: Notification title
+        message: Notification text
+        category: info, success, warning or danger
+        link: Optional link shown with the notification
+        recipient_role: Only target users with this role (None for every role)
+        school_id: Only target users attached to this school (None for every school)
+        sender_id: The admin sending the broadcast
+
+    Returns:
+        The NotificationBroadcast record, with recipient_count set
+    """
+    broadcast = NotificationBroadcast(
+        title=title,
+        message=message,
+        category=category,
+        link=link,
+        recipient_role=recipient_role,
+        school_id=school_id,
+        sender_id=sender_id
+    )
+    db.session.add(broadcast)
+    db.session.flush()
+
+    notifications = Notification.__table__
+    values = {
+        'broadcast_id': broadcast.id,
+        'title': title,
+        'message': message,
+        'category': category,
+        'link': link,
+        'is_read': False,
+        'created_at': datetime.utcnow(),
+    }
+    recipients = recipients_query(recipient_role, school_id).add_columns(
+        *[literal(value, notifications.c[name].type) for name, value in values.items()]
+    )
+    result = db.session.execute(
+        insert(notifications).from_select(['user_id', *values], recipients)
+    )
+    db.session.execute(
+        update(_users)
+        .where(_users.c.id.in_(recipients_query(recipient_role, school_id)))
+        .values(unread_notification_count=_users.c.unread_notification_count + 1)
+    )
+
+    broadcast.recipient_count = result.rowcount
+    db.session.commit()
+    return broadcast
+
+
+def mark_notifications_read(user_id, notification_ids=None):
+    """Mark a user's unread notifications as read with a single UPDATE.
+
+    Args:
+        user_id: The user whose notifications are read
+        notification_ids: Only mark these notifications (None marks all of them)
+
+    Returns:
+        The number of notifications marked as read
+    """
+    query = update(_notifications)\
+        .where(_notifications.c.user_id == user_id)\
+        .where(_notifications.c.is_read == False)
+    if notification_ids is not None:
+        if not notification_ids:
+            return 0
+        query = query.where(_notifications.c.id.in_(notification_ids))
+    marked = db.session.execute(query.values(is_read=True)).rowcount
+
+    if marked:
+        db.session.execute(
+            update(_users)
+            .where(_users.c.id == user_id)
+            .values(unread_notification_count=_unread_count_subquery())
+        )
+    db.session.commit()
+    return marked
+
+
+def _unread_count_subquery():
+    return select(func.count(_notifications.c.id))\
+        .where(_notifications.c.user_id == _users.c.id)\
+        .where(_notifications.c.is_read == False)\
+        .scalar_subquery()
+
+
+def reconcile_unread_counts():
+    """Recompute every user's unread notification count from the notifications table.
+
+    Returns:
+        The number of users updated
+    """
+    result = db.session.execute(update(_users).values(unread_notification_count=_unread_count_subquery()))
+    db.session.commit()
+    return result.rowcount
+
+
+# Keep users.unread_notification_count in step with notifications written
+# through the ORM (broadcasts and mark_notifications_read update it directly)
+def _adjust_unread(connection, user_id, delta):
+    if delta:
+        connection.execute(
+            update(_users)
+            .where(_users.c.id == user_id)
+            .values(unread_notification_count=_users.c.unread_notification_count + delta)
+        )
+
+
+def _was_unread(target):
+    history = inspect(target).attrs.is_read.history
+    previous = history.deleted[0] if history.deleted else target.is_read
+    return not previous
+
+
+def _on_insert(mapper, connection, target):
+    if not target.is_read:
+        _adjust_unread(connection, target.user_id, 1)
+
+
+def _on_update(mapper, connection, target):
+    _adjust_unread(connection, target.user_id, (not target.is_read) - _was_unread(target))
+
+
+def _on_delete(mapper, connection, target):
+    if _was_unread(target):
+        _adjust_unread(connection, target.user_id, -1)
+
+
+event.listen(Notification, 'after_insert', _on_insert)
+event.listen(Notification, 'after_update', _on_update)
+event.listen(Notification, 'after_delete', _on_delete)
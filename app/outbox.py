@@ -0,0 +1,225 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask_mail import Message
+from sqlalchemy import or_, update
+from app import db, mail
+from app.models.outbox import OutboxEmail
+
+
+def enqueue_email(subject, recipients, html_body=None, text_body=None, sender=None, commit=False):
+    """Store an email in the outbox; a worker sends it later.
+
+    The message is added to the caller's session, so it is queued by the
+    caller's own commit, together with the change that triggered it.
+
+    Args:
+        subject: Email subject
+        recipients: List of recipient email addresses
+        html_body: HTML body
+        text_body: Plain-text body
+        sender: Sender address (defaults to MAIL_DEFAULT_SENDER)
+        commit: Also commit the session (for callers with no transaction of their own)
+
+    Returns:
+        The OutboxEmail instance
+    """
+    email = OutboxEmail(subject=subject, recipients=recipients, html_body=html_body,
+                        text_body=text_body, sender=sender)
+    db.session.add(email)
+    if commit:
+        db.session.commit()
+    return email
+
+
+class SMTPConnectionPool:
+    """Keep open Flask-Mail connections for reuse across messages and batches.
+
+    Connections idle for longer than `max_idle` seconds are closed instead of
+    reused, since SMTP servers drop idle clients.
+    """
+
+    def __init__(self, max_idle=60):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            while self._idle:
+                connection, released_at = self._idle.pop()
+                if time.monotonic() - released_at <= self.max_idle:
+                    return connection
+                self._close(connection)
+        return mail.connect().__enter__()
+
+    def release(self, connection):
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+
+    def discard(self, connection):
+        self._close(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.__exit__(None, None, None)
+        except Exception:
+            pass
+
+
+class OutboxWorker:
+    """Send pending outbox emails in batches with retries and dead letters.
+
+    Several workers (processes or hosts) may run at once: each batch is
+    claimed with a conditional UPDATE so a message is only sent by one of
+    them. Messages claimed by a worker that died are retried after
+    OUTBOX_LOCK_TIMEOUT seconds.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.batch_size = config.get('OUTBOX_BATCH_SIZE', 50)
+        self.threads = config.get('OUTBOX_WORKER_THREADS', 4)
+        self.max_attempts = config.get('OUTBOX_MAX_ATTEMPTS', 6)
+        self.retry_backoff = config.get('OUTBOX_RETRY_BACKOFF', 30)
+        self.lock_timeout = config.get('OUTBOX_LOCK_TIMEOUT', 600)
+        self.poll_interval = config.get('OUTBOX_POLL_INTERVAL', 5)
+        self.pool = SMTPConnectionPool(config.get('OUTBOX_SMTP_MAX_IDLE', 60))
+        self._stopped = threading.Event()
+
+    def claim_batch(self):
+        """Claim up to batch_size due messages for this worker.
+
+        Returns:
+            A list of claimed OutboxEmail ids
+        """
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.lock_timeout)
+        due = or_(
+            (OutboxEmail.status == 'pending') & (OutboxEmail.next_attempt_at <= now),
+            (OutboxEmail.status == 'sending') & (OutboxEmail.locked_at < stale)
+        )
+        candidates = [row.id for row in db.session.query(OutboxEmail.id).filter(due)
+                      .order_by(OutboxEmail.next_attempt_at).limit(self.batch_size)]
+        if not candidates:
+            return []
+
+        claimed = []
+        for email_id in candidates:
+            result = db.session.execute(
+                update(OutboxEmail.__table__)
+                .where(OutboxEmail.__table__.c.id == email_id)
+                .where(due)
+                .values(status='sending', locked_at=now)
+            )
+            if result.rowcount:
+                claimed.append(email_id)
+        db.session.commit()
+        return claimed
+
+    def _build_message(self, email):
+        return Message(
+            subject=email.subject,
+            recipients=email.get_recipients(),
+            html=email.html_body,
+            body=email.text_body,
+            sender=email.sender or self.app.config.get('MAIL_DEFAULT_SENDER')
+        )
+
+    def _send_slice(self, emails):
+        """Send messages over one pooled connection.
+
+        Returns:
+            A list of (email_id, error) pairs; error is None on success
+        """
+        results = []
+        with self.app.app_context():
+            connection = None
+            for email in emails:
+                try:
+                    if connection is None:
+                        connection = self.pool.acquire()
+                    connection.send(email['message'])
+                    results.append((email['id'], None))
+                except Exception as e:
+                    results.append((email['id'], f'{type(e).__name__}: {e}'))
+                    # The connection may be broken; start a fresh one
+                    if connection is not None:
+                        self.pool.discard(connection)
+                        connection = None
+            if connection is not None:
+                self.pool.release(connection)
+        return results
+
+    def _record_results(self, results):
+        now = datetime.utcnow()
+        emails = {email.id: email for email in
+                  OutboxEmail.query.filter(OutboxEmail.id.in_([email_id for email_id, _ in results]))}
+        for email_id, error in results:
+            email = emails[email_id]
+            email.attempts += 1
+            email.locked_at = None
+            if error is None:
+                email.status = 'sent'
+                email.sent_at = now
+                email.last_error = None
+            elif email.attempts >= self.max_attempts:
+                email.status = 'dead'
+                email.last_error = error
+                self.app.logger.error(f'Email {email_id} moved to dead letters: {error}')
+            else:
+                email.status = 'pending'
+                email.last_error = error
+                email.next_attempt_at = now + timedelta(
+                    seconds=self.retry_backoff * 2 ** (email.attempts - 1))
+        db.session.commit()
+
+    def run_once(self):
+        """Claim and send one batch.
+
+        Returns:
+            The number of messages processed
+        """
+        with self.app.app_context():
+            claimed = self.claim_batch()
+            if not claimed:
+                return 0
+
+            emails = [{'id': email.id, 'message': self._build_message(email)}
+                      for email in OutboxEmail.query.filter(OutboxEmail.id.in_(claimed))]
+
+            # Split the batch across threads, each with its own SMTP connection
+            slices = [emails[i::self.threads] for i in range(self.threads) if emails[i::self.threads]]
+            results = []
+            with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+                for slice_results in executor.map(self._send_slice, slices):
+                    results.extend(slice_results)
+
+            self._record_results(results)
+            return len(results)
+
+    def run(self):
+        """Process batches until stop() is called, sleeping when idle."""
+        try:
+            while not self._stopped.is_set():
+                try:
+                    processed = self.run_once()
+                except Exception:
+                    self.app.logger.exception('Error processing email outbox')
+                    processed = 0
+                if processed < self.batch_size:
+                    self._stopped.wait(self.poll_interval)
+        finally:
+            self.pool.close_all()
+
+    def stop(self):
+        self._stopped.set()
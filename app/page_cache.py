@@ -0,0 +1,253 @@
+import hashlib
+from functools import wraps
+from flask import current_app, g, has_request_context, make_response, request, session
+from flask_babel import get_locale
+from flask_login import current_user
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+from app.cache import Cache, MemoryCache
+from app.models.article import Article, ArticleComment
+from app.models.media import Media, MediaComment, MediaRating
+from app.models.school import Activity, School
+from app.models.volunteer import Volunteer
+from app.replicas import PRIMARY
+
+# Tagged models and the flag that puts a row in its table's public listings
+# (None when every row is listed). Pages are tagged '<table>' for listings
+# and '<table>:<id>' for each row they load.
+LISTED = {
+    Article: 'is_published',
+    Media: 'is_approved',
+    School: None,
+    Volunteer: None,
+}
+
+# Rows shown as part of another row's page: (parent table, foreign key)
+PARENTS = {
+    ArticleComment: ('articles', 'article_id'),
+    MediaComment: ('media', 'media_id'),
+    MediaRating: ('media', 'media_id'),
+    Activity: ('schools', 'school_id'),
+    Volunteer: ('schools', 'school_id'),
+}
+
+# Rows whose changes reorder their parent's listings (a rating moves the
+# media item's rating_score): a change purges the parent table's listing
+# tag too while the parent is listed
+LISTING_PARENTS = {
+    MediaRating: Media,
+}
+
+# Session.info key collecting the tags purged when the transaction commits
+PENDING_TAGS = 'page_cache_tags'
+
+
+class PageCache:
+    """Whole-page cache for anonymous visitors.
+
+    A page is keyed by host, path, sorted query string and locale, and
+    tagged with the table listings its view declares and every listed row
+    it loads. Committing a change to such a row purges exactly the tags of
+    the pages showing it (see _tags_for_change).
+    """
+
+    def __init__(self, app=None):
+        self.cache = Cache(config_prefix='PAGE_CACHE')
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        self.cache.init_app(app)
+        if self.enabled and isinstance(self.cache.backend, MemoryCache) and not (app.debug or app.testing):
+            app.logger.warning('PAGE_CACHE_TYPE is memory: purges only reach this process, so with '
+                               'several workers the others keep serving stale pages. Use redis.')
+        app.extensions['page_cache'] = self
+
+    @property
+    def active(self):
+        return self.enabled and self.cache.backend is not None
+
+    def key(self):
+        query = sorted(request.args.items(multi=True))
+        raw = f'{request.host}{request.path}?{query!r}|{get_locale()}'
+        return 'page:' + hashlib.sha1(raw.encode()).hexdigest()
+
+    def cacheable_request(self):
+        """Whether the current request may be served from or stored in the cache."""
+        return (self.active
+                and request.method in ('GET', 'HEAD')
+                and not current_user.is_authenticated
+                # Flashed messages are rendered into the page
+                and '_flashes' not in session)
+
+    @staticmethod
+    def cacheable_response(response):
+        """Whether a response is the same for every anonymous visitor."""
+        cache_control = response.cache_control
+        return (response.status_code == 200
+                and not response.is_streamed
+                and 'Set-Cookie' not in response.headers
+                # e.g. a CSRF token was issued into the session while rendering
+                and not session.modified
+                and not cache_control.private
+                and not cache_control.no_store)
+
+    def load(self, key):
+        entry = self.cache.get_tagged(key)
+        if entry is None:
+            return None
+
+        status, headers, body, views = entry
+        if views:
+            from app.view_counter import view_counter
+            for table_name, row_id, amount in views:
+                view_counter.increment(table_name, row_id, amount)
+
+        response = current_app.response_class(body, status=status, headers=headers)
+        response.headers['X-Page-Cache'] = 'HIT'
+        # Pages stored with validators (see app.conditional) answer 304 to
+        # clients holding the same copy
+        return response.make_conditional(request)
+
+    def store(self, key, response, versions, views):
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in ('set-cookie', 'content-length')]
+        entry = (response.status_code, headers, response.get_data(), views)
+        self.cache.set_tagged(key, entry, versions)
+
+    def purge(self, tags):
+        """Invalidate every cached page carrying any of these tags."""
+        if self.active and tags:
+            self.cache.invalidate_tags(tags)
+
+    def clear(self):
+        if self.cache.backend is not None:
+            self.cache.clear()
+
+
+page_cache = PageCache()
+
+
+def cache_page(*tags):
+    """Serve a view from the page cache to anonymous visitors.
+
+    Args:
+        tags: Table listings the page shows, e.g. 'articles'; any change to a
+            listed row of those tables purges the page. Rows the view loads
+            are tagged automatically.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not page_cache.cacheable_request():
+                return view(*args, **kwargs)
+
+            key = page_cache.key()
+            response = page_cache.load(key)
+            if response is not None:
+                return response
+
+            # Versions are read before the view queries anything, so a change
+            # committed while it renders makes the stored page a miss. The view
+            # reads from the primary: a replica lagging behind a purge would
+            # store the old rows under the new versions.
+            g.page_cache_tags = page_cache.cache.tag_versions(tags)
+            g.db_route = PRIMARY
+            g.page_cache_views = []
+            response = make_response(view(*args, **kwargs))
+            versions = g.pop('page_cache_tags')
+            views = g.pop('page_cache_views')
+
+            if page_cache.cacheable_response(response):
+                page_cache.store(key, response, versions, views)
+                response.headers['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def _on_load(target, context):
+    if not has_request_context():
+        return
+    versions = g.get('page_cache_tags')
+    if versions is None:
+        return
+    table = target.__tablename__
+    tag = f'{table}:{target.id}'
+    # A page tagged with the whole listing is already purged by any change to its rows
+    if table not in versions and tag not in versions:
+        versions.update(page_cache.cache.tag_versions([tag]))
+
+
+def _is_listed(target, flag):
+    """Whether a changed row is, or was before the change, in its table's listings."""
+    if flag is None:
+        return True
+    return bool(getattr(target, flag)) or any(inspect(target).attrs[flag].history.deleted)
+
+
+def _tags_for_change(target, connection):
+    model = type(target)
+    tags = set()
+    if model in LISTED:
+        table = target.__tablename__
+        tags.add(f'{table}:{target.id}')
+        if _is_listed(target, LISTED[model]):
+            tags.add(table)
+    if model in PARENTS:
+        parent_table, foreign_key = PARENTS[model]
+        parent_ids = {getattr(target, foreign_key), *inspect(target).attrs[foreign_key].history.deleted} - {None}
+        tags.update(f'{parent_table}:{parent_id}' for parent_id in parent_ids)
+        parent = LISTING_PARENTS.get(model)
+        if parent is not None and parent_ids:
+            query = select(parent.id).where(parent.id.in_(parent_ids)).limit(1)
+            if LISTED[parent] is not None:
+                query = query.where(getattr(parent, LISTED[parent]) == True)
+            if connection.scalar(query) is not None:
+                tags.add(parent_table)
+    return tags
+
+
+def _pend(target, tags):
+    session = object_session(target)
+    if session is not None and tags:
+        session.info.setdefault(PENDING_TAGS, set()).update(tags)
+
+
+def _after_insert(mapper, connection, target):
+    _pend(target, _tags_for_change(target, connection))
+
+
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    if any(attribute.history.has_changes() for attribute in state.attrs):
+        _pend(target, _tags_for_change(target, connection))
+
+
+def _after_delete(mapper, connection, target):
+    _pend(target, _tags_for_change(target, connection))
+
+
+def _after_commit(session):
+    if session.in_nested_transaction():
+        return  # A savepoint was released; wait for the outer commit
+    tags = session.info.pop(PENDING_TAGS, None)
+    if tags:
+        page_cache.purge(tags)
+
+
+def _after_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(PENDING_TAGS, None)
+
+
+for _model in LISTED:
+    event.listen(_model, 'load', _on_load)
+for _model in {*LISTED, *PARENTS}:
+    event.listen(_model, 'after_insert', _after_insert)
+    event.listen(_model, 'after_update', _after_update)
+    event.listen(_model, 'after_delete', _after_delete)
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_soft_rollback', _after_rollback)
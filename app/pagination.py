@@ -0,0 +1,270 @@
+import hashlib
+from datetime import date, datetime
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, func, or_, select
+
+# Request arguments
+CURSOR_ARG = 'cursor'
+MODE_ARG = 'pagination'
+
+MODES = ('offset', 'keyset')
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='pagination-cursor')
+
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(values, direction):
+    """An opaque, signed token for a position in a keyset-ordered listing.
+
+    Args:
+        values: The sort key values of the row the page starts after (or before)
+        direction: 'next' for rows after that row, 'prev' for rows before it
+    """
+    return _serializer().dumps([direction, [_dump_value(value) for value in values]])
+
+
+def decode_cursor(token):
+    """Decode a cursor token.
+
+    Returns:
+        (direction, values), or None if the token is missing, forged or malformed
+    """
+    if not token:
+        return None
+    try:
+        direction, values = _serializer().loads(token)
+    except (BadSignature, ValueError, TypeError):
+        return None
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        return None
+    return direction, [_load_value(value) for value in values]
+
+
+class KeysetPage:
+    """A page of a keyset-paginated listing.
+
+    Has the attributes templates use from Flask-SQLAlchemy's Pagination
+    (items, has_next, has_prev, total, iteration); page numbers do not
+    exist in this mode, so iter_pages yields nothing and navigation uses
+    next_cursor and prev_cursor instead.
+    """
+
+    mode = 'keyset'
+    page = None
+    prev_num = None
+    next_num = None
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    @property
+    def pages(self):
+        if not self.total:
+            return 0
+        return -(-self.total // self.per_page)
+
+    def iter_pages(self, *args, **kwargs):
+        return iter(())
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _after(keys, values, direction):
+    """WHERE clause selecting rows strictly after a position in the given order.
+
+    Expanded to (a > x) OR (a = x AND b > y) ... so mixed sort directions
+    work and each disjunct can use an index on the key columns.
+    """
+    clauses = []
+    for i, ((column, descending), value) in enumerate(zip(keys, values)):
+        forward = descending if direction == 'prev' else not descending
+        comparison = column > value if forward else column < value
+        clauses.append(and_(*[keys[j][0] == values[j] for j in range(i)], comparison))
+    return or_(*clauses)
+
+
+def _order(keys, reverse=False):
+    return [column.asc() if descending == reverse else column.desc() for column, descending in keys]
+
+
+def _key_values(item, keys):
+    return [getattr(item, column.key) for column, _ in keys]
+
+
+def cached_total(query, cache_key=None):
+    """COUNT(*) for a listing, cached in app.cache for PAGINATION_COUNT_CACHE_TIMEOUT seconds.
+
+    Deep pages then cost no COUNT at all, at the price of a total that may
+    lag behind by up to the timeout. A timeout of 0 disables the cache.
+    """
+    from app.cache import cache
+
+    timeout = current_app.config.get('PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+    if not timeout:
+        return db_count(query)
+
+    if cache_key is None:
+        # The SQL and its parameters identify the listing and its filters
+        compiled = query.order_by(None).statement.compile()
+        cache_key = hashlib.sha1(f'{compiled}{sorted(compiled.params.items())!r}'.encode()).hexdigest()
+    cache_key = f'pagination:count:{cache_key}'
+    total = cache.get(cache_key)
+    if total is None:
+        total = db_count(query)
+        cache.set(cache_key, total, timeout)
+    return total
+
+
+def db_count(query):
+    """COUNT(*) of a query's rows."""
+    from app import db
+
+    return db.session.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+
+def keyset_paginate(query, keys, per_page, cursor=None, total=False):
+    """Paginate a query by its sort key instead of OFFSET.
+
+    Every page is a range scan starting at the previous page's last row, so
+    deep pages cost the same as the first one, and no COUNT is needed.
+    The last key should be unique (usually the primary key) so rows with
+    equal leading keys are neither skipped nor repeated. Key columns must
+    not be NULL.
+
+    Args:
+        query: The filtered query, without ORDER BY
+        keys: (column, descending) pairs, e.g. [(Media.created_at, True), (Media.id, True)]
+        per_page: Items per page
+        cursor: A token from a previous page's next_cursor or prev_cursor
+        total: False for no total, 'cached' for a cached COUNT, True for an exact one
+
+    Returns:
+        A KeysetPage
+    """
+    position = decode_cursor(cursor)
+    if position is not None and len(position[1]) != len(keys):
+        position = None
+
+    if total == 'cached':
+        total_count = cached_total(query)
+    elif total:
+        total_count = db_count(query)
+    else:
+        total_count = None
+
+    direction = position[0] if position else 'next'
+    filtered = query.filter(_after(keys, position[1], direction)) if position else query
+    # One extra row tells whether there is another page in this direction
+    rows = filtered.order_by(*_order(keys, reverse=direction == 'prev')).limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if more or direction == 'prev':
+            next_cursor = encode_cursor(_key_values(rows[-1], keys), 'next')
+        if position and (more or direction == 'next'):
+            prev_cursor = encode_cursor(_key_values(rows[0], keys), 'prev')
+    elif position and direction == 'next':
+        # Ran off the end (rows deleted since the cursor was issued); allow going back
+        prev_cursor = encode_cursor(position[1], 'prev')
+    elif position:
+        # Nothing before the cursor any more, so show the first page
+        return keyset_paginate(query, keys, per_page, None, total)
+    return KeysetPage(rows, per_page, next_cursor, prev_cursor, total_count)
+
+
+def pagination_mode(endpoint=None):
+    """The pagination mode for the current request.
+
+    A `?pagination=keyset|offset` argument wins, then a `?cursor=` argument
+    (which only keyset pages produce), then PAGINATION_MODES for the
+    endpoint, then PAGINATION_DEFAULT_MODE.
+    """
+    mode = request.args.get(MODE_ARG)
+    if mode in MODES:
+        return mode
+    if request.args.get(CURSOR_ARG):
+        return 'keyset'
+    config = current_app.config
+    return config.get('PAGINATION_MODES', {}).get(endpoint or request.endpoint,
+                                                  config.get('PAGINATION_DEFAULT_MODE', 'offset'))
+
+
+def paginate_listing(query, keys, per_page, total='cached'):
+    """Paginate a listing by page number or by cursor, per pagination_mode().
+
+    Args:
+        query: The filtered query, without ORDER BY
+        keys: (column, descending) sort keys, ending with a unique column
+        per_page: Items per page
+        total: Total to report in keyset mode (False, 'cached' or True)
+
+    Returns:
+        A Flask-SQLAlchemy Pagination (mode 'offset') or a KeysetPage
+    """
+    if pagination_mode() == 'keyset':
+        return keyset_paginate(query, keys, per_page, request.args.get(CURSOR_ARG), total)
+
+    page = request.args.get('page', 1, type=int)
+    pagination = query.order_by(*_order(keys)).paginate(page=page, per_page=per_page)
+    pagination.mode = 'offset'
+    return pagination
+
+
+def pagination_info(pagination):
+    """Navigation details of either kind of page, for JSON responses."""
+    if getattr(pagination, 'mode', 'offset') == 'keyset':
+        return {
+            'mode': 'keyset',
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'next_cursor': pagination.next_cursor,
+            'prev_cursor': pagination.prev_cursor,
+        }
+    return {
+        'mode': 'offset',
+        'page': pagination.page,
+        'per_page': pagination.per_page,
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'next_page': pagination.next_num,
+        'prev_page': pagination.prev_num,
+    }
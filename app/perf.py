@@ -0,0 +1,181 @@
+import math
+import threading
+import time
+from collections import deque
+from flask import before_render_template, g, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class RequestTimings:
+    """Timings collected while one request is handled (kept on `g`)."""
+
+    __slots__ = ('started', 'queries', 'db_time', 'render_time', '_render_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self._render_started = []
+
+
+class EndpointStats:
+    """A rolling window of the most recent requests to one endpoint.
+
+    Args:
+        window: How many recent requests the percentiles are computed over
+    """
+
+    def __init__(self, window):
+        self.count = 0
+        self.samples = deque(maxlen=window)
+
+    def add(self, total, db_time, render_time, queries):
+        self.count += 1
+        self.samples.append((total, db_time, render_time, queries))
+
+    def summary(self):
+        samples = list(self.samples)
+        totals = sorted(sample[0] for sample in samples)
+        n = len(samples) or 1
+        return {
+            'count': self.count,
+            'window': len(samples),
+            'p50': percentile(totals, 0.50),
+            'p95': percentile(totals, 0.95),
+            'p99': percentile(totals, 0.99),
+            'max': totals[-1] if totals else 0.0,
+            'db_time': sum(sample[1] for sample in samples) / n,
+            'render_time': sum(sample[2] for sample in samples) / n,
+            'queries': sum(sample[3] for sample in samples) / n,
+        }
+
+
+class PerfMonitor:
+    """Per-request SQL, database and template timing for every endpoint.
+
+    Each request's statement count, database time, Jinja render time and
+    total latency are reported in a `Server-Timing` header and added to a
+    rolling window per endpoint, from which /admin/perf shows p50/p95/p99.
+    Statistics are kept in this process only. Disabled with
+    PERF_MONITOR_ENABLED = False, in which case no hooks are installed.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.window = 1000
+        self.server_timing = True
+        self._stats = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PERF_MONITOR_ENABLED', True)
+        self.window = app.config.get('PERF_MONITOR_WINDOW', 1000)
+        self.server_timing = app.config.get('PERF_SERVER_TIMING', True)
+        app.extensions['perf_monitor'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+
+        # Engine events are global, so every engine (and bind) is timed;
+        # statements run outside a monitored request are ignored
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _start_request(self):
+        g.perf_timings = RequestTimings()
+
+    def _start_render(self, sender, template, context, **extra):
+        timings = g.get('perf_timings')
+        if timings is not None:
+            timings._render_started.append(time.perf_counter())
+
+    def _finish_render(self, sender, template, context, **extra):
+        timings = g.get('perf_timings')
+        if timings is not None and timings._render_started:
+            elapsed = time.perf_counter() - timings._render_started.pop()
+            # Nested render_template calls are already inside the outer one
+            if not timings._render_started:
+                timings.render_time += elapsed
+
+    def _finish_request(self, response):
+        timings = g.pop('perf_timings', None)
+        if timings is None:
+            return response
+
+        total = (time.perf_counter() - timings.started) * 1000
+        db_time = timings.db_time * 1000
+        render_time = timings.render_time * 1000
+        if self.server_timing:
+            response.headers['Server-Timing'] = (
+                f'db;dur={db_time:.1f};desc="{timings.queries} queries", '
+                f'render;dur={render_time:.1f}, '
+                f'total;dur={total:.1f}'
+            )
+        if request.endpoint:
+            self.record(request.endpoint, total, db_time, render_time, timings.queries)
+        return response
+
+    def record(self, endpoint, total, db_time=0.0, render_time=0.0, queries=0):
+        """Add one request's timings (in milliseconds) to an endpoint's window."""
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats(self.window)
+            stats.add(total, db_time, render_time, queries)
+
+    def report(self, sort='p95', limit=None):
+        """Summaries per endpoint, slowest first.
+
+        Args:
+            sort: The summary field to order by (p50, p95, p99, max, db_time, ...)
+            limit: Return at most this many endpoints
+
+        Returns:
+            A list of dicts with the endpoint name, its blueprint and its summary
+        """
+        with self._lock:
+            rows = [
+                dict(stats.summary(), endpoint=endpoint, blueprint=endpoint.rpartition('.')[0] or '-')
+                for endpoint, stats in self._stats.items()
+            ]
+        rows.sort(key=lambda row: row.get(sort, 0), reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('perf_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('perf_query_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    timings = g.get('perf_timings') if g else None
+    if timings is not None:
+        timings.queries += 1
+        timings.db_time += elapsed
+
+
+perf_monitor = PerfMonitor()
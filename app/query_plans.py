@@ -0,0 +1,101 @@
+import re
+from datetime import datetime
+from sqlalchemy import func, select
+from app import db
+from app.models.article import Article, ArticleComment, QuizAttempt
+from app.models.media import Media
+from app.models.report import Report
+from app.models.school import Activity
+from app.models.user import Notification
+from app.models.volunteer import Volunteer
+from app.pagination import _after, _order
+
+# A position inside a listing, standing in for a decoded cursor
+_CURSOR_TIME = datetime(2024, 1, 1)
+_CURSOR_ID = 1000
+
+
+def _keyset(query, keys):
+    """The query a keyset page after _CURSOR_TIME/_CURSOR_ID runs."""
+    return query.filter(_after(keys, [_CURSOR_TIME, _CURSOR_ID], 'next')).order_by(*_order(keys)).limit(11)
+
+
+def hot_queries():
+    """The filtered queries the routes run on every request, as in the routes.
+
+    Returns:
+        A list of (name, statement) pairs
+    """
+    media_newest = [(Media.created_at, True), (Media.id, True)]
+    media_top_rated = [(Media.rating_score, True), (Media.id, True)]
+    articles_newest = [(Article.published_at, True), (Article.id, True)]
+    volunteers_newest = [(Volunteer.registration_date, True), (Volunteer.id, True)]
+    reports_newest = [(Report.created_at, True), (Report.id, True)]
+
+    queries = [
+        ('main.index featured articles',
+         Article.query.filter_by(is_published=True).order_by(Article.published_at.desc()).limit(3)),
+        ('main.index featured media',
+         Media.query.filter_by(is_approved=True, featured=True).order_by(Media.created_at.desc()).limit(4)),
+        ('content.article_list',
+         _keyset(Article.query.filter_by(is_published=True), articles_newest)),
+        ('content.article_list by category',
+         _keyset(Article.query.filter_by(is_published=True, category='history'), articles_newest)),
+        ('content.article_view comments',
+         ArticleComment.query.filter_by(article_id=1, is_approved=True).order_by(ArticleComment.created_at.desc())),
+        ('content.quiz_view last attempt',
+         QuizAttempt.query.filter_by(quiz_id=1, user_id=1, is_completed=True)
+         .order_by(QuizAttempt.completed_at.desc()).limit(1)),
+        ('content.media_list',
+         _keyset(Media.query.filter_by(is_approved=True), media_newest)),
+        ('content.media_list top rated',
+         Media.query.filter_by(is_approved=True).order_by(*_order(media_top_rated)).limit(11)),
+        ('auth.notifications',
+         Notification.query.filter_by(user_id=1).order_by(Notification.created_at.desc()).limit(10)),
+        ('unread notification count',
+         select(func.count(Notification.id)).where(Notification.user_id == 1, Notification.is_read == False)),
+        ('school.school_detail activities',
+         Activity.query.filter_by(school_id=1).order_by(Activity.date.desc()).limit(5)),
+        ('school.school_reports',
+         _keyset(Report.query.filter_by(school_id=1), reports_newest)),
+        ('volunteer.school_volunteers',
+         _keyset(Volunteer.query.filter_by(school_id=1), volunteers_newest)),
+        ('admin.admin_reports by status',
+         Report.query.filter_by(status='submitted').order_by(Report.created_at.desc()).limit(10)),
+        ('admin.admin_dashboard pending reports',
+         select(func.count(Report.id)).where(Report.status == 'submitted')),
+    ]
+    return [(name, getattr(query, 'statement', query)) for name, query in queries]
+
+
+# SQLite reports a full table scan as "SCAN media" (or "SCAN TABLE media"
+# before 3.36); index scans and searches mention the index they use
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+
+
+def explain(connection, statement):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement (SQLite)."""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+
+
+def check_query_plans():
+    """Run EXPLAIN QUERY PLAN on every hot query against the current database.
+
+    Returns:
+        A list of (name, plan lines, tables scanned in full); a query is
+        fine when its last element is empty. Empty if the database is not
+        SQLite, whose plan format this understands.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return []
+
+    results = []
+    with db.engine.connect() as connection:
+        tables = set(db.inspect(connection).get_table_names())
+        for name, statement in hot_queries():
+            plan = explain(connection, statement)
+            full_scans = [match.group(1) for match in map(_FULL_SCAN.match, plan)
+                          if match and match.group(1) in tables]
+            results.append((name, plan, full_scans))
+    return results
@@ -0,0 +1,147 @@
+from collections import namedtuple
+from sqlalchemy import event, func, select, update
+from app import db
+from app.cache import cache
+from app.models.article import Quiz, QuizQuestion, QuizChoice
+
+# Immutable, picklable snapshots of a quiz. Attribute names match the models
+# so templates can render them in place of ORM objects.
+CompiledChoice = namedtuple('CompiledChoice', 'id choice_text is_correct order')
+CompiledQuestion = namedtuple('CompiledQuestion', 'id question_text question_type points order choices')
+
+# Grading data for one question; see app.grading
+AnswerKey = namedtuple('AnswerKey', 'question_id question_type points choice_ids correct_choice_ids correct_texts')
+
+
+class CompiledQuiz(namedtuple('CompiledQuiz', 'quiz_id version questions answer_key')):
+    """A quiz's questions, choices and answer key, built once per version.
+
+    answer_key maps question id to AnswerKey; treat it as read-only, it is
+    shared by every request using the cached copy.
+    """
+
+    __slots__ = ()
+
+    @property
+    def question_count(self):
+        return len(self.questions)
+
+    @property
+    def max_score(self):
+        return sum(question.points for question in self.questions)
+
+
+def _answer_key(questions):
+    return {
+        question.id: AnswerKey(
+            question_id=question.id,
+            question_type=question.question_type,
+            points=question.points,
+            choice_ids=frozenset(choice.id for choice in question.choices),
+            correct_choice_ids=frozenset(choice.id for choice in question.choices if choice.is_correct),
+            correct_texts=frozenset(choice.choice_text.strip().lower()
+                                    for choice in question.choices if choice.is_correct),
+        )
+        for question in questions
+    }
+
+
+def compile_quiz(quiz_id, version):
+    """Load a quiz's questions and choices with a single query.
+
+    Returns:
+        A CompiledQuiz with questions and choices in display order
+    """
+    rows = db.session.query(
+        QuizQuestion.id,
+        QuizQuestion.question_text,
+        QuizQuestion.question_type,
+        QuizQuestion.points,
+        QuizQuestion.order,
+        QuizChoice.id.label('choice_id'),
+        QuizChoice.choice_text,
+        QuizChoice.is_correct,
+        QuizChoice.order.label('choice_order')
+    ).outerjoin(QuizChoice, QuizChoice.question_id == QuizQuestion.id)\
+        .filter(QuizQuestion.quiz_id == quiz_id)\
+        .order_by(QuizQuestion.order, QuizQuestion.id, QuizChoice.order, QuizChoice.id).all()
+
+    questions = []
+    choices = {}
+    for row in rows:
+        if row.id not in choices:
+            choices[row.id] = []
+            questions.append(row)
+        if row.choice_id is not None:
+            choices[row.id].append(CompiledChoice(
+                id=row.choice_id,
+                choice_text=row.choice_text,
+                is_correct=bool(row.is_correct),
+                order=row.choice_order
+            ))
+
+    compiled_questions = tuple(
+        CompiledQuestion(
+            id=row.id,
+            question_text=row.question_text,
+            question_type=row.question_type,
+            points=row.points or 0,
+            order=row.order,
+            choices=tuple(choices[row.id])
+        )
+        for row in questions
+    )
+    return CompiledQuiz(
+        quiz_id=quiz_id,
+        version=version,
+        questions=compiled_questions,
+        answer_key=_answer_key(compiled_questions)
+    )
+
+
+def get_compiled_quiz(quiz):
+    """Return the compiled definition of a quiz, building it on a cache miss.
+
+    Entries are keyed by quiz id and content_version, so a change to any
+    question or choice makes the next read compile a fresh copy.
+
+    Args:
+        quiz: The Quiz model instance
+
+    Returns:
+        A CompiledQuiz
+    """
+    version = quiz.content_version or 0
+    key = f'quiz:{quiz.id}:v{version}:compiled'
+    compiled = cache.get(key)
+    if compiled is None:
+        compiled = compile_quiz(quiz.id, version)
+        cache.set(key, compiled)
+    return compiled
+
+
+# Version bumps
+_quizzes = Quiz.__table__
+
+
+def _bump_version(connection, quiz_id):
+    connection.execute(
+        update(_quizzes)
+        .where(_quizzes.c.id == quiz_id)
+        .values(content_version=func.coalesce(_quizzes.c.content_version, 0) + 1)
+    )
+
+
+def _on_question_change(mapper, connection, target):
+    _bump_version(connection, target.quiz_id)
+
+
+def _on_choice_change(mapper, connection, target):
+    quiz_id = select(QuizQuestion.quiz_id)\
+        .where(QuizQuestion.id == target.question_id).scalar_subquery()
+    _bump_version(connection, quiz_id)
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(QuizQuestion, _event, _on_question_change)
+    event.listen(QuizChoice, _event, _on_choice_change)
@@ -0,0 +1,101 @@
+from flask import current_app
+from sqlalchemy import case, event, func, inspect, select, update
+from app import db
+from app.models.media import Media, MediaRating
+
+_media = Media.__table__
+_ratings = MediaRating.__table__
+
+
+def _prior():
+    config = current_app.config
+    return config.get('MEDIA_RATING_PRIOR_MEAN', 3.0), config.get('MEDIA_RATING_PRIOR_WEIGHT', 5)
+
+
+def bayesian_score(rating_sum, rating_count):
+    """Average rating pulled towards the prior mean while there are few ratings.
+
+    Works on numbers or SQL expressions:
+    (weight * mean + rating_sum) / (weight + rating_count)
+    """
+    mean, weight = _prior()
+    return (float(weight * mean) + rating_sum) / (weight + rating_count)
+
+
+def _adjust(connection, media_id, stars, delta):
+    """Add or remove one rating from a media item's aggregates in a single UPDATE."""
+    if not stars or not delta:
+        return
+    new_sum = _media.c.rating_sum + stars * delta
+    new_count = _media.c.rating_count + delta
+    bucket = _media.c[f'rating_{stars}']
+    connection.execute(
+        update(_media)
+        .where(_media.c.id == media_id)
+        .values({
+            _media.c.rating_sum: new_sum,
+            _media.c.rating_count: new_count,
+            bucket: bucket + delta,
+            _media.c.rating_score: bayesian_score(new_sum, new_count),
+            # Ratings are not a change to the media item itself
+            _media.c.updated_at: _media.c.updated_at,
+        })
+    )
+
+
+def _previous_rating(target):
+    history = inspect(target).attrs.rating.history
+    return history.deleted[0] if history.deleted else target.rating
+
+
+def _on_insert(mapper, connection, target):
+    _adjust(connection, target.media_id, target.rating, 1)
+
+
+def _on_update(mapper, connection, target):
+    previous = _previous_rating(target)
+    if previous != target.rating:
+        _adjust(connection, target.media_id, previous, -1)
+        _adjust(connection, target.media_id, target.rating, 1)
+
+
+def _on_delete(mapper, connection, target):
+    _adjust(connection, target.media_id, _previous_rating(target), -1)
+
+
+def _set_initial_score(mapper, connection, target):
+    if not target.rating_count:
+        target.rating_score = bayesian_score(0, 0)
+
+
+event.listen(MediaRating, 'after_insert', _on_insert)
+event.listen(MediaRating, 'after_update', _on_update)
+event.listen(MediaRating, 'after_delete', _on_delete)
+event.listen(Media, 'before_insert', _set_initial_score)
+
+
+def reconcile_ratings():
+    """Recompute every media item's rating aggregates from media_ratings.
+
+    Returns:
+        The number of media items updated
+    """
+    def aggregate(expression):
+        return select(func.coalesce(expression, 0))\
+            .where(_ratings.c.media_id == _media.c.id)\
+            .scalar_subquery()
+
+    rating_sum = aggregate(func.sum(_ratings.c.rating))
+    rating_count = aggregate(func.count(_ratings.c.id))
+    values = {
+        _media.c.rating_sum: rating_sum,
+        _media.c.rating_count: rating_count,
+        _media.c.rating_score: bayesian_score(rating_sum, rating_count),
+        _media.c.updated_at: _media.c.updated_at,
+    }
+    for stars in range(1, 6):
+        values[_media.c[f'rating_{stars}']] = aggregate(func.sum(case((_ratings.c.rating == stars, 1), else_=0)))
+
+    result = db.session.execute(update(_media).values(values))
+    db.session.commit()
+    return result.rowcount
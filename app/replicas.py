@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+
+# Bind key of the replica engine in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+PRIMARY = 'primary'
+REPLICA = 'replica'
+ROUTES = (PRIMARY, REPLICA)
+
+# Flask session key holding the time of the user's last write
+LAST_WRITE_KEY = '_db_last_write'
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class RoutingSession(Session):
+    """db.session class that reads from the replica during read-only requests.
+
+    Only SELECTs of a request routed to the replica go there, including
+    text() queries declared as SELECTs with .columns(); flushes, other
+    text() statements and INSERT/UPDATE/DELETE always use the primary. Once a request
+    has written, its remaining reads use the primary too, so it never reads
+    data older than what it just wrote.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_request_context():
+            return engine
+
+        if self._flushing or getattr(clause, 'is_dml', False):
+            g.db_wrote = True
+            return engine
+
+        if (g.get('db_route') == REPLICA and not g.get('db_wrote')
+                and getattr(clause, 'is_select', False)
+                and engine is self._db.engines.get(None)):
+            return self._db.engines.get(REPLICA_BIND, engine)
+        return engine
+
+
+def request_route(endpoint=None):
+    """Whether the current request should read from the primary or the replica.
+
+    Writing requests (anything but GET/HEAD) use the primary, and so does
+    every request of a user within READ_REPLICA_STICKY_SECONDS of their own
+    last write, so they see it even while the replica lags. Other requests
+    use READ_REPLICA_ROUTES for the endpoint, then READ_REPLICA_DEFAULT_ROUTE.
+    """
+    config = current_app.config
+    if REPLICA_BIND not in (config.get('SQLALCHEMY_BINDS') or {}) or request.method not in READ_METHODS:
+        return PRIMARY
+
+    last_write = session.get(LAST_WRITE_KEY)
+    if last_write and time.time() - last_write < config.get('READ_REPLICA_STICKY_SECONDS', 5):
+        return PRIMARY
+
+    route = config.get('READ_REPLICA_ROUTES', {}).get(endpoint or request.endpoint,
+                                                       config.get('READ_REPLICA_DEFAULT_ROUTE', PRIMARY))
+    return route if route in ROUTES else PRIMARY
+
+
+class ReadReplicaRouter:
+    """Route the reads of read-only requests to a replica database.
+
+    READ_REPLICA_URI adds the replica as the 'replica' bind; without it every
+    query uses the primary. Requires db.session to be a RoutingSession.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the replica bind and the request hooks.
+
+        Must run before db.init_app, which creates the engines.
+        """
+        uri = app.config.get('READ_REPLICA_URI')
+        if not uri:
+            return
+        app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), REPLICA_BIND: uri}
+        app.before_request(self._choose_route)
+        app.after_request(self._remember_write)
+        app.extensions['read_replicas'] = self
+
+    @staticmethod
+    def _choose_route():
+        g.db_route = request_route()
+
+    @staticmethod
+    def _remember_write(response):
+        if g.get('db_wrote') and current_app.config.get('READ_REPLICA_STICKY_SECONDS', 5):
+            session[LAST_WRITE_KEY] = time.time()
+        return response
+
+
+def sqlite_path(uri):
+    """The file path of a SQLite URI, or None for other databases and :memory:."""
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return url.database
+
+
+def copy_database(source_path, target_path):
+    """Copy a SQLite database onto another file with the online backup API.
+
+    The copy is a consistent snapshot even while the source is being written,
+    and readers of the target see either the old or the new contents.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(target_path)), exist_ok=True)
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def sync_replica(app, interval=None, iterations=None):
+    """Keep a SQLite replica in sync by copying the primary onto it.
+
+    A stand-in for real replication, for development and testing; copying
+    on an interval also reproduces replication lag.
+
+    Args:
+        app: The application whose primary and replica are copied
+        interval: Seconds between copies; None copies once
+        iterations: Number of copies to make when an interval is given (None runs forever)
+
+    Returns:
+        The number of copies made
+    """
+    primary = sqlite_path(app.config['SQLALCHEMY_DATABASE_URI'])
+    replica = app.config.get('READ_REPLICA_URI')
+    replica = sqlite_path(replica) if replica else None
+    if primary is None or replica is None:
+        raise ValueError('Both SQLALCHEMY_DATABASE_URI and READ_REPLICA_URI must be SQLite files')
+
+    copies = 0
+    while True:
+        copy_database(primary, replica)
+        copies += 1
+        if interval is None or (iterations is not None and copies >= iterations):
+            return copies
+        time.sleep(interval)
+
+
+replica_router = ReadReplicaRouter()
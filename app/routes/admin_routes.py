@@ -7,7 +7,12 @@ from app.models.article import Article
 from app.models.media import Media
 from app.models.report import Report, PerformanceReport
 from app import db
-from app.utils import generate_report_pdf, export_to_csv
+from app.utils import generate_report_pdf
+from app.exports import EXPORTS, csv_response
+from app.notifications import broadcast_notification, mark_notifications_read
+from app.annotations import annotate_counts
+from app.pagination import paginate_listing
+from app.perf import perf_monitor
 from datetime import datetime, timedelta
 import os
 import json
@@ -63,10 +68,9 @@ def admin_dashboard():
 @admin_required
 def admin_users():
     """Manage users"""
-    page = request.args.get('page', 1, type=int)
     per_page = current_app.config['PAGINATION_PER_PAGE']
     
-    users = User.query.order_by(User.created_at.desc()).paginate(page=page, per_page=per_page)
+    users = paginate_listing(User.query, [(User.created_at, True), (User.id, True)], per_page)
     
     return render_template('admin/users.html', users=users)
 
@@ -136,6 +140,7 @@ def admin_schools():
     per_page = current_app.config['PAGINATION_PER_PAGE']
     
     schools = School.query.order_by(School.name).paginate(page=page, per_page=per_page)
+    annotate_counts(schools.items, 'volunteers', 'activities', 'reports')
     
     return render_template('admin/schools.html', schools=schools)
 
@@ -144,7 +149,6 @@ def admin_schools():
 @admin_required
 def admin_volunteers():
     """Manage volunteers"""
-    page = request.args.get('page', 1, type=int)
     per_page = current_app.config['PAGINATION_PER_PAGE']
     
     # Get filter parameters
@@ -160,7 +164,7 @@ def admin_volunteers():
     if status:
         query = query.filter_by(status=status)
     
-    volunteers = query.order_by(Volunteer.created_at.desc()).paginate(page=page, per_page=per_page)
+    volunteers = paginate_listing(query, [(Volunteer.registration_date, True), (Volunteer.id, True)], per_page)
     
     # Get schools for filter dropdown
     schools = School.query.order_by(School.name).all()
@@ -193,6 +197,7 @@ def admin_articles():
         query = query.filter_by(is_published=(is_published == 'true'))
     
     articles = query.order_by(Article.created_at.desc()).paginate(page=page, per_page=per_page)
+    annotate_counts(articles.items, 'comments')
     
     return render_template('admin/articles.html', 
                            articles=articles,
@@ -204,7 +209,6 @@ def admin_articles():
 @admin_required
 def admin_media():
     """Manage media"""
-    page = request.args.get('page', 1, type=int)
     per_page = current_app.config['PAGINATION_PER_PAGE']
     
     # Get filter parameters
@@ -220,7 +224,8 @@ def admin_media():
     if is_approved is not None:
         query = query.filter_by(is_approved=(is_approved == 'true'))
     
-    media = query.order_by(Media.created_at.desc()).paginate(page=page, per_page=per_page)
+    media = paginate_listing(query, [(Media.created_at, True), (Media.id, True)], per_page)
+    annotate_counts(media.items, 'comments')
     
     return render_template('admin/media.html', 
                            media=media,
@@ -308,12 +313,10 @@ def admin_notifications():
     notifications = Notification.query.filter_by(user_id=current_user.id)\
         .order_by(Notification.created_at.desc()).paginate(page=page, per_page=per_page)
     
-    # Mark all as read
-    for notification in notifications.items:
-        if not notification.is_read:
-            notification.is_read = True
-    
-    db.session.commit()
+    # Mark the notifications on this page as read with a single UPDATE, before
+    # rendering so the navigation bar's unread count includes them
+    mark_notifications_read(current_user.id, [notification.id for notification in notifications.items
+                                              if not notification.is_read])
     
     return render_template('admin/notifications.html', notifications=notifications)
 
@@ -327,33 +330,29 @@ def create_notification():
         message = request.form.get('message')
         category = request.form.get('category')
         recipient_role = request.form.get('recipient_role')
+        school_id = request.form.get('school_id', type=int)
+        link = request.form.get('link') or None
         
         if not title or not message or not category or not recipient_role:
             flash('All fields are required.', 'danger')
             return redirect(url_for('admin.create_notification'))
         
-        # Get recipients based on role
-        if recipient_role == 'all':
-            recipients = User.query.all()
-        else:
-            recipients = User.query.filter_by(role=recipient_role).all()
-        
-        # Create notification for each recipient
-        for user in recipients:
-            notification = Notification(
-                user_id=user.id,
-                title=title,
-                message=message,
-                category=category
-            )
-            db.session.add(notification)
-        
-        db.session.commit()
+        # Fan out to the targeted users in a single INSERT ... SELECT
+        broadcast = broadcast_notification(
+            title=title,
+            message=message,
+            category=category,
+            link=link,
+            recipient_role=None if recipient_role == 'all' else recipient_role,
+            school_id=school_id,
+            sender_id=current_user.id
+        )
         
-        flash(f'Notification sent to {len(recipients)} users.', 'success')
+        flash(f'Notification sent to {broadcast.recipient_count} users.', 'success')
         return redirect(url_for('admin.admin_dashboard'))
     
-    return render_template('admin/create_notification.html')
+    schools = School.query.order_by(School.name).all()
+    return render_template('admin/create_notification.html', schools=schools)
 
 @admin.route('/admin/stats')
 @login_required
@@ -496,118 +495,33 @@ def create_performance_report():
 @admin_required
 def export_data(data_type):
     """Export data to CSV"""
-    if data_type == 'users':
-        # Export users
-        users = User.query.all()
-        headers = ['ID', 'Username', 'Email', 'Role', 'Active', 'Created At', 'Last Login']
-        data = []
-        
-        for user in users:
-            data.append([
-                user.id,
-                user.username,
-                user.email,
-                user.role,
-                'Yes' if user.is_active else 'No',
-                user.created_at.strftime('%Y-%m-%d %H:%M:%S') if user.created_at else '',
-                user.last_login_at.strftime('%Y-%m-%d %H:%M:%S') if user.last_login_at else ''
-            ])
-        
-        filename = f"users_{datetime.now().strftime('%Y%m%d')}.csv"
-    
-    elif data_type == 'schools':
-        # Export schools
-        schools = School.query.all()
-        headers = ['ID', 'Name', 'Location', 'Student Count', 'Email', 'Phone']
-        data = []
-        
-        for school in schools:
-            data.append([
-                school.id,
-                school.name,
-                school.location,
-                school.student_count,
-                school.email,
-                school.phone
-            ])
-        
-        filename = f"schools_{datetime.now().strftime('%Y%m%d')}.csv"
-    
-    elif data_type == 'volunteers':
-        # Export volunteers
-        volunteers = Volunteer.query.all()
-        headers = ['ID', 'Name', 'Email', 'Phone', 'School', 'Grade', 'Skills', 'Status']
-        data = []
-        
-        for volunteer in volunteers:
-            school_name = volunteer.school.name if volunteer.school else 'N/A'
-            data.append([
-                volunteer.id,
-                volunteer.name,
-                volunteer.email,
-                volunteer.phone,
-                school_name,
-                volunteer.grade,
-                volunteer.skills,
-                volunteer.status
-            ])
-        
-        filename = f"volunteers_{datetime.now().strftime('%Y%m%d')}.csv"
-    
-    elif data_type == 'articles':
-        # Export articles
-        articles = Article.query.all()
-        headers = ['ID', 'Title', 'Category', 'Author', 'Published', 'Views', 'Created At']
-        data = []
-        
-        for article in articles:
-            author_name = article.author.username if article.author else 'N/A'
-            data.append([
-                article.id,
-                article.title,
-                article.category,
-                author_name,
-                'Yes' if article.is_published else 'No',
-                article.view_count,
-                article.created_at.strftime('%Y-%m-%d')
-            ])
-        
-        filename = f"articles_{datetime.now().strftime('%Y%m%d')}.csv"
-    
-    elif data_type == 'media':
-        # Export media
-        media_items = Media.query.all()
-        headers = ['ID', 'Title', 'Type', 'Creator', 'School', 'Approved', 'Views', 'Created At']
-        data = []
-        
-        for media in media_items:
-            creator_name = media.creator.username if media.creator else 'N/A'
-            school_name = media.school.name if media.school else 'N/A'
-            data.append([
-                media.id,
-                media.title,
-                media.media_type,
-                creator_name,
-                school_name,
-                'Yes' if media.is_approved else 'No',
-                media.view_count,
-                media.created_at.strftime('%Y-%m-%d')
-            ])
-        
-        filename = f"media_{datetime.now().strftime('%Y%m%d')}.csv"
-    
-    else:
+    if data_type not in EXPORTS:
         flash('Invalid data type for export.', 'danger')
         return redirect(url_for('admin.admin_dashboard'))
     
-    # Generate CSV
-    csv_data = export_to_csv(headers, data)
-    
-    # Create response
-    response = current_app.response_class(
-        csv_data,
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment;filename={filename}'}
-    )
-    
-    return response
\ No newline at end of file
+    # Streamed in batches so large tables never sit in memory
+    return csv_response(data_type)
+
+@admin.route('/admin/perf')
+@login_required
+@admin_required
+def perf():
+    """Slowest endpoints by recent request latency"""
+    sort = request.args.get('sort', 'p95')
+    if sort not in ('p50', 'p95', 'p99', 'max', 'db_time', 'render_time', 'queries', 'count'):
+        sort = 'p95'
+    
+    return render_template('admin/perf.html',
+                           endpoints=perf_monitor.report(sort),
+                           enabled=perf_monitor.enabled,
+                           window=perf_monitor.window,
+                           current_sort=sort)
+
+@admin.route('/admin/perf/reset', methods=['POST'])
+@login_required
+@admin_required
+def perf_reset():
+    """Clear the collected request timings"""
+    perf_monitor.reset()
+    flash('Performance statistics have been reset.', 'success')
+    return redirect(url_for('admin.perf'))
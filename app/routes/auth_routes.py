@@ -5,6 +5,7 @@ from app.models.user import User, Notification
 from app.forms import LoginForm, RegistrationForm, ResetPasswordRequestForm, ResetPasswordForm, ProfileForm
 from app import db
 from app.utils import send_password_reset_email
+from app.notifications import mark_notifications_read
 from datetime import datetime
 
 auth = Blueprint('auth', __name__)
@@ -84,6 +85,7 @@ def reset_password_request():
         user = User.query.filter_by(email=form.email.data).first()
         if user:
             send_password_reset_email(user)
+            db.session.commit()
         flash('Check your email for the instructions to reset your password', 'info')
         return redirect(url_for('auth.login'))
     
@@ -148,16 +150,8 @@ def notifications():
         .order_by(Notification.created_at.desc())\
         .paginate(page=page, per_page=per_page)
     
-    # Mark all unread notifications as read
-    unread_notifications = Notification.query.filter_by(
-        user_id=current_user.id, 
-        is_read=False
-    ).all()
-    
-    for notification in unread_notifications:
-        notification.is_read = True
-    
-    db.session.commit()
+    # Mark all unread notifications as read with a single UPDATE
+    mark_notifications_read(current_user.id)
     
     return render_template('notifications.html', 
                            title='Notifications', 
@@ -5,17 +5,31 @@ from app.models.media import Media, MediaComment, MediaRating, MediaCollection
 from app.forms import ArticleForm, QuizForm, QuestionForm, MediaUploadForm, CommentForm
 from app import db
 from app.utils import save_file, allowed_file, save_image_with_thumbnail
+from app.grading import grade_submission
+from app.quiz_cache import get_compiled_quiz
+from app.images import image_pipeline, pick_derivative, remove_image
+from app.models.upload import UploadSession
+from app.serving import send_upload
+from app.annotations import annotate_counts
+from app.pagination import paginate_listing
+from app.page_cache import cache_page
+from app.conditional import Dependent, conditional
+from app.uploads import TUS_VERSION, UploadError, append_chunk, create_upload, delete_upload, parse_metadata
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime
+from sqlalchemy.orm import aliased
+
+# Articles listed as related on an article's page (see Article.get_related_articles)
+RelatedArticle = aliased(Article)
 
 content = Blueprint('content', __name__)
 
 # Article routes
 @content.route('/articles')
+@cache_page('articles')
 def article_list():
     """List all published articles"""
-    page = request.args.get('page', 1, type=int)
     per_page = current_app.config['PAGINATION_PER_PAGE']
     category = request.args.get('category')
     
@@ -25,13 +39,20 @@ def article_list():
     if category:
         query = query.filter_by(category=category)
     
-    articles = query.order_by(Article.published_at.desc()).paginate(page=page, per_page=per_page)
+    articles = paginate_listing(query, [(Article.published_at, True), (Article.id, True)], per_page)
+    annotate_counts(articles.items, 'comments')
     
     return render_template('content/article_list.html', 
                            articles=articles, 
                            current_category=category)
 
 @content.route('/articles/<slug>')
+@cache_page('articles')  # Related articles come from the listing
+@conditional(Article, 'slug', dependents=[Dependent(ArticleComment.article_id, [ArticleComment.is_approved == True]),
+                                          Dependent(RelatedArticle.category,
+                                                    [RelatedArticle.id != Article.id, RelatedArticle.is_published == True],
+                                                    references=Article.category)],
+             count_view=True)
 def article_view(slug):
     """View a specific article"""
     article = Article.query.filter_by(slug=slug).first_or_404()
@@ -114,13 +135,16 @@ def article_create():
         
         # Handle featured image upload
         if form.featured_image.data:
-            image_filename = save_file(form.featured_image.data, 'articles')
+            image_filename = save_file(form.featured_image.data, 'articles', 'image')
             if image_filename:
                 article.featured_image = image_filename
         
         db.session.add(article)
         db.session.commit()
         
+        # Build the featured image's resized variants in the background
+        image_pipeline.process(article, 'featured_image_derivatives', 'articles', article.featured_image)
+        
         flash('Article created successfully!', 'success')
         return redirect(url_for('content.article_view', slug=article.slug))
     
@@ -154,19 +178,22 @@ def article_edit(slug):
             article.is_published = form.is_published.data
         
         # Handle featured image upload
+        image_filename = None
         if form.featured_image.data:
-            image_filename = save_file(form.featured_image.data, 'articles')
+            image_filename = save_file(form.featured_image.data, 'articles', 'image')
             if image_filename:
-                # Delete old image if exists
+                # Delete old image and its variants if they exist
                 if article.featured_image:
-                    old_image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'articles', article.featured_image)
-                    if os.path.exists(old_image_path):
-                        os.remove(old_image_path)
+                    remove_image('articles', article.featured_image, article.featured_image_derivatives)
                 
                 article.featured_image = image_filename
+                article.featured_image_derivatives = None
         
         db.session.commit()
         
+        if image_filename:
+            image_pipeline.process(article, 'featured_image_derivatives', 'articles', image_filename)
+        
         flash('Article updated successfully!', 'success')
         return redirect(url_for('content.article_view', slug=article.slug))
     
@@ -187,6 +214,7 @@ def quiz_list():
         query = query.filter_by(category=category)
     
     quizzes = query.order_by(Quiz.created_at.desc()).paginate(page=page, per_page=per_page)
+    annotate_counts(quizzes.items, 'questions', 'attempts')
     
     return render_template('content/quiz_list.html', 
                            quizzes=quizzes, 
@@ -211,8 +239,13 @@ def quiz_view(id):
             is_completed=True
         ).order_by(QuizAttempt.completed_at.desc()).first()
     
+    # Questions and choices come from the compiled quiz cache
+    compiled_quiz = get_compiled_quiz(quiz)
+    
     return render_template('content/quiz_view.html', 
                            quiz=quiz,
+                           questions=compiled_quiz.questions,
+                           question_count=compiled_quiz.question_count,
                            user_attempt=user_attempt)
 
 @content.route('/quizzes/<int:id>/take', methods=['GET', 'POST'])
@@ -226,67 +259,14 @@ def quiz_take(id):
         abort(404)
     
     if request.method == 'POST':
-        # Process quiz submission
-        attempt = QuizAttempt(quiz_id=quiz.id, user_id=current_user.id)
-        db.session.add(attempt)
-        db.session.commit()
-        
-        score = 0
-        
-        # Process each question
-        for key, value in request.form.items():
-            if key.startswith('question_'):
-                question_id = int(key.split('_')[1])
-                question = QuizQuestion.query.get(question_id)
-                
-                if question.question_type == 'multiple_choice':
-                    selected_choice_id = int(value)
-                    answer = QuizAnswer(
-                        attempt_id=attempt.id,
-                        question_id=question_id,
-                        selected_choice_id=selected_choice_id
-                    )
-                    db.session.add(answer)
-                    
-                    # Check if correct
-                    if answer.is_correct:
-                        score += question.points
-                
-                elif question.question_type == 'true_false':
-                    # For true/false, value will be 'true' or 'false'
-                    text_answer = value
-                    answer = QuizAnswer(
-                        attempt_id=attempt.id,
-                        question_id=question_id,
-                        text_answer=text_answer
-                    )
-                    db.session.add(answer)
-                    
-                    # Check if correct (simplified for example)
-                    correct_choice = question.get_correct_choice()
-                    if correct_choice and correct_choice.choice_text.lower() == text_answer.lower():
-                        answer.is_correct = True
-                        score += question.points
-                
-                elif question.question_type == 'short_answer':
-                    text_answer = value
-                    answer = QuizAnswer(
-                        attempt_id=attempt.id,
-                        question_id=question_id,
-                        text_answer=text_answer
-                    )
-                    db.session.add(answer)
-                    
-                    # Short answers need manual grading, so leave is_correct as False for now
-        
-        # Complete the attempt
-        attempt.complete(score)
+        # Grade all answers in memory and store the attempt with one commit
+        attempt = grade_submission(quiz, current_user.id, request.form)
         
         flash('Quiz completed! Your score: {:.1f}%'.format(attempt.get_percentage_score()), 'success')
         return redirect(url_for('content.quiz_results', attempt_id=attempt.id))
     
-    # Get questions for the quiz
-    questions = QuizQuestion.query.filter_by(quiz_id=quiz.id).order_by(QuizQuestion.order).all()
+    # Get questions for the quiz from the compiled quiz cache
+    questions = get_compiled_quiz(quiz).questions
     
     return render_template('content/quiz_take.html', 
                            quiz=quiz,
@@ -304,7 +284,7 @@ def quiz_results(attempt_id):
     
     # Get quiz and questions
     quiz = Quiz.query.get(attempt.quiz_id)
-    questions = QuizQuestion.query.filter_by(quiz_id=quiz.id).order_by(QuizQuestion.order).all()
+    questions = get_compiled_quiz(quiz).questions
     
     # Get answers for this attempt
     answers = {}
@@ -473,11 +453,12 @@ def quiz_add_questions(id):
 
 # Media routes
 @content.route('/media')
+@cache_page('media')
 def media_list():
     """List all approved media"""
-    page = request.args.get('page', 1, type=int)
     per_page = current_app.config['PAGINATION_PER_PAGE']
     media_type = request.args.get('type')
+    sort = request.args.get('sort', 'newest')
     
     # Build query
     query = Media.query.filter_by(is_approved=True)
@@ -485,20 +466,35 @@ def media_list():
     if media_type:
         query = query.filter_by(media_type=media_type)
     
-    media = query.order_by(Media.created_at.desc()).paginate(page=page, per_page=per_page)
+    if sort == 'top_rated':
+        # Uses ix_media_approved_rating_score
+        keys = [(Media.rating_score, True), (Media.id, True)]
+    else:
+        keys = [(Media.created_at, True), (Media.id, True)]
+    
+    media = paginate_listing(query, keys, per_page)
+    annotate_counts(media.items, 'comments')
     
     return render_template('content/media_list.html', 
                            media=media, 
-                           current_type=media_type)
+                           current_type=media_type,
+                           current_sort=sort)
+
+def _can_view_media(media):
+    """Unapproved media is only visible to its creator and admins"""
+    return media.is_approved or (current_user.is_authenticated and
+                                 (current_user.id == media.user_id or current_user.is_admin()))
 
 @content.route('/media/<int:id>')
+@conditional(Media, dependents=[Dependent(MediaComment.media_id, [MediaComment.is_approved == True]),
+                                Dependent(MediaRating.media_id, values=[MediaRating.rating])],
+             count_view=True)
 def media_detail(id):
     """View a specific media item"""
     media = Media.query.get_or_404(id)
     
     # If media is not approved, only allow creator or admin to view
-    if not media.is_approved and (not current_user.is_authenticated or 
-                                 (current_user.id != media.user_id and not current_user.is_admin())):
+    if not _can_view_media(media):
         abort(404)
     
     # Increment view count
@@ -590,6 +586,33 @@ def media_rate(id):
     db.session.commit()
     return redirect(url_for('content.media_detail', id=media.id))
 
+@content.route('/media/<int:id>/file')
+def media_file(id):
+    """Serve a media item's uploaded file, with byte-range support for seeking
+    
+    Images are served at the derivative named by the `size` (and optional
+    `format`) query arguments, or the original while they are being built.
+    """
+    media = Media.query.get_or_404(id)
+    if not media.file_path or not _can_view_media(media):
+        abort(404)
+    
+    filename = media.file_path
+    if request.args.get('size'):
+        filename = pick_derivative(filename, media.image_derivatives,
+                                   request.args['size'], request.args.get('format'))
+    return send_upload('media', filename)
+
+@content.route('/media/<int:id>/thumbnail')
+def media_thumbnail(id):
+    """Serve a media item's thumbnail"""
+    media = Media.query.get_or_404(id)
+    if not media.thumbnail_path or not _can_view_media(media):
+        abort(404)
+    
+    # The thumbnail is written by the image pipeline; until then, send the original
+    return send_upload('media', pick_derivative(media.file_path, media.image_derivatives, 'thumb'))
+
 @content.route('/media/upload', methods=['GET', 'POST'])
 @login_required
 def media_upload():
@@ -632,7 +655,7 @@ def media_upload():
                         media.thumbnail_path = thumbnail
                 else:
                     # For other files, just save the file
-                    filename = save_file(form.file.data, 'media')
+                    filename = save_file(form.file.data, 'media', form.media_type.data)
                     if filename:
                         media.file_path = filename
         
@@ -649,6 +672,10 @@ def media_upload():
         db.session.add(media)
         db.session.commit()
         
+        # Build the thumbnail and other resized variants in the background
+        if media.media_type == 'image':
+            image_pipeline.process(media, 'image_derivatives', 'media', media.file_path)
+        
         if media.is_approved:
             flash('Media uploaded successfully!', 'success')
         else:
@@ -658,6 +685,67 @@ def media_upload():
     
     return render_template('content/media_upload.html', form=form)
 
+def _tus_response(status=204, body='', **headers):
+    """Build a response carrying the tus protocol headers"""
+    response = current_app.response_class(body, status=status)
+    response.headers['Tus-Resumable'] = TUS_VERSION
+    response.headers['Cache-Control'] = 'no-store'
+    for name, value in headers.items():
+        response.headers[name.replace('_', '-')] = str(value)
+    return response
+
+@content.route('/media/uploads', methods=['OPTIONS', 'POST'])
+@login_required
+def media_upload_create():
+    """Start a resumable (tus) media upload"""
+    if request.method == 'OPTIONS':
+        return _tus_response(
+            Tus_Version=TUS_VERSION,
+            Tus_Extension='creation,termination',
+            Tus_Max_Size=current_app.config['MEDIA_UPLOAD_MAX_SIZE']
+        )
+    
+    try:
+        upload = create_upload(
+            current_user,
+            request.headers.get('Upload-Length', type=int),
+            parse_metadata(request.headers.get('Upload-Metadata'))
+        )
+    except UploadError as e:
+        return _tus_response(e.status, str(e))
+    
+    return _tus_response(201, Location=url_for('content.media_upload_resume', upload_id=upload.id),
+                         Upload_Offset=0)
+
+@content.route('/media/uploads/<upload_id>', methods=['HEAD', 'PATCH', 'DELETE'])
+@login_required
+def media_upload_resume(upload_id):
+    """Report, continue or abandon a resumable media upload"""
+    upload = UploadSession.query.get_or_404(upload_id)
+    if upload.user_id != current_user.id:
+        abort(404)
+    
+    if request.method == 'DELETE':
+        if upload.is_complete():
+            return _tus_response(409, 'Upload already completed')
+        delete_upload(upload)
+        return _tus_response()
+    
+    if request.method == 'PATCH':
+        if request.mimetype != 'application/offset+octet-stream':
+            return _tus_response(415, 'Content-Type must be application/offset+octet-stream')
+        try:
+            append_chunk(upload, request.headers.get('Upload-Offset', type=int), request.stream,
+                         request.content_length)
+        except UploadError as e:
+            return _tus_response(e.status, str(e))
+    
+    headers = {'Upload_Offset': upload.offset, 'Upload_Length': upload.length}
+    if upload.media_id:
+        # Where the client goes once the upload is complete
+        headers['Media_Location'] = url_for('content.media_detail', id=upload.media_id)
+    return _tus_response(200 if request.method == 'HEAD' else 204, **headers)
+
 @content.route('/media/collections')
 def media_collections():
     """List public media collections"""
@@ -666,6 +754,7 @@ def media_collections():
     
     collections = MediaCollection.query.filter_by(is_public=True)\
         .order_by(MediaCollection.created_at.desc()).paginate(page=page, per_page=per_page)
+    annotate_counts(collections.items, 'items')
     
     return render_template('content/collections_list.html', collections=collections)
 
@@ -7,11 +7,15 @@ from app.models.volunteer import Volunteer
 from app.forms import ContactForm, SearchForm
 from app import db
 from app.utils import send_email
+from app.search import SEARCH_MODELS, search as search_index
+from app.counters import get_platform_counters
+from app.page_cache import cache_page
 import os
 
 main = Blueprint('main', __name__)
 
 @main.route('/')
+@cache_page('articles', 'media', 'schools', 'volunteers')
 def index():
     """Homepage route"""
     # Get featured articles
@@ -25,25 +29,16 @@ def index():
         featured=True
     ).order_by(Media.created_at.desc()).limit(4).all()
     
-    # Get school count
-    school_count = School.query.count()
-    
-    # Get volunteer count
-    volunteer_count = Volunteer.query.count()
-    
-    # Get article count
-    article_count = Article.query.filter_by(is_published=True).count()
-    
-    # Get media count
-    media_count = Media.query.filter_by(is_approved=True).count()
+    # Get school, volunteer, article and media counts in a single lookup
+    counters = get_platform_counters()
     
     return render_template('index.html', 
                            featured_articles=featured_articles,
                            featured_media=featured_media,
-                           school_count=school_count,
-                           volunteer_count=volunteer_count,
-                           article_count=article_count,
-                           media_count=media_count)
+                           school_count=counters['schools'],
+                           volunteer_count=counters['volunteers'],
+                           article_count=counters['published_articles'],
+                           media_count=counters['approved_media'])
 
 @main.route('/about')
 def about():
@@ -67,6 +62,7 @@ def contact():
                 text_body=body,
                 html_body=f"<p>From: {form.name.data} &lt;{form.email.data}&gt;</p><p>{form.message.data}</p>"
             )
+            db.session.commit()
             flash('Your message has been sent. Thank you!', 'success')
             return redirect(url_for('main.contact'))
         except Exception as e:
@@ -85,28 +81,11 @@ def search():
         query = form.query.data
         category = form.category.data
         
-        # Search in articles
-        if category in ['all', 'articles']:
-            articles = Article.query.filter(
-                Article.is_published == True,
-                (Article.title.ilike(f'%{query}%') | Article.content.ilike(f'%{query}%'))
-            ).all()
-            results['articles'] = articles
-        
-        # Search in schools
-        if category in ['all', 'schools']:
-            schools = School.query.filter(
-                School.name.ilike(f'%{query}%') | School.description.ilike(f'%{query}%')
-            ).all()
-            results['schools'] = schools
-        
-        # Search in media
-        if category in ['all', 'media']:
-            media = Media.query.filter(
-                Media.is_approved == True,
-                (Media.title.ilike(f'%{query}%') | Media.description.ilike(f'%{query}%'))
-            ).all()
-            results['media'] = media
+        # Each category is paginated independently (?articles_page=2&media_page=3)
+        for entity_type in SEARCH_MODELS:
+            if category in ['all', entity_type]:
+                page = request.args.get(f'{entity_type}_page', 1, type=int)
+                results[entity_type] = search_index(query, entity_type, page=page)
     
     return render_template('search_results.html', form=form, results=results, query=form.query.data)
 
@@ -1,11 +1,18 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, abort
 from flask_login import login_required, current_user
 from app.models.school import School, Activity
-from app.models.report import Report
+from app.models.report import Report, ReportAttachment
 from app.models.user import User
 from app.forms import SchoolForm, ActivityForm, ReportForm
 from app import db
-from app.utils import save_file, allowed_file, export_to_csv
+from app.utils import save_file, allowed_file
+from app.exports import csv_response
+from app.images import image_pipeline, remove_image
+from app.serving import send_upload
+from app.annotations import annotate_counts
+from app.pagination import paginate_listing
+from app.page_cache import cache_page
+from app.conditional import Dependent, conditional
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime
@@ -19,10 +26,13 @@ def schools_list():
     per_page = current_app.config['PAGINATION_PER_PAGE']
     
     schools = School.query.order_by(School.name).paginate(page=page, per_page=per_page)
+    annotate_counts(schools.items, 'volunteers', 'activities', 'reports')
     
     return render_template('schools/list.html', schools=schools)
 
 @schools.route('/schools/<int:id>')
+@cache_page()
+@conditional(School, dependents=[Dependent(Activity.school_id)])
 def school_detail(id):
     """Show school details"""
     school = School.query.get_or_404(id)
@@ -57,13 +67,16 @@ def school_create():
         
         # Handle logo upload
         if form.logo.data:
-            logo_filename = save_file(form.logo.data, 'schools')
+            logo_filename = save_file(form.logo.data, 'schools', 'image')
             if logo_filename:
                 school.logo = logo_filename
         
         db.session.add(school)
         db.session.commit()
         
+        # Build the logo's resized variants in the background
+        image_pipeline.process(school, 'logo_derivatives', 'schools', school.logo)
+        
         flash('School created successfully!', 'success')
         return redirect(url_for('school.school_detail', id=school.id))
     
@@ -92,19 +105,22 @@ def school_edit(id):
         school.student_count = form.student_count.data
         
         # Handle logo upload
+        new_logo = None
         if form.logo.data:
-            logo_filename = save_file(form.logo.data, 'schools')
-            if logo_filename:
-                # Delete old logo if exists
+            new_logo = save_file(form.logo.data, 'schools', 'image')
+            if new_logo:
+                # Delete old logo and its variants if they exist
                 if school.logo:
-                    old_logo_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'schools', school.logo)
-                    if os.path.exists(old_logo_path):
-                        os.remove(old_logo_path)
+                    remove_image('schools', school.logo, school.logo_derivatives)
                 
-                school.logo = logo_filename
+                school.logo = new_logo
+                school.logo_derivatives = None
         
         db.session.commit()
         
+        if new_logo:
+            image_pipeline.process(school, 'logo_derivatives', 'schools', new_logo)
+        
         flash('School updated successfully!', 'success')
         return redirect(url_for('school.school_detail', id=school.id))
     
@@ -201,11 +217,10 @@ def school_reports(id):
         flash('You do not have permission to view reports for this school.', 'danger')
         return redirect(url_for('school.school_detail', id=school.id))
     
-    page = request.args.get('page', 1, type=int)
     per_page = current_app.config['PAGINATION_PER_PAGE']
     
-    reports = Report.query.filter_by(school_id=school.id)\
-        .order_by(Report.created_at.desc()).paginate(page=page, per_page=per_page)
+    reports = paginate_listing(Report.query.filter_by(school_id=school.id),
+                               [(Report.created_at, True), (Report.id, True)], per_page)
     
     return render_template('schools/reports.html', school=school, reports=reports)
 
@@ -274,6 +289,21 @@ def report_detail(id):
     
     return render_template('schools/report_detail.html', report=report, school=school)
 
+@schools.route('/reports/attachments/<int:id>')
+@login_required
+def report_attachment(id):
+    """Serve a report attachment to the users allowed to view the report"""
+    attachment = ReportAttachment.query.get_or_404(id)
+    report = Report.query.get_or_404(attachment.report_id)
+    
+    # Same audience as report_detail
+    if not (current_user.is_admin() or report.submitted_by == current_user.id or
+            (current_user.is_school_coordinator() and current_user.school_id == report.school_id)):
+        abort(404)
+    
+    return send_upload('reports', attachment.file_path,
+                       download_name=os.path.basename(attachment.file_path))
+
 @schools.route('/schools/export')
 @login_required
 def schools_export():
@@ -282,35 +312,7 @@ def schools_export():
         flash('You do not have permission to export schools.', 'danger')
         return redirect(url_for('schools.schools_list'))
     
-    schools = School.query.all()
-    
-    # Prepare data for CSV
-    data = []
-    headers = ['ID', 'Name', 'Location', 'Address', 'Phone', 'Email', 'Website', 'Student Count']
-    
-    for school in schools:
-        data.append([
-            school.id,
-            school.name,
-            school.location,
-            school.address,
-            school.phone,
-            school.email,
-            school.website,
-            school.student_count
-        ])
-    
-    # Generate CSV
-    csv_data = export_to_csv(headers, data)
-    
-    # Create response
-    response = current_app.response_class(
-        csv_data,
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment;filename=schools_{datetime.now().strftime("%Y%m%d")}.csv'}
-    )
-    
-    return response
+    return csv_response('schools')
 
 @schools.route('/schools/<int:id>/coordinators')
 @login_required
@@ -4,7 +4,9 @@ from app.models.volunteer import Volunteer, Contribution
 from app.models.school import School
 from app.forms import VolunteerForm
 from app import db
-from app.utils import send_volunteer_thank_you_email, export_to_csv
+from app.utils import send_volunteer_thank_you_email
+from app.exports import csv_response
+from app.pagination import paginate_listing
 from datetime import datetime
 
 volunteers = Blueprint('volunteer', __name__)
@@ -16,10 +18,10 @@ def volunteers_list():
         flash('You do not have permission to view all volunteers.', 'danger')
         return redirect(url_for('main.index'))
     
-    page = request.args.get('page', 1, type=int)
     per_page = current_app.config['PAGINATION_PER_PAGE']
     
-    volunteers = Volunteer.query.order_by(Volunteer.created_at.desc()).paginate(page=page, per_page=per_page)
+    volunteers = paginate_listing(Volunteer.query, [(Volunteer.registration_date, True), (Volunteer.id, True)],
+                                  per_page)
     
     return render_template('volunteers/list.html', volunteers=volunteers)
 
@@ -76,6 +78,7 @@ def volunteer_register():
         # Send thank you email
         try:
             send_volunteer_thank_you_email(volunteer)
+            db.session.commit()
             flash('Thank you for registering as a volunteer! Check your email for confirmation.', 'success')
         except Exception as e:
             current_app.logger.error(f"Error sending thank you email: {str(e)}")
@@ -187,37 +190,7 @@ def export_volunteers():
     if status:
         query = query.filter_by(status=status)
     
-    volunteers = query.all()
-    
-    # Prepare data for CSV
-    data = []
-    headers = ['ID', 'Name', 'Email', 'Phone', 'School', 'Grade', 'Skills', 'Status', 'Registered On']
-    
-    for v in volunteers:
-        school_name = v.school.name if v.school else 'N/A'
-        data.append([
-            v.id,
-            v.name,
-            v.email,
-            v.phone,
-            school_name,
-            v.grade,
-            v.skills,
-            v.status,
-            v.created_at.strftime('%Y-%m-%d')
-        ])
-    
-    # Generate CSV
-    csv_data = export_to_csv(headers, data)
-    
-    # Create response
-    response = current_app.response_class(
-        csv_data,
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment;filename=volunteers_{datetime.now().strftime("%Y%m%d")}.csv'}
-    )
-    
-    return response
+    return csv_response('volunteers', query)
 
 @volunteers.route('/volunteers/<int:id>/add-contribution', methods=['POST'])
 @login_required
@@ -0,0 +1,412 @@
+import math
+import re
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, Integer, String, event, text
+from app import db
+from app.models.article import Article
+from app.models.media import Media
+from app.models.school import School
+
+# Arabic normalization
+_TASHKEEL = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]')
+_TATWEEL = '\u0640'
+_LETTER_MAP = str.maketrans({
+    '\u0622': '\u0627',  # alef with madda -> alef
+    '\u0623': '\u0627',  # alef with hamza above -> alef
+    '\u0625': '\u0627',  # alef with hamza below -> alef
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0624': '\u0648',  # waw with hamza -> waw
+    '\u0626': '\u064a',  # yeh with hamza -> yeh
+    '\u0649': '\u064a',  # alef maqsura -> yeh
+    '\u0629': '\u0647',  # taa marbuta -> heh
+})
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+_DEFINITE_ARTICLE = '\u0627\u0644'
+
+# Words shown around the first match in a result snippet
+SNIPPET_WORDS = 16
+
+# Entity types held in the index, mapped to their models
+SEARCH_MODELS = {
+    'articles': Article,
+    'schools': School,
+    'media': Media,
+}
+
+
+def _normalize_char(char):
+    if char == _TATWEEL or _TASHKEEL.match(char):
+        return ''
+    return char.translate(_LETTER_MAP).lower()
+
+
+def normalize_arabic(value):
+    """Normalize Arabic text for indexing and querying.
+
+    Strips tashkeel and tatweel and folds alef/hamza variants, alef maqsura
+    and taa marbuta to a single form so that spelling variants match.
+
+    Args:
+        value: The text to normalize
+
+    Returns:
+        The normalized, lower-cased text
+    """
+    if not value:
+        return ''
+    value = _TASHKEEL.sub('', value).replace(_TATWEEL, '')
+    return value.translate(_LETTER_MAP).lower()
+
+
+def _normalize_with_offsets(value):
+    """normalize_arabic, plus the position in value of each normalized character."""
+    normalized, offsets = [], []
+    for position, char in enumerate(value):
+        for folded in _normalize_char(char):
+            normalized.append(folded)
+            offsets.append(position)
+    return ''.join(normalized), offsets
+
+
+def _document_for(target):
+    """Return (entity_type, title, body) for an indexable object, or None if hidden."""
+    if isinstance(target, Article):
+        if not target.is_published:
+            return None
+        body = ' '.join(filter(None, [target.summary, target.content]))
+        return 'articles', target.title, body
+    if isinstance(target, School):
+        body = ' '.join(filter(None, [target.location, target.address]))
+        return 'schools', target.name, body
+    if isinstance(target, Media):
+        if not target.is_approved:
+            return None
+        body = ' '.join(filter(None, [target.description, target.tags]))
+        return 'media', target.title, body
+    return None
+
+
+def _entity_type_for(target):
+    for entity_type, model in SEARCH_MODELS.items():
+        if isinstance(target, model):
+            return entity_type
+    return None
+
+
+# Index storage: title and body hold the normalized text that is matched;
+# display_title and display_body the text as written, for snippets
+_SQLITE_CREATE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "entity_type UNINDEXED, entity_id UNINDEXED, title, body, "
+    "display_title UNINDEXED, display_body UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+_POSTGRES_CREATE = (
+    "CREATE TABLE IF NOT EXISTS search_index ("
+    "entity_type VARCHAR(20) NOT NULL, "
+    "entity_id INTEGER NOT NULL, "
+    "title TEXT, "
+    "body TEXT, "
+    "display_title TEXT, "
+    "display_body TEXT, "
+    "document TSVECTOR GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(body, '')), 'B')) STORED, "
+    "PRIMARY KEY (entity_type, entity_id))"
+)
+_POSTGRES_CREATE_GIN = (
+    "CREATE INDEX IF NOT EXISTS ix_search_index_document "
+    "ON search_index USING GIN (document)"
+)
+
+event.listen(db.metadata, 'after_create', DDL(_SQLITE_CREATE).execute_if(dialect='sqlite'))
+event.listen(db.metadata, 'after_create', DDL(_POSTGRES_CREATE).execute_if(dialect='postgresql'))
+event.listen(db.metadata, 'after_create', DDL(_POSTGRES_CREATE_GIN).execute_if(dialect='postgresql'))
+event.listen(db.metadata, 'after_drop', DDL('DROP TABLE IF EXISTS search_index'))
+
+
+def create_index_table(connection, replace=False):
+    """Create the search index table for the connection's dialect if it is missing.
+
+    Args:
+        connection: The connection to create it on
+        replace: Drop an existing table first (e.g. one from an older layout)
+    """
+    if replace:
+        connection.execute(text('DROP TABLE IF EXISTS search_index'))
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(_SQLITE_CREATE))
+    elif connection.dialect.name == 'postgresql':
+        connection.execute(text(_POSTGRES_CREATE))
+        connection.execute(text(_POSTGRES_CREATE_GIN))
+
+
+def _remove(connection, entity_type, entity_id):
+    connection.execute(
+        text('DELETE FROM search_index WHERE entity_type = :entity_type AND entity_id = :entity_id'),
+        {'entity_type': entity_type, 'entity_id': entity_id}
+    )
+
+
+def index_object(connection, target):
+    """Add, refresh or remove a single object in the search index.
+
+    Objects that are not publicly visible (unpublished articles, unapproved
+    media) are removed from the index.
+    """
+    entity_type = _entity_type_for(target)
+    if entity_type is None or connection.dialect.name not in ('sqlite', 'postgresql'):
+        return
+
+    _remove(connection, entity_type, target.id)
+    document = _document_for(target)
+    if document is None:
+        return
+
+    _, title, body = document
+    connection.execute(
+        text('INSERT INTO search_index (entity_type, entity_id, title, body, display_title, display_body) '
+             'VALUES (:entity_type, :entity_id, :title, :body, :display_title, :display_body)'),
+        {
+            'entity_type': entity_type,
+            'entity_id': target.id,
+            'title': normalize_arabic(title),
+            'body': normalize_arabic(body),
+            'display_title': title,
+            'display_body': body,
+        }
+    )
+
+
+def rebuild_index():
+    """Rebuild the whole search index from the source tables.
+
+    The table is recreated, so an index from an older layout is upgraded.
+
+    Returns:
+        A dict of entity type to number of indexed rows
+    """
+    counts = {}
+    connection = db.session.connection()
+    create_index_table(connection, replace=True)
+    for entity_type, model in SEARCH_MODELS.items():
+        counts[entity_type] = 0
+        for obj in model.query.yield_per(500):
+            index_object(connection, obj)
+            if _document_for(obj) is not None:
+                counts[entity_type] += 1
+    db.session.commit()
+    return counts
+
+
+def _on_save(mapper, connection, target):
+    index_object(connection, target)
+
+
+def _on_delete(mapper, connection, target):
+    if connection.dialect.name in ('sqlite', 'postgresql'):
+        _remove(connection, _entity_type_for(target), target.id)
+
+
+for _model in SEARCH_MODELS.values():
+    event.listen(_model, 'after_insert', _on_save)
+    event.listen(_model, 'after_update', _on_save)
+    event.listen(_model, 'after_delete', _on_delete)
+
+
+# Querying
+class SearchPage:
+    """A page of search results for one category.
+
+    Mirrors the attributes of Flask-SQLAlchemy's Pagination so templates can
+    render it with the same pagination macros.
+    """
+
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self):
+        if self.total == 0:
+            return 0
+        return int(math.ceil(self.total / float(self.per_page)))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=4, right_edge=2):
+        last = 0
+        for num in range(1, self.pages + 1):
+            if (num <= left_edge
+                    or self.page - left_current - 1 < num < self.page + right_current
+                    or num > self.pages - right_edge):
+                if last + 1 != num:
+                    yield None
+                yield num
+                last = num
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _term_variants(term):
+    # Match words with and without the definite article, e.g. "مدرسه" and "المدرسه"
+    base = term[2:] if term.startswith(_DEFINITE_ARTICLE) and len(term) > 4 else term
+    return [base, _DEFINITE_ARTICLE + base]
+
+
+def _fts5_query(terms):
+    # Quote every variant and allow prefix matches; terms are implicitly ANDed
+    return ' '.join(
+        '(' + ' OR '.join('"{}"*'.format(variant) for variant in _term_variants(term)) + ')'
+        for term in terms
+    )
+
+
+def _tsquery(terms):
+    return ' & '.join(
+        '(' + ' | '.join('{}:*'.format(variant) for variant in _term_variants(term)) + ')'
+        for term in terms
+    )
+
+
+def _snippet(value, terms, words=SNIPPET_WORDS):
+    """Highlight the matched words of a text as written, around the first match.
+
+    Words are matched on their normalized form, as the index matches them,
+    so a query for "مدرسه" highlights "مَدْرَسَة" in the original text.
+
+    Returns:
+        Markup with matches wrapped in <mark>, or None if nothing matches
+    """
+    if not value:
+        return None
+    normalized, offsets = _normalize_with_offsets(value)
+    tokens = list(_TOKEN.finditer(normalized))
+    variants = tuple(variant for term in terms for variant in _term_variants(term))
+    matched = [token.group().startswith(variants) for token in tokens]
+    if not any(matched):
+        return None
+
+    first = matched.index(True)
+    start = max(0, min(first - words // 4, len(tokens) - words))
+    window = range(start, min(start + words, len(tokens)))
+
+    def span(index):
+        # Through any marks the normalization dropped after the word
+        token = tokens[index]
+        end = offsets[token.end() - 1] + 1
+        while end < len(value) and not _normalize_char(value[end]):
+            end += 1
+        return offsets[token.start()], end
+
+    parts = ['…' if start > 0 else '']
+    position = span(window[0])[0] if start > 0 else 0
+    for index in window:
+        begin, end = span(index)
+        parts.append(str(escape(value[position:begin])))
+        word = str(escape(value[begin:end]))
+        parts.append(f'<mark>{word}</mark>' if matched[index] else word)
+        position = end
+    parts.append('…' if window[-1] < len(tokens) - 1 else str(escape(value[position:])))
+    return Markup(''.join(parts))
+
+
+# The queries below are declared as textual SELECTs (.columns()) so that,
+# like the ORM queries loading the results, they are read from the replica
+def _query_sqlite(entity_type, terms, limit, offset):
+    params = {'entity_type': entity_type, 'query': _fts5_query(terms)}
+    total = db.session.execute(
+        text('SELECT count(*) FROM search_index '
+             'WHERE search_index MATCH :query AND entity_type = :entity_type').columns(),
+        params
+    ).scalar()
+    rows = db.session.execute(
+        text("SELECT entity_id, display_title, display_body "
+             "FROM search_index "
+             "WHERE search_index MATCH :query AND entity_type = :entity_type "
+             "ORDER BY bm25(search_index, 0.0, 0.0, 10.0, 1.0, 0.0, 0.0) "
+             "LIMIT :limit OFFSET :offset").columns(entity_id=Integer, display_title=String, display_body=String),
+        dict(params, limit=limit, offset=offset)
+    ).all()
+    return total, rows
+
+
+def _query_postgres(entity_type, terms, limit, offset):
+    params = {'entity_type': entity_type, 'query': _tsquery(terms)}
+    total = db.session.execute(
+        text("SELECT count(*) FROM search_index "
+             "WHERE entity_type = :entity_type "
+             "AND document @@ to_tsquery('simple', :query)").columns(),
+        params
+    ).scalar()
+    rows = db.session.execute(
+        text("SELECT entity_id, display_title, display_body "
+             "FROM search_index, to_tsquery('simple', :query) AS q "
+             "WHERE entity_type = :entity_type AND document @@ q "
+             "ORDER BY ts_rank(document, q) DESC "
+             "LIMIT :limit OFFSET :offset").columns(entity_id=Integer, display_title=String, display_body=String),
+        dict(params, limit=limit, offset=offset)
+    ).all()
+    return total, rows
+
+
+def search(query, entity_type, page=1, per_page=None):
+    """Search one category of the index.
+
+    Args:
+        query: The raw search string entered by the user
+        entity_type: One of 'articles', 'schools' or 'media'
+        page: The 1-based page number
+        per_page: Results per page (defaults to SEARCH_RESULTS_PER_PAGE)
+
+    Returns:
+        A SearchPage of model instances, ranked by relevance, each carrying a
+        `search_snippet` attribute with highlighted matches
+    """
+    per_page = per_page or current_app.config.get('SEARCH_RESULTS_PER_PAGE', 10)
+    page = max(page, 1)
+    terms = _TOKEN.findall(normalize_arabic(query))
+    if not terms:
+        return SearchPage([], page, per_page, 0)
+
+    offset = (page - 1) * per_page
+    if db.engine.dialect.name == 'postgresql':
+        total, rows = _query_postgres(entity_type, terms, per_page, offset)
+    else:
+        total, rows = _query_sqlite(entity_type, terms, per_page, offset)
+
+    # Load the page's objects in a single query and keep the ranked order
+    model = SEARCH_MODELS[entity_type]
+    ids = [row.entity_id for row in rows]
+    objects = {obj.id: obj for obj in model.query.filter(model.id.in_(ids)).all()} if ids else {}
+
+    items = []
+    for row in rows:
+        obj = objects.get(row.entity_id)
+        if obj is not None:
+            obj.search_snippet = (_snippet(row.display_body, terms) or _snippet(row.display_title, terms)
+                                  or Markup(''))
+            items.append(obj)
+
+    return SearchPage(items, page, per_page, total)
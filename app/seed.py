@@ -0,0 +1,600 @@
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models.article import (Article, ArticleComment, Quiz, QuizAnswer, QuizAttempt, QuizChoice,
+                                QuizQuestion)
+from app.models.media import Media, MediaComment, MediaRating
+from app.models.report import Report, ReportMetric
+from app.models.school import Activity, School
+from app.models.user import Notification, User
+from app.models.volunteer import Volunteer
+
+# Row counts at --scale 1; every count is multiplied by the scale
+DEFAULT_COUNTS = {
+    'schools': 200,
+    'users': 2000,
+    'volunteers': 10000,
+    'activities': 1000,
+    'articles': 1000,
+    'article_comments': 5000,
+    'quizzes': 100,
+    'quiz_attempts': 5000,
+    'media': 5000,
+    'media_ratings': 20000,
+    'media_comments': 10000,
+    'reports': 2000,
+    'notifications': 20000,
+}
+
+QUESTIONS_PER_QUIZ = 10
+CHOICES_PER_QUESTION = 4
+METRICS_PER_REPORT = 3
+
+FIRST_NAMES = (
+    'محمد', 'أحمد', 'محمود', 'مصطفى', 'علي', 'عمر', 'يوسف', 'خالد', 'حسن', 'حسين', 'إبراهيم', 'عبدالله',
+    'كريم', 'طارق', 'ياسر', 'هشام', 'شريف', 'أيمن', 'سامح', 'وليد', 'فاطمة', 'مريم', 'نور', 'سارة',
+    'هدى', 'منى', 'ياسمين', 'آية', 'رحمة', 'سلمى', 'دينا', 'ريم', 'هبة', 'شيماء', 'أسماء', 'إيمان',
+)
+FAMILY_NAMES = (
+    'عبدالرحمن', 'السيد', 'إبراهيم', 'حسن', 'عبدالعزيز', 'المصري', 'الشافعي', 'سليمان', 'منصور',
+    'عثمان', 'فؤاد', 'رمضان', 'عبدالحميد', 'الشناوي', 'النجار', 'الجمال', 'البنا', 'زكي', 'فهمي',
+    'حافظ', 'شاهين', 'عيسى', 'بدوي', 'الحسيني',
+)
+GOVERNORATES = (
+    'القاهرة', 'الجيزة', 'الإسكندرية', 'الدقهلية', 'الشرقية', 'القليوبية', 'المنوفية', 'الغربية',
+    'البحيرة', 'كفر الشيخ', 'دمياط', 'بورسعيد', 'الإسماعيلية', 'السويس', 'الفيوم', 'بني سويف',
+    'المنيا', 'أسيوط', 'سوهاج', 'قنا', 'الأقصر', 'أسوان', 'البحر الأحمر', 'مطروح', 'شمال سيناء',
+    'جنوب سيناء', 'الوادي الجديد',
+)
+SCHOOL_NAMES = (
+    'النور', 'الأمل', 'الفجر', 'النهضة', 'الحرية', 'السلام', 'الرواد', 'المستقبل', 'طه حسين',
+    'أحمد شوقي', 'جمال عبدالناصر', 'الشهيد', 'التحرير', 'العروبة', 'الزهراء', 'الإيمان',
+)
+SCHOOL_STAGES = ('الابتدائية', 'الإعدادية', 'الثانوية', 'الرسمية للغات', 'التجريبية')
+STREETS = ('شارع النيل', 'شارع الجمهورية', 'شارع الثورة', 'شارع المدارس', 'شارع الجلاء', 'شارع السوق')
+TOPICS = (
+    'الأهرامات', 'نهر النيل', 'معبد الكرنك', 'قلعة صلاح الدين', 'مكتبة الإسكندرية', 'واحة سيوة',
+    'الحضارة الفرعونية', 'القاهرة الفاطمية', 'قناة السويس', 'السد العالي', 'البحر الأحمر',
+    'الأزهر الشريف', 'وادي الملوك', 'أبو سمبل', 'دير سانت كاترين', 'الصحراء البيضاء',
+)
+TITLE_TEMPLATES = ('تعرف على {}', 'رحلة إلى {}', 'تاريخ {}', 'أسرار {}', '{} كما لم تره من قبل', 'زيارة مدرسية إلى {}')
+SENTENCES = (
+    'تعد مصر من أقدم الحضارات في العالم.',
+    'زار طلاب المدرسة الموقع ضمن رحلة تعليمية.',
+    'يحرص المعلمون على ربط الدروس بالتاريخ المحلي.',
+    'شارك المتطوعون في تنظيم النشاط وإعداد العروض.',
+    'يجذب المكان آلاف الزوار من داخل مصر وخارجها كل عام.',
+    'تعلم الطلاب الكثير عن التراث والثقافة المصرية.',
+    'قدمت الطالبات عرضا تقديميا عن أهمية الحفاظ على الآثار.',
+    'يساعد التعلم بالممارسة على ترسيخ المعلومات لدى الطلاب.',
+)
+COMMENTS = ('موضوع رائع، شكرا لكم', 'معلومات مفيدة جدا', 'أتمنى زيارة هذا المكان', 'عمل ممتاز من الطلاب',
+            'أحسنتم', 'هل يمكن إضافة المزيد من الصور؟', 'استفدت كثيرا من هذا المحتوى')
+SKILLS = ('teaching', 'art', 'music', 'sports', 'technology', 'writing', 'organization', 'leadership')
+GRADES = ('primary_1', 'primary_2', 'primary_3', 'primary_4', 'primary_5', 'primary_6', 'prep_1', 'prep_2',
+          'prep_3', 'secondary_1', 'secondary_2', 'secondary_3', 'graduate', 'teacher', 'other')
+ARTICLE_CATEGORIES = ('education', 'culture', 'history', 'tourism', 'other')
+QUIZ_CATEGORIES = ('general', 'history', 'geography', 'culture', 'other')
+MEDIA_TYPES = ('image', 'image', 'image', 'video', 'document', 'audio')
+MEDIA_EXTENSIONS = {'image': 'jpg', 'video': 'mp4', 'document': 'pdf', 'audio': 'mp3'}
+ACTIVITY_STATUSES = ('planned', 'in_progress', 'completed', 'cancelled')
+REPORT_TYPES = ('activity', 'event', 'progress', 'issue')
+REPORT_STATUSES = ('submitted', 'reviewed', 'approved', 'rejected')
+REPORT_METRICS = (('عدد المشاركين', 'people'), ('نسبة الحضور', '%'), ('ساعات التطوع', 'hours'),
+                  ('عدد الأنشطة', None))
+NOTIFICATION_CATEGORIES = ('info', 'success', 'warning')
+# Star ratings skew positive, like real ratings do
+RATING_WEIGHTS = (5, 7, 18, 35, 35)
+
+
+def scaled_counts(scale=1.0, **overrides):
+    """DEFAULT_COUNTS multiplied by scale, with explicit counts taking precedence.
+
+    Every table is given at least one row, since rows of the other tables
+    reference them.
+
+    Raises:
+        ValueError: If an override is less than 1
+    """
+    counts = {name: max(int(count * scale), 1) for name, count in DEFAULT_COUNTS.items()}
+    for name, count in overrides.items():
+        if count is not None and count < 1:
+            raise ValueError(f'At least one {name} row is needed, got {count}')
+    counts.update({name: count for name, count in overrides.items() if count is not None})
+    return counts
+
+
+class Seeder:
+    """Generate synthetic data with batched Core executemany INSERTs.
+
+    Rows are produced lazily and written batch_size at a time, so memory
+    stays flat however many rows are requested. Ids are assigned here,
+    continuing after the highest existing id of each table, so child rows
+    can reference their parents without reading them back (on PostgreSQL
+    the id sequences are moved past them afterwards). ORM events do
+    not fire for Core inserts; the derived data they maintain (counters,
+    unread counts, rating aggregates, search index) is rebuilt afterwards
+    by the reconcile functions.
+
+    Args:
+        counts: Rows to generate per table, as returned by scaled_counts
+        batch_size: Rows per executemany
+        seed: Random seed, for reproducible data
+        password: Password shared by every generated user
+        progress: Called with (table name, rows inserted, seconds) after each table
+    """
+
+    def __init__(self, counts, batch_size=10000, seed=None, password='password', progress=None):
+        self.counts = counts
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        # Hashing is deliberately slow, so every user shares one hash
+        self.password_hash = generate_password_hash(password)
+        self.progress = progress
+        self.now = datetime.utcnow()
+        self.ids = {}
+
+    # Helpers
+
+    def _first_id(self, model):
+        # Read on its own connection: an open session transaction would block the inserts on SQLite
+        with db.engine.connect() as connection:
+            return (connection.scalar(select(func.max(model.id))) or 0) + 1
+
+    def _insert(self, model, rows):
+        """Insert generated rows in batches in one transaction per table."""
+        table = model.__table__
+        started = time.perf_counter()
+        inserted = 0
+        with db.engine.begin() as connection:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    connection.execute(table.insert(), batch)
+                    inserted += len(batch)
+                    batch = []
+            if batch:
+                connection.execute(table.insert(), batch)
+                inserted += len(batch)
+        if self.progress:
+            self.progress(table.name, inserted, time.perf_counter() - started)
+        return inserted
+
+    def _insert_with_children(self, model, child_model, groups):
+        """Insert (row, child rows) groups, writing each batch of parents with its children."""
+        table, child_table = model.__table__, child_model.__table__
+        started = time.perf_counter()
+        inserted = children_inserted = 0
+        with db.engine.begin() as connection:
+            batch, child_batch = [], []
+            for row, child_rows in groups:
+                batch.append(row)
+                child_batch.extend(child_rows)
+                if len(batch) >= self.batch_size:
+                    connection.execute(table.insert(), batch)
+                    connection.execute(child_table.insert(), child_batch)
+                    inserted += len(batch)
+                    children_inserted += len(child_batch)
+                    batch, child_batch = [], []
+            if batch:
+                connection.execute(table.insert(), batch)
+                inserted += len(batch)
+            if child_batch:
+                connection.execute(child_table.insert(), child_batch)
+                children_inserted += len(child_batch)
+        if self.progress:
+            elapsed = time.perf_counter() - started
+            self.progress(table.name, inserted, elapsed)
+            self.progress(child_table.name, children_inserted, elapsed)
+        return inserted + children_inserted
+
+    def _ids(self, model, count):
+        """Reserve a contiguous id range for count new rows of model."""
+        first = self._first_id(model)
+        self.ids[model.__tablename__] = range(first, first + count)
+        return self.ids[model.__tablename__]
+
+    def _pick_id(self, tablename):
+        ids = self.ids[tablename]
+        return ids[self.random.randrange(len(ids))] if ids else None
+
+    def _past(self, days=730):
+        return self.now - timedelta(seconds=self.random.randrange(days * 86400))
+
+    def _person(self):
+        return f'{self.random.choice(FIRST_NAMES)} {self.random.choice(FIRST_NAMES)} {self.random.choice(FAMILY_NAMES)}'
+
+    def _paragraphs(self, sentences):
+        return ' '.join(self.random.choice(SENTENCES) for _ in range(sentences))
+
+    def _title(self):
+        return self.random.choice(TITLE_TEMPLATES).format(self.random.choice(TOPICS))
+
+    # Tables, in dependency order
+
+    def seed_schools(self):
+        def rows():
+            for school_id in self._ids(School, self.counts['schools']):
+                created_at = self._past()
+                yield {
+                    'id': school_id,
+                    'name': f'مدرسة {self.random.choice(SCHOOL_NAMES)} {self.random.choice(SCHOOL_STAGES)}',
+                    'location': self.random.choice(GOVERNORATES),
+                    'address': f'{self.random.randrange(1, 200)} {self.random.choice(STREETS)}',
+                    'student_count': self.random.randrange(150, 2500),
+                    'phone': f'01{self.random.randrange(100000000, 299999999)}',
+                    'email': f'school{school_id}@seed.e3rafbaladak.com',
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'is_active': self.random.random() < 0.95,
+                }
+        return self._insert(School, rows())
+
+    def seed_volunteers(self):
+        def rows():
+            for volunteer_id in self._ids(Volunteer, self.counts['volunteers']):
+                yield {
+                    'id': volunteer_id,
+                    'name': self._person(),
+                    'email': f'volunteer{volunteer_id}@seed.e3rafbaladak.com',
+                    'phone': f'01{self.random.randrange(100000000, 299999999)}',
+                    'school_id': self._pick_id('schools'),
+                    'skills': self.random.choice(SKILLS),
+                    'other_skills': None,
+                    'grade': self.random.choice(GRADES),
+                    'registration_date': self._past(),
+                    'is_active': self.random.random() < 0.9,
+                    'email_confirmed': self.random.random() < 0.8,
+                    'confirmation_token': None,
+                }
+        return self._insert(Volunteer, rows())
+
+    def seed_users(self):
+        volunteer_ids = self.ids['volunteers']
+
+        def rows():
+            for user_id in self._ids(User, self.counts['users']):
+                roll = self.random.random()
+                school_id = volunteer_id = None
+                if roll < 0.01:
+                    role = 'admin'
+                elif roll < 0.06:
+                    role, school_id = 'school_coordinator', self._pick_id('schools')
+                elif roll < 0.36 and volunteer_ids:
+                    role, volunteer_id = 'volunteer', self._pick_id('volunteers')
+                else:
+                    role = 'visitor'
+                created_at = self._past()
+                yield {
+                    'id': user_id,
+                    'name': self._person(),
+                    'email': f'user{user_id}@seed.e3rafbaladak.com',
+                    'password_hash': self.password_hash,
+                    'role': role,
+                    'is_active': True,
+                    'created_at': created_at,
+                    'last_login': created_at + timedelta(days=self.random.randrange(60)),
+                    'unread_notification_count': 0,
+                    'school_id': school_id,
+                    'volunteer_id': volunteer_id,
+                }
+        return self._insert(User, rows())
+
+    def seed_activities(self):
+        def rows():
+            for activity_id in self._ids(Activity, self.counts['activities']):
+                created_at = self._past()
+                yield {
+                    'id': activity_id,
+                    'title': f'زيارة إلى {self.random.choice(TOPICS)}',
+                    'description': self._paragraphs(3),
+                    'date': created_at + timedelta(days=self.random.randrange(1, 90)),
+                    'location': self.random.choice(GOVERNORATES),
+                    'participants_count': self.random.randrange(10, 200),
+                    'school_id': self._pick_id('schools'),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'status': self.random.choice(ACTIVITY_STATUSES),
+                }
+        return self._insert(Activity, rows())
+
+    def seed_articles(self):
+        def rows():
+            for article_id in self._ids(Article, self.counts['articles']):
+                created_at = self._past()
+                is_published = self.random.random() < 0.85
+                yield {
+                    'id': article_id,
+                    'title': self._title(),
+                    'slug': f'seed-article-{article_id}',
+                    'content': '\n\n'.join(self._paragraphs(6) for _ in range(4)),
+                    'summary': self._paragraphs(2),
+                    'featured_image': None,
+                    'category': self.random.choice(ARTICLE_CATEGORIES),
+                    'author_id': self._pick_id('users'),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'is_published': is_published,
+                    'published_at': created_at if is_published else None,
+                    'view_count': self.random.randrange(5000),
+                }
+        return self._insert(Article, rows())
+
+    def seed_article_comments(self):
+        def rows():
+            for comment_id in self._ids(ArticleComment, self.counts['article_comments']):
+                yield {
+                    'id': comment_id,
+                    'article_id': self._pick_id('articles'),
+                    'user_id': self._pick_id('users'),
+                    'content': self.random.choice(COMMENTS),
+                    'created_at': self._past(),
+                    'is_approved': self.random.random() < 0.9,
+                }
+        return self._insert(ArticleComment, rows())
+
+    def seed_quizzes(self):
+        quiz_ids = self._ids(Quiz, self.counts['quizzes'])
+        question_ids = self._ids(QuizQuestion, len(quiz_ids) * QUESTIONS_PER_QUIZ)
+        choice_ids = self._ids(QuizChoice, len(question_ids) * CHOICES_PER_QUESTION)
+        # Position of the correct choice within each question, used to grade attempts
+        self.correct_choice = [self.random.randrange(CHOICES_PER_QUESTION) for _ in question_ids]
+
+        def quizzes():
+            for quiz_id in quiz_ids:
+                created_at = self._past()
+                yield {
+                    'id': quiz_id,
+                    'title': f'اختبر معلوماتك عن {self.random.choice(TOPICS)}',
+                    'description': self._paragraphs(1),
+                    'category': self.random.choice(QUIZ_CATEGORIES),
+                    'article_id': self._pick_id('articles') if self.random.random() < 0.5 else None,
+                    'author_id': self._pick_id('users'),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'is_published': self.random.random() < 0.9,
+                    'time_limit': self.random.choice((None, 10, 15, 30)),
+                    'content_version': 1,
+                }
+
+        def questions():
+            for index, question_id in enumerate(question_ids):
+                yield {
+                    'id': question_id,
+                    'quiz_id': quiz_ids[index // QUESTIONS_PER_QUIZ],
+                    'question_text': f'ما الذي تعرفه عن {self.random.choice(TOPICS)}؟',
+                    'question_type': 'multiple_choice',
+                    'points': 1,
+                    'order': index % QUESTIONS_PER_QUIZ,
+                }
+
+        def choices():
+            for index, choice_id in enumerate(choice_ids):
+                question = index // CHOICES_PER_QUESTION
+                yield {
+                    'id': choice_id,
+                    'question_id': question_ids[question],
+                    'choice_text': self.random.choice(TOPICS),
+                    'is_correct': index % CHOICES_PER_QUESTION == self.correct_choice[question],
+                    'order': index % CHOICES_PER_QUESTION,
+                }
+
+        return self._insert(Quiz, quizzes()) + self._insert(QuizQuestion, questions()) + \
+            self._insert(QuizChoice, choices())
+
+    def seed_quiz_attempts(self):
+        quiz_ids = self.ids['quizzes']
+        question_ids = self.ids['quiz_questions']
+        choice_ids = self.ids['quiz_choices']
+        attempt_ids = self._ids(QuizAttempt, self.counts['quiz_attempts'] if quiz_ids else 0)
+        answer_ids = iter(self._ids(QuizAnswer, len(attempt_ids) * QUESTIONS_PER_QUIZ))
+
+        def groups():
+            for attempt_id in attempt_ids:
+                quiz = self.random.randrange(len(quiz_ids))
+                answers = []
+                for offset in range(QUESTIONS_PER_QUIZ):
+                    question = quiz * QUESTIONS_PER_QUIZ + offset
+                    choice = self.random.randrange(CHOICES_PER_QUESTION)
+                    answers.append({
+                        'id': next(answer_ids),
+                        'attempt_id': attempt_id,
+                        'question_id': question_ids[question],
+                        'selected_choice_id': choice_ids[question * CHOICES_PER_QUESTION + choice],
+                        'text_answer': None,
+                        'is_correct': choice == self.correct_choice[question],
+                    })
+                started_at = self._past()
+                attempt = {
+                    'id': attempt_id,
+                    'quiz_id': quiz_ids[quiz],
+                    'user_id': self._pick_id('users'),
+                    'score': sum(answer['is_correct'] for answer in answers),
+                    'max_score': QUESTIONS_PER_QUIZ,
+                    'started_at': started_at,
+                    'completed_at': started_at + timedelta(minutes=self.random.randrange(2, 30)),
+                    'is_completed': True,
+                }
+                yield attempt, answers
+
+        return self._insert_with_children(QuizAttempt, QuizAnswer, groups())
+
+    def seed_media(self):
+        def rows():
+            for media_id in self._ids(Media, self.counts['media']):
+                media_type = self.random.choice(MEDIA_TYPES)
+                created_at = self._past()
+                is_approved = self.random.random() < 0.8
+                yield {
+                    'id': media_id,
+                    'title': self._title(),
+                    'description': self._paragraphs(2),
+                    'media_type': media_type,
+                    'file_path': None,
+                    'external_url': f'https://cdn.e3rafbaladak.com/seed/{media_id}.{MEDIA_EXTENSIONS[media_type]}',
+                    'thumbnail_path': None,
+                    'user_id': self._pick_id('users'),
+                    'school_id': self._pick_id('schools') if self.random.random() < 0.7 else None,
+                    'activity_id': self._pick_id('activities') if self.random.random() < 0.3 else None,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'is_approved': is_approved,
+                    'approved_at': created_at if is_approved else None,
+                    'view_count': self.random.randrange(10000),
+                    'featured': is_approved and self.random.random() < 0.02,
+                    'tags': ','.join(self.random.sample(TOPICS, 2)),
+                }
+        return self._insert(Media, rows())
+
+    def seed_media_ratings(self):
+        media_ids = self.ids['media']
+        user_ids = self.ids['users']
+        # Walk (media, user) pairs so the unique constraint is never hit
+        count = min(self.counts['media_ratings'], len(media_ids) * len(user_ids))
+
+        def rows():
+            for index, rating_id in enumerate(self._ids(MediaRating, count)):
+                media = index % len(media_ids)
+                user = (index // len(media_ids) + media * 31) % len(user_ids)
+                yield {
+                    'id': rating_id,
+                    'media_id': media_ids[media],
+                    'user_id': user_ids[user],
+                    'rating': self.random.choices(range(1, 6), RATING_WEIGHTS)[0],
+                    'created_at': self._past(),
+                }
+        return self._insert(MediaRating, rows())
+
+    def seed_media_comments(self):
+        def rows():
+            for comment_id in self._ids(MediaComment, self.counts['media_comments']):
+                yield {
+                    'id': comment_id,
+                    'media_id': self._pick_id('media'),
+                    'user_id': self._pick_id('users'),
+                    'content': self.random.choice(COMMENTS),
+                    'created_at': self._past(),
+                    'is_approved': self.random.random() < 0.9,
+                }
+        return self._insert(MediaComment, rows())
+
+    def seed_reports(self):
+        report_ids = self._ids(Report, self.counts['reports'])
+        metric_ids = iter(self._ids(ReportMetric, len(report_ids) * METRICS_PER_REPORT))
+
+        def groups():
+            for report_id in report_ids:
+                created_at = self._past()
+                status = self.random.choice(REPORT_STATUSES)
+                reviewed = status != 'submitted'
+                report = {
+                    'id': report_id,
+                    'title': f'تقرير عن {self.random.choice(TOPICS)}',
+                    'description': self._paragraphs(4),
+                    'report_type': self.random.choice(REPORT_TYPES),
+                    'school_id': self._pick_id('schools'),
+                    'submitted_by': self._pick_id('users'),
+                    'activity_id': self._pick_id('activities') if self.random.random() < 0.5 else None,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'status': status,
+                    'reviewed_by': self._pick_id('users') if reviewed else None,
+                    'reviewed_at': created_at + timedelta(days=self.random.randrange(1, 14)) if reviewed else None,
+                    'feedback': self.random.choice(COMMENTS) if reviewed else None,
+                }
+                metrics = [{
+                    'id': next(metric_ids),
+                    'report_id': report_id,
+                    'name': name,
+                    'value': float(self.random.randrange(1, 100 if unit == '%' else 500)),
+                    'unit': unit,
+                } for name, unit in self.random.sample(REPORT_METRICS, METRICS_PER_REPORT)]
+                yield report, metrics
+
+        return self._insert_with_children(Report, ReportMetric, groups())
+
+    def seed_notifications(self):
+        def rows():
+            for notification_id in self._ids(Notification, self.counts['notifications']):
+                topic = self.random.choice(TOPICS)
+                yield {
+                    'id': notification_id,
+                    'user_id': self._pick_id('users'),
+                    'title': 'محتوى جديد',
+                    'message': f'تمت إضافة محتوى جديد عن {topic}',
+                    'category': self.random.choice(NOTIFICATION_CATEGORIES),
+                    'is_read': self.random.random() < 0.7,
+                    'created_at': self._past(90),
+                    'link': None,
+                    'broadcast_id': None,
+                }
+        return self._insert(Notification, rows())
+
+    def run(self):
+        """Generate every table in dependency order.
+
+        Returns:
+            A dict of table group to rows inserted
+        """
+        steps = (
+            ('schools', self.seed_schools),
+            ('volunteers', self.seed_volunteers),
+            ('users', self.seed_users),
+            ('activities', self.seed_activities),
+            ('articles', self.seed_articles),
+            ('article_comments', self.seed_article_comments),
+            ('quizzes', self.seed_quizzes),
+            ('quiz_attempts', self.seed_quiz_attempts),
+            ('media', self.seed_media),
+            ('media_ratings', self.seed_media_ratings),
+            ('media_comments', self.seed_media_comments),
+            ('reports', self.seed_reports),
+            ('notifications', self.seed_notifications),
+        )
+        results = {name: step() for name, step in steps}
+        self._sync_sequences()
+        return results
+
+    def _sync_sequences(self):
+        """Move PostgreSQL id sequences past the ids assigned here.
+
+        The rows were inserted with explicit ids, which do not advance the
+        sequences, so the next ordinary insert would reuse a seeded id.
+        """
+        if db.engine.dialect.name != 'postgresql':
+            return
+        tables = db.metadata.tables
+        with db.engine.begin() as connection:
+            for tablename in self.ids:
+                table = tables[tablename]
+                connection.execute(select(func.setval(
+                    func.pg_get_serial_sequence(tablename, 'id'),
+                    select(func.coalesce(func.max(table.c.id), 0) + 1).scalar_subquery(),
+                    False,
+                )))
+
+
+def reconcile_seeded_data(search_index=True):
+    """Rebuild the derived data that ORM events maintain for normal writes.
+
+    Returns:
+        A dict describing what was rebuilt
+    """
+    from app.counters import reconcile_counters
+    from app.notifications import reconcile_unread_counts
+    from app.ratings import reconcile_ratings
+
+    results = {
+        'counters': reconcile_counters(),
+        'unread_counts': reconcile_unread_counts(),
+        'ratings': reconcile_ratings(),
+    }
+    if search_index:
+        from app.search import rebuild_index
+
+        results['search_index'] = rebuild_index()
+    return results
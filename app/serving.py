@@ -0,0 +1,140 @@
+import hashlib
+import mimetypes
+import os
+import re
+from flask import abort, current_app, request
+from werkzeug.http import http_date, parse_range_header
+from app.storage import upload_store
+
+BUFFER_SIZE = 256 * 1024
+
+# Content-addressed names from app.storage already carry the file's SHA-256
+_DIGEST_RE = re.compile(r'(?:^|/)([0-9a-f]{64})\.[A-Za-z0-9]+$')
+
+
+def file_etag(filename, stat):
+    """A strong ETag for a stored file.
+
+    Content-addressed files use a hash of their content hash, which does not
+    give away the stored name; older uploads fall back to a hash of their
+    size and modification time.
+    """
+    match = _DIGEST_RE.search(filename)
+    if match:
+        return hashlib.sha256(match.group(1).encode()).hexdigest()[:32]
+    return hashlib.sha256(f'{filename}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()[:32]
+
+
+def protect_static_uploads(app):
+    """Stop the static route from serving folders that need permission checks.
+
+    Files in UPLOAD_PROTECTED_FOLDERS (unapproved media, report attachments)
+    are only reachable through the endpoints that call send_upload. The
+    object store from before UPLOAD_OBJECTS_FOLDER existed, which holds a
+    copy of every upload, is never served.
+    """
+    folders = (*app.config.get('UPLOAD_PROTECTED_FOLDERS', ()), 'objects')
+    protected = tuple(f'uploads/{folder}/' for folder in folders)
+    static_view = app.view_functions['static']
+
+    def static(filename):
+        if filename.startswith(protected):
+            abort(404)
+        return static_view(filename=filename)
+
+    app.view_functions['static'] = static
+
+
+def _read_range(path, start, length):
+    """Yield a byte range of a file through one reused buffer."""
+    buffer = bytearray(min(BUFFER_SIZE, max(length, 1)))
+    view = memoryview(buffer)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            read = f.readinto(view[:min(len(buffer), length)])
+            if not read:
+                break
+            length -= read
+            yield bytes(view[:read])
+
+
+def send_upload(folder, filename, mimetype=None, download_name=None):
+    """Send an uploaded file with Range, ETag and zero-copy support.
+
+    With UPLOAD_SEND_MODE = 'x-accel-redirect' or 'x-sendfile' the transfer
+    is handed to the front proxy (nginx or Apache/lighttpd), which also
+    handles ranges. Otherwise the file is served from Python: ranges are
+    honoured and the body goes through the server's wsgi.file_wrapper, which
+    gunicorn sends with os.sendfile, or through a small reused buffer.
+
+    Args:
+        folder: The subfolder within UPLOAD_FOLDER holding the file
+        filename: The stored filename
+        mimetype: Content type (guessed from the filename if not given)
+        download_name: Send as an attachment with this name
+
+    Returns:
+        A response
+    """
+    path = upload_store.path(folder, filename)
+    if not filename or '..' in filename.split('/') or not os.path.isfile(path):
+        abort(404)
+
+    stat = os.stat(path)
+    mimetype = mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = current_app.response_class(mimetype=mimetype, direct_passthrough=True)
+    response.set_etag(file_etag(filename, stat))
+    response.last_modified = stat.st_mtime
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('UPLOAD_MAX_AGE', 3600)
+    if download_name:
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+
+    mode = current_app.config.get('UPLOAD_SEND_MODE', 'sendfile')
+    if mode == 'x-accel-redirect':
+        prefix = current_app.config.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+        response.headers['X-Accel-Redirect'] = f'{prefix.rstrip("/")}/{folder}/{filename}'
+        return response
+    if mode == 'x-sendfile':
+        response.headers['X-Sendfile'] = os.path.abspath(path)
+        return response
+
+    if request.if_none_match.contains(response.get_etag()[0]):
+        response.status_code = 304
+        return response
+
+    size = stat.st_size
+    start, length = 0, size
+    range_header = parse_range_header(request.headers.get('Range'))
+    # A Range is only honoured if the client's partial copy is still current
+    if_range = request.if_range
+    if if_range.etag is not None:
+        range_valid = if_range.etag == response.get_etag()[0]
+    elif if_range.date is not None:
+        range_valid = http_date(if_range.date) == http_date(stat.st_mtime)
+    else:
+        range_valid = True
+    if range_header is not None and range_valid and len(range_header.ranges) == 1:
+        byte_range = range_header.range_for_length(size)
+        if byte_range is None:
+            response.status_code = 416
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+        start, stop = byte_range
+        length = stop - start
+        response.status_code = 206
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+
+    response.content_length = length
+    file_wrapper = request.environ.get('wsgi.file_wrapper')
+    if file_wrapper is not None and start + length == size:
+        # Servers send a wrapped file from its current offset to the end;
+        # gunicorn does it with os.sendfile
+        f = open(path, 'rb')
+        f.seek(start)
+        response.response = file_wrapper(f, BUFFER_SIZE)
+    else:
+        response.response = _read_range(path, start, length)
+    return response
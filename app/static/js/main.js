@@ -34,6 +34,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Setup language switcher
     setupLanguageSwitcher();
+
+    // Setup resumable media uploads
+    setupResumableUpload();
 });
 
 /**
@@ -285,6 +288,117 @@ function setupLanguageSwitcher() {
     });
 }
 
+/**
+ * Upload large media files in resumable chunks (tus protocol).
+ * Applies to forms with a data-resumable-upload attribute; an interrupted
+ * upload continues from the last byte the server received.
+ */
+function setupResumableUpload() {
+    const form = document.querySelector('form[data-resumable-upload]');
+    
+    if (!form) return;
+
+    const CHUNK_SIZE = 5 * 1024 * 1024; // Well below the server's per-request limit
+    const csrfInput = form.querySelector('input[name="csrf_token"]');
+    const progress = form.querySelector('.upload-progress');
+    const headers = extra => Object.assign({
+        'Tus-Resumable': '1.0.0',
+        'X-CSRFToken': csrfInput ? csrfInput.value : ''
+    }, extra);
+    const encode = value => btoa(unescape(encodeURIComponent(value || '')));
+    const field = name => {
+        const input = form.querySelector('[name="' + name + '"]');
+        return input ? input.value : '';
+    };
+
+    form.addEventListener('submit', async function(event) {
+        const file = form.querySelector('input[type="file"]').files[0];
+        if (!file) return;
+        event.preventDefault();
+
+        const storageKey = 'upload:' + [file.name, file.size, file.lastModified].join(':');
+        let uploadUrl = localStorage.getItem(storageKey);
+        let offset = 0;
+
+        // Resume a previous upload of the same file if the server still has it
+        if (uploadUrl) {
+            const response = await fetch(uploadUrl, { method: 'HEAD', headers: headers() });
+            if (response.ok) {
+                offset = parseInt(response.headers.get('Upload-Offset'));
+            } else {
+                uploadUrl = null;
+            }
+        }
+
+        if (!uploadUrl) {
+            const metadata = {
+                filename: file.name,
+                media_type: field('media_type'),
+                title: field('title'),
+                description: field('description'),
+                tags: field('tags'),
+                school_id: field('school_id')
+            };
+            const response = await fetch(form.getAttribute('data-resumable-upload'), {
+                method: 'POST',
+                headers: headers({
+                    'Upload-Length': file.size,
+                    'Upload-Metadata': Object.keys(metadata).map(key => key + ' ' + encode(metadata[key])).join(',')
+                })
+            });
+            if (response.status !== 201) {
+                alert(await response.text());
+                return;
+            }
+            uploadUrl = response.headers.get('Location');
+            localStorage.setItem(storageKey, uploadUrl);
+        }
+
+        let retries = 0;
+        while (offset < file.size) {
+            try {
+                const response = await fetch(uploadUrl, {
+                    method: 'PATCH',
+                    headers: headers({
+                        'Content-Type': 'application/offset+octet-stream',
+                        'Upload-Offset': offset
+                    }),
+                    body: file.slice(offset, offset + CHUNK_SIZE)
+                });
+                if (!response.ok && response.status !== 409) {
+                    throw new Error(await response.text());
+                }
+                if (response.status === 409) {
+                    // Out of step with the server; ask it where to continue
+                    const head = await fetch(uploadUrl, { method: 'HEAD', headers: headers() });
+                    offset = parseInt(head.headers.get('Upload-Offset'));
+                    continue;
+                }
+                offset = parseInt(response.headers.get('Upload-Offset'));
+                retries = 0;
+                if (progress) {
+                    progress.style.width = Math.round(offset * 100 / file.size) + '%';
+                }
+                if (offset >= file.size) {
+                    localStorage.removeItem(storageKey);
+                    window.location = response.headers.get('Media-Location');
+                }
+            } catch (error) {
+                // Back off and retry; the HEAD above recovers the offset
+                if (++retries > 8) {
+                    alert(error.message);
+                    return;
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000 * Math.pow(2, retries)));
+                const head = await fetch(uploadUrl, { method: 'HEAD', headers: headers() }).catch(() => null);
+                if (head && head.ok) {
+                    offset = parseInt(head.headers.get('Upload-Offset'));
+                }
+            }
+        }
+    });
+}
+
 /**
  * Handle file uploads with preview
  */
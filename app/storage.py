@@ -0,0 +1,196 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from flask import current_app
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from werkzeug.utils import secure_filename
+from app import db
+from app.models.upload import StoredFile
+
+CHUNK_SIZE = 1024 * 1024
+
+_stored_files = StoredFile.__table__
+
+# Session.info key collecting the paths deleted when the transaction commits
+PENDING_UNLINKS = 'upload_store_unlinks'
+
+
+class UploadStore:
+    """Content-addressed, deduplicating store for uploaded files.
+
+    Files are named after the SHA-256 of their content and sharded by hash
+    prefix, so `save` returns names like `ab/cd/abcd...ef.jpg`. The single
+    copy of each file lives under UPLOAD_OBJECTS_FOLDER, outside the static
+    folder so it is never served by name; every folder that uses it (media,
+    reports, articles, schools) gets a hard link at
+    `UPLOAD_FOLDER/<folder>/<name>`, so existing static URLs and
+    `os.path.join(UPLOAD_FOLDER, folder, name)` keep working. References are
+    counted per folder in the stored_files table; the file is deleted when
+    the last one is released.
+    """
+
+    def objects_folder(self):
+        return current_app.config.get('UPLOAD_OBJECTS_FOLDER') or \
+            os.path.join(current_app.instance_path, 'upload_objects')
+
+    def path(self, folder, filename):
+        """Filesystem path of a stored file as seen from a folder."""
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], folder, filename)
+
+    @staticmethod
+    def sharded_name(digest, ext):
+        return f'{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def save(self, file, folder):
+        """Store an uploaded file, hashing it while it is written to disk.
+
+        Args:
+            file: The file object from the request (or any object with a
+                `filename` and a readable `stream`)
+            folder: The folder the file is used from
+
+        Returns:
+            The stored filename, relative to the folder
+        """
+        ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+        stream = getattr(file, 'stream', file)
+
+        tmp_dir = os.path.join(self.objects_folder(), 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+
+        return self._adopt(tmp.name, sha256.hexdigest(), size, ext, folder)
+
+    def add_file(self, path, folder, ext):
+        """Move a file already on disk (e.g. an assembled chunked upload) into the store.
+
+        Args:
+            path: The file to move; it is removed or renamed by this call
+            folder: The folder the file is used from
+            ext: The extension to give it, including the dot
+
+        Returns:
+            The stored filename, relative to the folder
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha256.update(chunk)
+                size += len(chunk)
+        return self._adopt(path, sha256.hexdigest(), size, ext.lower(), folder)
+
+    def _adopt(self, tmp_path, digest, size, ext, folder):
+        filename = self.sharded_name(digest, ext)
+
+        object_path = os.path.join(self.objects_folder(), filename)
+        if os.path.exists(object_path):
+            # Already stored; keep the existing copy
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.replace(tmp_path, object_path)
+
+        link_path = self.path(folder, filename)
+        if not os.path.exists(link_path):
+            os.makedirs(os.path.dirname(link_path), exist_ok=True)
+            try:
+                os.link(object_path, link_path)
+            except FileExistsError:
+                pass  # Linked by a concurrent upload of the same content
+            except OSError:
+                # Hard links unsupported here; fall back to a copy
+                shutil.copyfile(object_path, link_path)
+
+        self._adjust(folder, filename, 1, size)
+        return filename
+
+    def _adjust(self, folder, filename, delta, size=0):
+        """Change a file's reference count in the current transaction.
+
+        Returns:
+            The new reference count
+        """
+        where = (_stored_files.c.folder == folder) & (_stored_files.c.filename == filename)
+        increment = update(_stored_files).where(where).values(ref_count=_stored_files.c.ref_count + delta)
+        if db.session.execute(increment).rowcount == 0:
+            if delta <= 0:
+                # Not tracked (uploaded before the store existed)
+                return 0
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(_stored_files).values(
+                        folder=folder, filename=filename, size=size, ref_count=delta))
+                return delta
+            except IntegrityError:
+                # Another request stored the same content first; add to its row
+                db.session.execute(increment)
+        return db.session.execute(select(_stored_files.c.ref_count).where(where)).scalar()
+
+    @staticmethod
+    def delete_on_commit(*paths):
+        """Delete files once the current transaction commits.
+
+        Deleting right away would lose files still referenced if the
+        transaction that released them rolls back.
+        """
+        db.session.info.setdefault(PENDING_UNLINKS, []).extend(paths)
+
+    def release(self, folder, filename):
+        """Drop one reference to a stored file, deleting it once unused.
+
+        Files that were uploaded before the store existed are not tracked
+        and are deleted too. Files are deleted when the transaction commits.
+
+        Returns:
+            True if the file will be deleted from the folder
+        """
+        if not filename:
+            return False
+        refs = self._adjust(folder, filename, -1)
+        if refs > 0:
+            return False
+
+        db.session.execute(_stored_files.delete().where(
+            (_stored_files.c.folder == folder) & (_stored_files.c.filename == filename)))
+        paths = [self.path(folder, filename)]
+
+        still_used = db.session.execute(
+            select(func.count()).select_from(_stored_files).where(_stored_files.c.filename == filename)
+        ).scalar()
+        if not still_used:
+            paths.append(os.path.join(self.objects_folder(), filename))
+        self.delete_on_commit(*paths)
+        return True
+
+
+upload_store = UploadStore()
+
+
+def _after_commit(session):
+    if session.in_nested_transaction():
+        return  # A savepoint was released; wait for the outer commit
+    for path in session.info.pop(PENDING_UNLINKS, ()):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _after_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(PENDING_UNLINKS, None)
+
+
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_soft_rollback', _after_rollback)
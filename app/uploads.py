@@ -0,0 +1,235 @@
+import base64
+import json
+import os
+import secrets
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.utils import secure_filename
+from app import db
+from app.models.media import Media
+from app.models.school import School
+from app.models.upload import UploadSession
+from app.storage import upload_store
+
+TUS_VERSION = '1.0.0'
+CHUNK_SIZE = 64 * 1024
+
+# Upload-Metadata keys copied onto the Media row
+METADATA_FIELDS = ('title', 'description', 'tags', 'school_id')
+
+_sessions = UploadSession.__table__
+
+
+class UploadError(Exception):
+    """A protocol error, reported to the client with the given HTTP status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_metadata(header):
+    """Decode a tus Upload-Metadata header.
+
+    Args:
+        header: Comma-separated `key base64value` pairs
+
+    Returns:
+        A dict of key to decoded string value
+    """
+    metadata = {}
+    for pair in filter(None, (part.strip() for part in (header or '').split(','))):
+        key, _, value = pair.partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+        except (ValueError, UnicodeDecodeError):
+            raise UploadError(f'Invalid Upload-Metadata value for {key}')
+    return metadata
+
+
+def partial_path(upload):
+    """Where the bytes received so far for an upload are kept."""
+    return os.path.join(upload_store.objects_folder(), 'partial', upload.id)
+
+
+def create_upload(user, length, metadata):
+    """Start a resumable upload.
+
+    Args:
+        user: The uploading user
+        length: The Upload-Length declared by the client
+        metadata: Decoded Upload-Metadata (filename, media_type, title, ...)
+
+    Returns:
+        The new UploadSession
+    """
+    from app.utils import allowed_file
+
+    max_size = current_app.config['MEDIA_UPLOAD_MAX_SIZE']
+    if length is None or length < 0:
+        raise UploadError('Upload-Length is required')
+    if length > max_size:
+        raise UploadError(f'Uploads are limited to {max_size} bytes', 413)
+
+    filename = secure_filename(metadata.get('filename', ''))
+    media_type = metadata.get('media_type', '')
+    if not filename or not allowed_file(filename, media_type):
+        raise UploadError('File type not allowed', 415)
+    if not metadata.get('title'):
+        raise UploadError('A title is required')
+    school_id = metadata.get('school_id')
+    if school_id and school_id != '0':
+        # Checked now rather than once every byte has been received
+        if not school_id.isdigit() or db.session.get(School, int(school_id)) is None:
+            raise UploadError('Unknown school_id')
+
+    upload = UploadSession(
+        id=secrets.token_hex(16),
+        user_id=user.id,
+        filename=filename,
+        media_type=media_type,
+        length=length,
+        upload_metadata=json.dumps({key: metadata.get(key) for key in METADATA_FIELDS})
+    )
+
+    path = partial_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+    db.session.add(upload)
+    db.session.commit()
+    return upload
+
+
+def _move_offset(upload, expected, offset):
+    """Set an upload's offset if it is still `expected`, committing at once.
+
+    Returns:
+        Whether the offset was moved
+    """
+    result = db.session.execute(
+        update(_sessions)
+        .where(_sessions.c.id == upload.id)
+        .where(_sessions.c.offset == expected)
+        .values(offset=offset, updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def append_chunk(upload, offset, stream, length=None):
+    """Write a PATCH body at the given offset, streaming it to disk.
+
+    The bytes are claimed by advancing the offset before they are written,
+    so concurrent PATCHes for the same upload cannot both write at it; the
+    part of the claim that is not written is given back afterwards. Bytes
+    received before a dropped connection are kept, so the client can resume
+    from the offset reported by a HEAD request.
+
+    Args:
+        upload: The UploadSession
+        offset: The Upload-Offset sent by the client
+        stream: The request body stream
+        length: The body's Content-Length, if known
+
+    Returns:
+        The new offset
+    """
+    if upload.is_complete():
+        raise UploadError('Upload already completed', 409)
+    if offset != upload.offset:
+        raise UploadError(f'Upload-Offset must be {upload.offset}', 409)
+
+    end = upload.length if length is None else min(upload.length, offset + length)
+    if not _move_offset(upload, offset, end):
+        raise UploadError('Upload was modified concurrently', 409)
+
+    written = 0
+    try:
+        with open(partial_path(upload), 'r+b') as f:
+            f.seek(offset)
+            while end - offset > written:
+                chunk = stream.read(min(CHUNK_SIZE, end - offset - written))
+                if not chunk:
+                    break
+                f.write(chunk)
+                written += len(chunk)
+            f.truncate(offset + written)
+    except ClientDisconnected:
+        pass
+    finally:
+        if offset + written != end and not _move_offset(upload, end, offset + written):
+            current_app.logger.error(f'Upload {upload.id} moved past an unfinished write at {offset}')
+
+    db.session.refresh(upload)
+    if upload.offset == upload.length:
+        finalize_upload(upload)
+    return upload.offset
+
+
+def finalize_upload(upload):
+    """Move a completed upload into the store and create its Media row.
+
+    Returns:
+        The new Media
+    """
+    from app.images import image_pipeline, thumbnail_filename
+
+    metadata = json.loads(upload.upload_metadata or '{}')
+    filename = upload_store.add_file(partial_path(upload), 'media', os.path.splitext(upload.filename)[1])
+
+    school_id = metadata.get('school_id')
+    media = Media(
+        title=metadata.get('title'),
+        media_type=upload.media_type,
+        user_id=upload.user_id,
+        description=metadata.get('description'),
+        file_path=filename,
+        school_id=int(school_id) if school_id and school_id != '0' else None,
+        tags=metadata.get('tags')
+    )
+    if upload.media_type == 'image':
+        media.thumbnail_path = thumbnail_filename(filename)
+
+    # Auto-approve for admins
+    if upload.user.is_admin():
+        media.is_approved = True
+        media.approved_by = upload.user_id
+        media.approved_at = datetime.utcnow()
+
+    db.session.add(media)
+    db.session.flush()
+    upload.media_id = media.id
+    upload.completed_at = datetime.utcnow()
+    db.session.commit()
+
+    if media.media_type == 'image':
+        image_pipeline.process(media, 'image_derivatives', 'media', media.file_path)
+    return media
+
+
+def delete_upload(upload):
+    """Abandon an upload and remove its partial data."""
+    path = partial_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    db.session.delete(upload)
+    db.session.commit()
+
+
+def purge_expired_uploads():
+    """Delete incomplete uploads not touched within MEDIA_UPLOAD_EXPIRY hours.
+
+    Returns:
+        The number of uploads deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config['MEDIA_UPLOAD_EXPIRY'])
+    expired = UploadSession.query.filter(
+        UploadSession.completed_at.is_(None),
+        UploadSession.updated_at < cutoff
+    ).all()
+    for upload in expired:
+        delete_upload(upload)
+    return len(expired)
@@ -2,11 +2,7 @@ import os
 import uuid
 import secrets
 from datetime import datetime
-from PIL import Image
 from flask import current_app, url_for
-from flask_mail import Message
-from werkzeug.utils import secure_filename
-from app import mail
 
 # File handling utilities
 def allowed_file(filename, file_type):
@@ -14,93 +10,68 @@ def allowed_file(filename, file_type):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS'].get(file_type, set())
 
-def save_file(file, folder, file_type, max_size=(800, 800)):
+def save_file(file, folder, file_type):
     """Save a file to the specified folder with a secure filename.
     
+    Files are stored once per content (see app.storage.upload_store);
+    resized image variants are built in the background by
+    app.images.image_pipeline.
+    
     Args:
         file: The file object from the request
         folder: The subfolder within UPLOAD_FOLDER to save to
         file_type: Type of file ('image', 'document', 'video', 'audio')
-        max_size: Maximum dimensions for image resizing (width, height)
         
     Returns:
         The filename of the saved file
     """
+    from app.storage import upload_store
+    
     if file and allowed_file(file.filename, file_type):
-        # Generate a secure filename with a random component
-        filename = secure_filename(file.filename)
-        random_hex = secrets.token_hex(8)
-        _, file_ext = os.path.splitext(filename)
-        new_filename = random_hex + file_ext
-        
-        # Create the full path
-        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
-        os.makedirs(upload_path, exist_ok=True)
-        file_path = os.path.join(upload_path, new_filename)
-        
-        # Save the file
-        if file_type == 'image':
-            # Resize image if it's an image file
-            img = Image.open(file)
-            img.thumbnail(max_size)
-            img.save(file_path)
-        else:
-            file.save(file_path)
-            
-        return new_filename
+        return upload_store.save(file, folder)
     return None
 
-def save_image_with_thumbnail(file, folder, thumbnail_size=(200, 200)):
-    """Save an image and create a thumbnail version.
+def save_image_with_thumbnail(file, folder):
+    """Save an image and return the name its thumbnail will have.
+    
+    The thumbnail is written by app.images.image_pipeline once the upload
+    has been processed.
     
     Args:
         file: The file object from the request
         folder: The subfolder within UPLOAD_FOLDER to save to
-        thumbnail_size: Size for the thumbnail (width, height)
         
     Returns:
         A tuple of (main_filename, thumbnail_filename)
     """
+    from app.images import thumbnail_filename
+    from app.storage import upload_store
+    
     if file and allowed_file(file.filename, 'image'):
-        # Generate a secure filename with a random component
-        filename = secure_filename(file.filename)
-        random_hex = secrets.token_hex(8)
-        _, file_ext = os.path.splitext(filename)
-        new_filename = random_hex + file_ext
-        thumbnail_filename = random_hex + '_thumb' + file_ext
-        
-        # Create the full path
-        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
-        os.makedirs(upload_path, exist_ok=True)
-        file_path = os.path.join(upload_path, new_filename)
-        thumbnail_path = os.path.join(upload_path, thumbnail_filename)
-        
-        # Save the main image (resized to a reasonable max size)
-        img = Image.open(file)
-        img.thumbnail((800, 800))  # Max size for main image
-        img.save(file_path)
-        
-        # Create and save the thumbnail
-        thumb = Image.open(file)
-        thumb.thumbnail(thumbnail_size)
-        thumb.save(thumbnail_path)
-        
-        return (new_filename, thumbnail_filename)
+        new_filename = upload_store.save(file, folder)
+        return (new_filename, thumbnail_filename(new_filename))
     return (None, None)
 
 # Email utilities
-def send_email(subject, recipients, template, **kwargs):
-    """Send an email using a template.
+def send_email(subject, recipients, template=None, sender=None, text_body=None, html_body=None, **kwargs):
+    """Queue an email for delivery by the outbox worker.
+    
+    The message is queued when the caller commits the session.
     
     Args:
         subject: Email subject
         recipients: List of recipient email addresses
         template: The template to use for the email body
+        sender: Sender address (defaults to MAIL_DEFAULT_SENDER)
+        text_body: Plain-text body
+        html_body: HTML body, used when no template is given
         **kwargs: Variables to pass to the template
     """
-    msg = Message(subject, recipients=recipients)
-    msg.html = template.format(**kwargs)
-    mail.send(msg)
+    from app.outbox import enqueue_email
+    
+    if template is not None:
+        html_body = template.format(**kwargs)
+    return enqueue_email(subject, recipients, html_body=html_body, text_body=text_body, sender=sender)
 
 def send_volunteer_thank_you_email(volunteer):
     """Send a thank you email to a newly registered volunteer.
@@ -0,0 +1,166 @@
+import atexit
+import threading
+from collections import Counter
+from flask import g, has_request_context
+from sqlalchemy import bindparam, func, update
+
+
+class MemoryBackend:
+    """Keep pending view increments in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+
+    def incr(self, table_name, row_id, amount=1):
+        with self._lock:
+            self._pending[(table_name, row_id)] += amount
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        return pending
+
+
+class RedisBackend:
+    """Keep pending view increments in Redis so all workers share one buffer."""
+
+    key = 'view_counter:pending'
+
+    def __init__(self, url):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+
+    def incr(self, table_name, row_id, amount=1):
+        self._redis.hincrby(self.key, f'{table_name}:{row_id}', amount)
+
+    def drain(self):
+        # Atomically move the hash aside so concurrent increments start a new one
+        # and a flush from another worker can never count the same views twice
+        draining_key = f'{self.key}:draining'
+        try:
+            self._redis.rename(self.key, draining_key)
+        except Exception:
+            # Nothing pending (RENAME fails when the key does not exist)
+            return Counter()
+
+        pending = Counter()
+        for field, amount in self._redis.hgetall(draining_key).items():
+            table_name, row_id = field.decode().rsplit(':', 1)
+            pending[(table_name, int(row_id))] += int(amount)
+        self._redis.delete(draining_key)
+        return pending
+
+
+class ViewCounter:
+    """Buffer view counts in memory and write them to the database in batches.
+
+    Every flush issues one ``UPDATE ... SET view_count = view_count + n``
+    executemany per table instead of a commit per page view.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self.interval = 0
+        self._timer = None
+        self._timer_lock = threading.Lock()
+        self._flush_at_exit = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', 10)
+
+        if app.config.get('VIEW_COUNTER_BACKEND', 'memory') == 'redis':
+            self.backend = RedisBackend(app.config['VIEW_COUNTER_REDIS_URL'])
+        else:
+            self.backend = MemoryBackend()
+
+        app.extensions['view_counter'] = self
+
+        # Write out whatever is still buffered when the worker shuts down
+        if not self._flush_at_exit:
+            atexit.register(self.flush)
+            self._flush_at_exit = True
+
+    def increment(self, table_name, row_id, amount=1):
+        """Record views for a row; they are written on the next flush.
+
+        Args:
+            table_name: The table that owns the view_count column
+            row_id: The primary key of the viewed row
+            amount: Number of views to add
+        """
+        self.backend.incr(table_name, row_id, amount)
+
+        # A page being cached records its views, so each cache hit counts again
+        if has_request_context() and 'page_cache_views' in g:
+            g.page_cache_views.append((table_name, row_id, amount))
+
+        if not self.interval:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        # The timer is started lazily so it runs in the worker process, not the
+        # pre-fork master
+        with self._timer_lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self._run_scheduled_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _run_scheduled_flush(self):
+        with self._timer_lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            self.app.logger.exception('Error flushing view counts')
+
+    @staticmethod
+    def _update_statement(table):
+        values = {'view_count': func.coalesce(table.c.view_count, 0) + bindparam('_amount')}
+        if 'updated_at' in table.c:
+            # A page view is not an edit; keep the column's onupdate from firing
+            values['updated_at'] = table.c.updated_at
+        return update(table).where(table.c.id == bindparam('_id')).values(**values)
+
+    def flush(self):
+        """Write all pending view counts to the database.
+
+        Returns:
+            The number of rows updated
+        """
+        if self.backend is None or self.app is None:
+            return 0
+
+        pending = self.backend.drain()
+        if not pending:
+            return 0
+
+        by_table = {}
+        for (table_name, row_id), amount in pending.items():
+            by_table.setdefault(table_name, []).append({'_id': row_id, '_amount': amount})
+
+        from app import db
+
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    for table_name, params in by_table.items():
+                        connection.execute(self._update_statement(db.metadata.tables[table_name]), params)
+        except Exception:
+            # Put the counts back so they are retried on the next flush
+            for (table_name, row_id), amount in pending.items():
+                self.backend.incr(table_name, row_id, amount)
+            raise
+
+        return len(pending)
+
+
+view_counter = ViewCounter()
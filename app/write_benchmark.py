@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+def run_write_benchmark(directory, profiles=('none', 'default'), writers=8, readers=2, writes=200):
+    """Measure concurrent write throughput on SQLite under each engine profile.
+
+    For every profile a fresh database file is written by `writers` threads,
+    each committing `writes` single-row transactions, while `readers`
+    threads keep counting the rows. The 'none' profile keeps SQLite's
+    defaults (rollback journal, synchronous=FULL), so it shows what the
+    pragmas of the other profiles buy.
+
+    Args:
+        directory: Where the temporary database files are created
+        profiles: Names from app.engine.ENGINE_PROFILES
+
+    Returns:
+        A dict of profile name to commits, errors, duration and writes/s
+    """
+    from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, event, func, select
+    from sqlalchemy.exc import OperationalError
+    from app.engine import engine_profile, sqlite_pragma_listener
+
+    results = {}
+    for profile in profiles:
+        path = os.path.join(directory, f'write_benchmark_{profile}.db')
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+        engine = create_engine(f'sqlite:///{path}', pool_size=writers + readers)
+        pragmas = engine_profile({'DATABASE_ENGINE_PROFILE': profile})['sqlite_pragmas']
+        if pragmas:
+            event.listen(engine, 'connect', sqlite_pragma_listener(pragmas))
+        metadata = MetaData()
+        table = Table('write_benchmark', metadata,
+                      Column('id', Integer, primary_key=True),
+                      Column('writer', Integer, nullable=False),
+                      Column('payload', String(200), nullable=False),
+                      Column('created_at', DateTime, nullable=False))
+        metadata.create_all(engine)
+
+        commits = errors = 0
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def write(writer):
+            nonlocal commits, errors
+            local_commits = local_errors = 0
+            for _ in range(writes):
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(table.insert().values(
+                            writer=writer, payload='x' * 200, created_at=datetime.utcnow()))
+                    local_commits += 1
+                except OperationalError:
+                    # "database is locked" once the busy timeout runs out
+                    local_errors += 1
+            with lock:
+                commits += local_commits
+                errors += local_errors
+
+        def read():
+            while not done.is_set():
+                try:
+                    with engine.connect() as connection:
+                        connection.scalar(select(func.count()).select_from(table))
+                except OperationalError:
+                    pass
+
+        reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+        for thread in reader_threads:
+            thread.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            list(executor.map(write, range(writers)))
+        duration = time.perf_counter() - started
+        done.set()
+        for thread in reader_threads:
+            thread.join()
+        engine.dispose()
+
+        results[profile] = {
+            'commits': commits,
+            'errors': errors,
+            'duration': duration,
+            'writes_per_second': commits / duration if duration else 0.0,
+        }
+    return results
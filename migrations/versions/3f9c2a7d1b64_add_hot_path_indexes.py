@@ -0,0 +1,64 @@
+"""add hot path composite indexes
+
+Revision ID: 3f9c2a7d1b64
+Revises: 
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b64'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_media_approved_featured_created_at', 'media', ['is_approved', 'featured', 'created_at']),
+    ('ix_articles_published_category_published_at', 'articles', ['is_published', 'category', 'published_at']),
+    ('ix_notifications_user_read_created_at', 'notifications', ['user_id', 'is_read', 'created_at']),
+    ('ix_quiz_attempts_quiz_user_completed', 'quiz_attempts', ['quiz_id', 'user_id', 'is_completed', 'completed_at']),
+    ('ix_volunteers_school_registration_date', 'volunteers', ['school_id', 'registration_date']),
+    ('ix_reports_school_created_at', 'reports', ['school_id', 'created_at']),
+    ('ix_reports_status', 'reports', ['status']),
+    ('ix_activities_school_date', 'activities', ['school_id', 'date']),
+    ('ix_article_comments_article_approved_created_at', 'article_comments', ['article_id', 'is_approved', 'created_at']),
+]
+
+# Superseded by ix_notifications_user_read_created_at, which starts with user_id
+REDUNDANT_INDEXES = [
+    ('ix_notifications_user_id', 'notifications', ['user_id']),
+]
+
+
+def _existing_indexes():
+    # Databases created with db.create_all() may already have some of these
+    inspector = sa.inspect(op.get_bind())
+    existing = {}
+    for table in inspector.get_table_names():
+        existing[table] = {index['name'] for index in inspector.get_indexes(table)}
+    return existing
+
+
+def upgrade():
+    existing = _existing_indexes()
+    for name, table, columns in INDEXES:
+        if table in existing and name not in existing[table]:
+            op.create_index(name, table, columns, unique=False)
+    for name, table, columns in REDUNDANT_INDEXES:
+        if name in existing.get(table, ()):
+            op.drop_index(name, table_name=table)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    for name, table, columns in REDUNDANT_INDEXES:
+        if table in existing and name not in existing[table]:
+            op.create_index(name, table, columns, unique=False)
+    for name, table, columns in reversed(INDEXES):
+        if name in existing.get(table, ()):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,84 @@
+from datetime import datetime
+from sqlalchemy import event, insert
+from sqlalchemy.orm import aliased
+from app import create_app, db
+from app.conditional import Dependent, conditional, validators
+from app.config import TestingConfig
+from app.models.article import Article
+from app.models.school import School
+from app.models.user import User
+from app.page_cache import cache_page
+
+
+class PageCacheConfig(TestingConfig):
+    PAGE_CACHE_ENABLED = True
+    PAGE_CACHE_TYPE = 'memory'
+
+
+def _article(slug, category, author_id):
+    # Core insert: Article() generates the slug itself
+    db.session.execute(insert(Article).values(
+        title=slug, slug=slug, content='...', category=category, author_id=author_id,
+        is_published=True, created_at=datetime.utcnow(), updated_at=datetime.utcnow()))
+    db.session.commit()
+
+
+def test_related_articles_change_the_fingerprint(app):
+    user = User('Author', 'author@example.com')
+    db.session.add(user)
+    db.session.commit()
+    _article('a', 'history', user.id)
+    related = aliased(Article)
+    dependents = [Dependent(related.category, [related.id != Article.id, related.is_published == True],
+                            references=Article.category)]
+
+    def fingerprint():
+        return validators(Article, Article.slug, 'a', dependents)[1]
+
+    before = fingerprint()
+    _article('b', 'culture', user.id)
+    assert fingerprint() == before
+    _article('c', 'history', user.id)
+    assert fingerprint() != before
+
+
+def test_cached_pages_answer_revalidation_without_queries():
+    app = create_app(PageCacheConfig)
+
+    @app.route('/schools-test/<int:id>')
+    @cache_page()
+    @conditional(School)
+    def school_page(id):
+        return db.session.get(School, id).name
+
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        school = School('School', 'Cairo', 'Street 1', 'school@example.com')
+        user = User('Visitor', 'visitor@example.com')
+        db.session.add_all([school, user])
+        db.session.commit()
+        url, user_id = f'/schools-test/{school.id}', user.id
+        engine = db.engine
+
+    try:
+        response = client.get(url)
+        etag = response.headers['ETag']
+        assert response.headers['X-Page-Cache'] == 'MISS'
+
+        statements = []
+        event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['X-Page-Cache'] == 'HIT'
+        assert statements == []
+
+        # Signed-in users see their notifications in the page, so it is not validated
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
+    finally:
+        with app.app_context():
+            db.drop_all()
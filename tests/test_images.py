@@ -0,0 +1,26 @@
+import json
+from app.images import image_url, pick_derivative
+from app.models.school import School
+
+DERIVATIVES = json.dumps({
+    'thumb': {'png': 'logo_thumb.png', 'webp': 'logo_thumb.webp'},
+    'medium': {'png': 'logo_medium.png', 'webp': 'logo_medium.webp'},
+})
+
+
+def test_pick_derivative_falls_back_to_the_original():
+    assert pick_derivative('logo.png', None, 'thumb') == 'logo.png'
+    assert pick_derivative('logo.png', DERIVATIVES, 'large') == 'logo.png'
+    assert pick_derivative('logo.png', DERIVATIVES, 'thumb') == 'logo_thumb.png'
+    assert pick_derivative('logo.png', DERIVATIVES, 'thumb', 'webp') == 'logo_thumb.webp'
+    assert pick_derivative('logo.png', DERIVATIVES, 'thumb', 'avif') == 'logo_thumb.png'
+
+
+def test_image_url_uses_recorded_derivatives(app):
+    school = School('School', 'Cairo', 'Street 1', 'school@example.com', logo='logo.png')
+    with app.test_request_context():
+        assert image_url(school, 'thumb') == '/static/uploads/schools/logo.png'
+        school.logo_derivatives = DERIVATIVES
+        assert image_url(school, 'thumb') == '/static/uploads/schools/logo_thumb.png'
+        school.logo = None
+        assert image_url(school) is None
@@ -0,0 +1,56 @@
+from app import db
+from app.models.user import Notification, User
+from app.notifications import mark_notifications_read
+
+
+def _user():
+    user = User('Reader', 'reader@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_unread_count_follows_inserts_updates_and_deletes(app):
+    user = _user()
+    notifications = [Notification(user_id=user.id, title=f'n{i}', message='m') for i in range(3)]
+    db.session.add_all(notifications)
+    db.session.commit()
+    assert db.session.get(User, user.id).unread_notification_count == 3
+
+    notifications[0].is_read = True
+    db.session.commit()
+    assert db.session.get(User, user.id).unread_notification_count == 2
+
+    db.session.delete(notifications[1])
+    db.session.commit()
+    assert db.session.get(User, user.id).unread_notification_count == 1
+
+
+def test_mark_notifications_read(app):
+    user = _user()
+    db.session.add_all([Notification(user_id=user.id, title=f'n{i}', message='m') for i in range(2)])
+    db.session.commit()
+
+    assert mark_notifications_read(user.id) == 2
+    assert db.session.get(User, user.id).unread_notification_count == 0
+    assert Notification.query.filter_by(is_read=False).count() == 0
+
+
+def test_admin_notifications_page_renders_with_them_read(app, client, monkeypatch):
+    from flask import url_for
+    from flask_login import current_user
+    from app.routes import admin_routes
+
+    user = _user()
+    db.session.add_all([Notification(user_id=user.id, title=f'n{i}', message='m') for i in range(2)])
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+
+    rendered = []
+    monkeypatch.setattr(admin_routes, 'render_template',
+                        lambda *args, **kwargs: rendered.append(current_user.unread_notification_count) or '')
+    with app.test_request_context():
+        url = url_for('admin.admin_notifications')
+    assert client.get(url).status_code == 200
+    assert rendered == [0]
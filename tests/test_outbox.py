@@ -0,0 +1,78 @@
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from app import db, mail
+from app.models.outbox import OutboxEmail
+from app.outbox import OutboxWorker, enqueue_email
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return '250 Message accepted for delivery'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _use_smtp(app, port):
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                      MAIL_USERNAME=None, MAIL_PASSWORD=None, MAIL_SUPPRESS_SEND=False)
+    # Flask-Mail reads its settings when the extension is initialised
+    mail.init_app(app)
+
+
+@pytest.fixture
+def smtp_server(app):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    _use_smtp(app, controller.port)
+    yield handler
+    controller.stop()
+
+
+def test_enqueue_does_not_commit_the_callers_session(app):
+    enqueue_email('Hello', ['a@example.com'], text_body='hi')
+    db.session.rollback()
+    assert OutboxEmail.query.count() == 0
+
+
+def test_worker_sends_batch_through_smtp(app, smtp_server):
+    for i in range(5):
+        enqueue_email(f'Message {i}', [f'user{i}@example.com'], text_body='body', sender='noreply@example.com')
+    db.session.commit()
+
+    worker = OutboxWorker(app)
+    try:
+        assert worker.run_once() == 5
+    finally:
+        worker.pool.close_all()
+
+    assert sorted(envelope.rcpt_tos[0] for envelope in smtp_server.envelopes) == \
+        [f'user{i}@example.com' for i in range(5)]
+    db.session.expire_all()
+    assert {email.status for email in OutboxEmail.query} == {'sent'}
+    assert worker.run_once() == 0
+
+
+def test_worker_retries_when_smtp_is_down(app):
+    _use_smtp(app, _free_port())  # Nothing listens there
+
+    enqueue_email('Hello', ['a@example.com'], text_body='hi', sender='noreply@example.com')
+    db.session.commit()
+
+    worker = OutboxWorker(app)
+    assert worker.run_once() == 1
+    db.session.expire_all()
+    email = OutboxEmail.query.one()
+    assert email.status == 'pending'
+    assert email.attempts == 1
+    assert email.last_error
+    assert worker.run_once() == 0  # Backed off, not due yet
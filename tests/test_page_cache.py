@@ -0,0 +1,75 @@
+from flask import g
+from app.config import TestingConfig
+from app import create_app
+from app.page_cache import cache_page, page_cache
+from app.replicas import PRIMARY, REPLICA
+
+
+class PageCacheConfig(TestingConfig):
+    PAGE_CACHE_ENABLED = True
+    PAGE_CACHE_TYPE = 'memory'
+    READ_REPLICA_DEFAULT_ROUTE = REPLICA
+
+
+def test_misses_are_rendered_from_the_primary():
+    app = create_app(PageCacheConfig)
+    routes = []
+
+    @app.route('/cached')
+    @cache_page('articles')
+    def cached():
+        routes.append(g.get('db_route'))
+        return 'page'
+
+    client = app.test_client()
+    assert client.get('/cached').headers['X-Page-Cache'] == 'MISS'
+    assert client.get('/cached').headers['X-Page-Cache'] == 'HIT'
+    assert routes == [PRIMARY]
+
+    with app.app_context():
+        page_cache.purge(['articles'])
+    assert client.get('/cached').headers['X-Page-Cache'] == 'MISS'
+    assert routes == [PRIMARY, PRIMARY]
+
+
+def test_rating_purges_the_top_rated_listing():
+    from app import db
+    from app.models.media import Media, MediaRating
+    from app.models.user import User
+
+    app = create_app(PageCacheConfig)
+
+    @app.route('/top-rated')
+    @cache_page('media')
+    def top_rated():
+        # As content.media_list?sort=top_rated orders it
+        items = Media.query.filter_by(is_approved=True).order_by(Media.rating_score.desc(), Media.id.desc())
+        return ','.join(item.title for item in items)
+
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        user = User('Rater', 'rater@example.com')
+        db.session.add(user)
+        db.session.commit()
+        for title in ('first', 'second'):
+            item = Media(title, 'video', user.id)
+            item.is_approved = True
+            db.session.add(item)
+        db.session.commit()
+        first_id, user_id = Media.query.filter_by(title='first').one().id, user.id
+
+    try:
+        assert client.get('/top-rated').get_data(as_text=True) == 'second,first'
+        assert client.get('/top-rated').headers['X-Page-Cache'] == 'HIT'
+
+        with app.app_context():
+            db.session.add(MediaRating(first_id, user_id, 5))
+            db.session.commit()
+
+        response = client.get('/top-rated')
+        assert response.headers['X-Page-Cache'] == 'MISS'
+        assert response.get_data(as_text=True) == 'first,second'
+    finally:
+        with app.app_context():
+            db.drop_all()
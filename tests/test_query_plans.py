@@ -0,0 +1,8 @@
+from app.query_plans import check_query_plans
+
+
+def test_hot_queries_use_indexes(app):
+    results = check_query_plans()
+    assert results, 'check_query_plans only understands SQLite'
+    full_scans = {name: (scans, plan) for name, plan, scans in results if scans}
+    assert not full_scans
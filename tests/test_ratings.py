@@ -0,0 +1,23 @@
+from app import db
+from app.models.media import Media, MediaRating
+from app.models.user import User
+
+
+def test_changing_an_expired_rating_moves_it_between_buckets(app):
+    user = User('Rater', 'rater@example.com')
+    db.session.add(user)
+    db.session.commit()
+    media = Media('Video', 'video', user.id)
+    db.session.add(media)
+    db.session.commit()
+    rating = MediaRating(media.id, user.id, 2)
+    db.session.add(rating)
+    db.session.commit()
+
+    # After the commit the old value is no longer loaded; active_history
+    # loads it so the update can take it out of its bucket
+    rating.rating = 5
+    db.session.commit()
+
+    media = db.session.get(Media, media.id)
+    assert (media.rating_count, media.rating_sum, media.rating_2, media.rating_5) == (1, 5, 0, 1)
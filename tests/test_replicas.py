@@ -0,0 +1,31 @@
+import pytest
+from flask import g
+from sqlalchemy import select, text
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.article import Article
+from app.replicas import REPLICA, REPLICA_BIND
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "primary.db"}'
+        READ_REPLICA_URI = f'sqlite:///{tmp_path / "replica.db"}'
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        yield app
+        db.session.remove()
+    # init_app registered metadata for the bind on the shared db; other
+    # tests' apps have no such bind
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def test_textual_selects_follow_orm_reads_to_the_replica(replica_app):
+    replica = db.engines[REPLICA_BIND]
+    with replica_app.test_request_context():
+        g.db_route = REPLICA
+        assert db.session.get_bind(clause=select(Article)) is replica
+        assert db.session.get_bind(clause=text('SELECT count(*) FROM articles').columns()) is replica
+        assert db.session.get_bind(clause=text('DELETE FROM articles')) is db.engine
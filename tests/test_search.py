@@ -0,0 +1,16 @@
+from app import db
+from app.models.school import School
+from app.search import search
+
+
+def test_snippet_shows_the_text_as_written(app):
+    school = School('مَدْرَسَة الأمل', 'القاهرة', 'شارع المدرسة <1>', 'school@example.com')
+    db.session.add(school)
+    db.session.commit()
+
+    page = search('امل', 'schools')
+    assert page.items == [school]
+    assert str(school.search_snippet) == 'مَدْرَسَة <mark>الأمل</mark>'
+
+    page = search('مدرسه', 'schools')
+    assert str(page.items[0].search_snippet) == 'القاهرة شارع <mark>المدرسة</mark> &lt;1&gt;'
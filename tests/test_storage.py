@@ -0,0 +1,76 @@
+import io
+import os
+import pytest
+from sqlalchemy import event
+from werkzeug.datastructures import FileStorage
+from app import db
+from app.models.upload import StoredFile
+from app.storage import upload_store
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['UPLOAD_OBJECTS_FOLDER'] = str(tmp_path / 'objects')
+    return tmp_path
+
+
+def _upload(content=b'same bytes'):
+    return FileStorage(stream=io.BytesIO(content), filename='photo.jpg')
+
+
+def test_release_deletes_files_only_when_committed(uploads):
+    filename = upload_store.save(_upload(), 'articles')
+    db.session.commit()
+    link_path = upload_store.path('articles', filename)
+    object_path = os.path.join(upload_store.objects_folder(), filename)
+
+    assert upload_store.release('articles', filename)
+    db.session.rollback()
+    assert os.path.exists(link_path) and os.path.exists(object_path)
+    assert StoredFile.query.filter_by(filename=filename).one().ref_count == 1
+
+    assert upload_store.release('articles', filename)
+    assert os.path.exists(link_path)
+    db.session.commit()
+    assert not os.path.exists(link_path) and not os.path.exists(object_path)
+
+
+def test_concurrent_store_of_same_content_adds_a_reference(uploads):
+    inserted = []
+
+    # Another request inserts the row between this one's UPDATE and INSERT
+    def insert_after_update(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE stored_files') and not inserted:
+            inserted.append(True)
+            conn.connection.dbapi_connection.cursor().execute(
+                "INSERT INTO stored_files (folder, filename, size, ref_count) VALUES (?, ?, 0, 1)",
+                parameters[-2:])
+
+    event.listen(db.engine, 'after_cursor_execute', insert_after_update)
+    try:
+        filename = upload_store.save(_upload(), 'media')
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', insert_after_update)
+    db.session.commit()
+
+    assert inserted
+    assert StoredFile.query.filter_by(folder='media', filename=filename).one().ref_count == 2
+
+
+def test_object_store_is_not_served(app, client, uploads):
+    filename = upload_store.save(_upload(b'private report'), 'reports')
+    db.session.commit()
+    assert not os.path.abspath(upload_store.objects_folder()).startswith(os.path.abspath(app.static_folder))
+
+    # Copies left in the static folder by the old layout are not served either
+    legacy_path = os.path.join(app.static_folder, 'uploads', 'objects', 'legacy-test.txt')
+    os.makedirs(os.path.dirname(legacy_path), exist_ok=True)
+    with open(legacy_path, 'w') as f:
+        f.write('private')
+    try:
+        assert client.get('/static/uploads/objects/legacy-test.txt').status_code == 404
+        assert client.get(f'/static/uploads/objects/{filename}').status_code == 404
+        assert client.get(f'/static/uploads/reports/{filename}').status_code == 404
+    finally:
+        os.remove(legacy_path)
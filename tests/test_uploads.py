@@ -0,0 +1,85 @@
+import io
+import pytest
+from werkzeug.exceptions import ClientDisconnected
+from app import db
+from app.models.media import Media
+from app.models.school import School
+from app.models.user import User
+from app.uploads import UploadError, append_chunk, create_upload, partial_path
+
+DATA = b'0123456789' * 10
+
+
+class DroppedStream:
+    """A request body whose client disconnects after some bytes."""
+
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    def read(self, size):
+        chunk = self.stream.read(size)
+        if not chunk:
+            raise ClientDisconnected()
+        return chunk
+
+
+class FailingStream:
+    def read(self, size):
+        raise OSError('disk full')
+
+
+@pytest.fixture
+def upload(app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['UPLOAD_OBJECTS_FOLDER'] = str(tmp_path / 'objects')
+    user = User('Uploader', 'uploader@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return create_upload(user, len(DATA), {'filename': 'notes.pdf', 'media_type': 'document', 'title': 'Notes'})
+
+
+def test_chunks_complete_the_upload(upload):
+    assert append_chunk(upload, 0, io.BytesIO(DATA[:40]), 40) == 40
+    assert append_chunk(upload, 40, io.BytesIO(DATA[40:]), 60) == len(DATA)
+    assert upload.media_id is not None
+
+
+def test_dropped_connection_gives_back_the_unwritten_claim(upload):
+    assert append_chunk(upload, 0, DroppedStream(DATA[:30]), 60) == 30
+    with open(partial_path(upload), 'rb') as f:
+        assert f.read() == DATA[:30]
+    assert append_chunk(upload, 30, io.BytesIO(DATA[30:]), 70) == len(DATA)
+
+
+def test_failed_write_gives_back_the_claim(upload):
+    with pytest.raises(OSError):
+        append_chunk(upload, 0, FailingStream(), 50)
+    db.session.refresh(upload)
+    assert upload.offset == 0
+
+
+def test_stale_offset_is_rejected(upload):
+    append_chunk(upload, 0, io.BytesIO(DATA[:20]), 20)
+    with pytest.raises(UploadError) as error:
+        append_chunk(upload, 0, io.BytesIO(DATA[:20]), 20)
+    assert error.value.status == 409
+
+
+@pytest.mark.parametrize('school_id', ['abc', '-1', '999'])
+def test_unknown_school_is_rejected_before_upload(upload, school_id):
+    user = db.session.get(User, upload.user_id)
+    metadata = {'filename': 'notes.pdf', 'media_type': 'document', 'title': 'Notes', 'school_id': school_id}
+    with pytest.raises(UploadError) as error:
+        create_upload(user, len(DATA), metadata)
+    assert error.value.status == 400
+
+
+def test_upload_for_a_school_completes(upload):
+    school = School('School', 'Cairo', 'Street 1', 'school@example.com')
+    db.session.add(school)
+    db.session.commit()
+    user = db.session.get(User, upload.user_id)
+    metadata = {'filename': 'notes.pdf', 'media_type': 'document', 'title': 'Notes', 'school_id': str(school.id)}
+    school_upload = create_upload(user, len(DATA), metadata)
+    append_chunk(school_upload, 0, io.BytesIO(DATA), len(DATA))
+    assert db.session.get(Media, school_upload.media_id).school_id == school.id